@@ -0,0 +1,300 @@
+import os, json, queue, threading, itertools
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+from urllib.parse import urlparse, parse_qs
+from shrine_core import job_summary, FORMAT_VIDEO, FORMAT_AUDIO, PRIORITY_NORMAL, PRIORITY_NOW
+try:
+    from socketserver import UnixStreamServer
+except ImportError: # Windows
+    UnixStreamServer = None
+
+FORMAT_NAMES = {"video": FORMAT_VIDEO, "audio": FORMAT_AUDIO, FORMAT_VIDEO: FORMAT_VIDEO, FORMAT_AUDIO: FORMAT_AUDIO}
+
+class EventHub:
+    """Menyiarkan event antrean ke klien SSE.
+
+    publish() dipanggil di thread loop: event di-serialisasi sekali lalu dimasukkan ke
+    antrean setiap klien tanpa menunggu jaringan. Klien yang tertinggal lebih dari
+    backlog event diputus (klien cukup menyambung ulang lalu membaca GET /jobs).
+    """
+
+    def __init__(self, backlog=1000):
+        self.backlog = backlog
+        self.lock = threading.Lock()
+        self.subscribers = {} # antrean -> ikut event log atau tidak
+        self.ids = itertools.count(1)
+
+    def subscribe(self, logs=False):
+        q = queue.Queue(self.backlog)
+        with self.lock:
+            self.subscribers[q] = logs
+        return q
+
+    def unsubscribe(self, q):
+        with self.lock:
+            self.subscribers.pop(q, None)
+
+    def is_subscribed(self, q):
+        with self.lock:
+            return q in self.subscribers
+
+    def publish(self, event, data):
+        with self.lock:
+            if not self.subscribers:
+                return
+            targets = [q for q, logs in self.subscribers.items() if logs or event != "log"]
+        payload = f"id: {next(self.ids)}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+        for q in targets:
+            try:
+                q.put_nowait(payload)
+            except queue.Full:
+                self.unsubscribe(q)
+
+class ControlHandler(BaseHTTPRequestHandler):
+    """Endpoint API kontrol:
+
+    GET    /jobs                  daftar job (opsional ?status=Queued)
+    GET    /jobs/<id>             satu job dengan progress terkini
+    POST   /jobs                  {"urls": [...], "format": "video|audio", "resolution": "720p", "start": true}
+                                  (URL duplikat mengembalikan job yang sudah ada; link playlist
+                                  mengembalikan null dan entrinya menyusul sebagai event status)
+    DELETE /jobs/<id>             membatalkan job (sama dengan POST /jobs/<id>/cancel)
+    POST   /jobs/<id>/next        unduh berikutnya (mendahului antrean)
+    POST   /jobs/<id>/now         unduh sekarang, boleh menjeda unduhan berprioritas rendah
+    POST   /jobs/<id>/priority    {"priority": n} (0 normal, 1 next, 2 now)
+    POST   /jobs/<id>/move        {"position": n} posisi baru di urutan antrean
+    GET    /events                aliran event (Server-Sent Events), ?logs=1 ikut output yt-dlp
+    """
+    protocol_version = "HTTP/1.1"
+    server_version = "ShrineControl/1.0"
+
+    def address_string(self):
+        # Socket Unix tidak punya alamat klien
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        pass # Akses API tidak ikut mengisi log unduhan
+
+    @property
+    def control(self):
+        return self.server.control
+
+    def send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        data = json.loads(self.rfile.read(length))
+        if not isinstance(data, dict):
+            raise ValueError("body must be a JSON object")
+        return data
+
+    def authorized(self, query):
+        token = self.control.token
+        if not token:
+            return True
+        # EventSource di browser tidak bisa mengirim header, jadi token juga diterima di query
+        return self.headers.get("Authorization") == f"Bearer {token}" or query.get("token", [None])[0] == token
+
+    def route(self, method):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = [p for p in url.path.split("/") if p]
+        if not self.authorized(query):
+            return self.send_json(401, {"error": "unauthorized"})
+        try:
+            if parts == ["events"] and method == "GET":
+                return self.stream_events(query.get("logs", ["0"])[0] not in ("0", ""))
+            if parts == ["jobs"] and method == "GET":
+                status = query.get("status", [None])[0]
+                return self.send_json(200, {"jobs": self.control.call(self.control.list_jobs, status)})
+            if parts == ["jobs"] and method == "POST":
+                status, data = self.control.submit_request(self.read_json())
+                return self.send_json(status, data)
+            if len(parts) >= 2 and parts[0] == "jobs" and parts[1].isdigit():
+                job_id = int(parts[1])
+                action = parts[2] if len(parts) == 3 else None
+                if method == "GET" and action is None:
+                    job = self.control.call(self.control.get_job, job_id)
+                    return self.send_json(200, job) if job else self.send_json(404, {"error": "job not found"})
+                if (method == "DELETE" and action is None) or (method == "POST" and action == "cancel"):
+                    return self.send_json(200, {"id": job_id, "cancelled": self.control.call(self.control.manager.cancel, job_id)})
+                manager = self.control.manager
+                if method == "POST" and action == "next":
+                    return self.send_json(200, {"id": job_id, "ok": self.control.call(manager.download_next, job_id)})
+                if method == "POST" and action == "now":
+                    return self.send_json(200, {"id": job_id, "ok": self.control.call(manager.download_now, job_id)})
+                if method == "POST" and action == "priority":
+                    priority = self.read_json().get("priority")
+                    # bool adalah turunan int, jadi true/false ikut ditolak
+                    if not isinstance(priority, int) or isinstance(priority, bool):
+                        raise ValueError("priority must be an integer")
+                    if not PRIORITY_NORMAL <= priority <= PRIORITY_NOW:
+                        raise ValueError(f"priority must be between {PRIORITY_NORMAL} and {PRIORITY_NOW}")
+                    return self.send_json(200, {"id": job_id, "ok": self.control.call(manager.set_priority, job_id, priority)})
+                if method == "POST" and action == "move":
+                    position = self.read_json().get("position")
+                    if not isinstance(position, int) or isinstance(position, bool):
+                        raise ValueError("position must be an integer")
+                    return self.send_json(200, {"id": job_id, "ok": self.control.call(self.control.move_job, job_id, position)})
+            self.send_json(404, {"error": "not found"})
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+        except Exception as e:
+            self.send_json(500, {"error": str(e)})
+
+    def stream_events(self, logs):
+        q = self.control.hub.subscribe(logs)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(b": connected\n\n")
+            self.wfile.flush()
+            while not self.control.closed:
+                try:
+                    payload = q.get(timeout=15)
+                except queue.Empty:
+                    if not self.control.hub.is_subscribed(q):
+                        break # Tertinggal terlalu jauh, klien harus menyambung ulang
+                    payload = b": ping\n\n"
+                self.wfile.write(payload)
+                self.wfile.flush()
+        except OSError:
+            pass # Klien menutup koneksi
+        finally:
+            self.control.hub.unsubscribe(q)
+            self.close_connection = True
+
+    def do_GET(self):
+        self.route("GET")
+
+    def do_POST(self):
+        self.route("POST")
+
+    def do_DELETE(self):
+        self.route("DELETE")
+
+class ControlHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+if UnixStreamServer is not None:
+    class ControlUnixServer(ThreadingMixIn, UnixStreamServer):
+        daemon_threads = True
+
+class ControlServer:
+    """API kontrol HTTP/JSON lokal di atas DownloadManager.
+
+    Server berjalan di thread sendiri (satu thread per koneksi). Setiap permintaan yang
+    membaca atau mengubah antrean dijalankan di thread loop manager lewat call(), jadi
+    state antrean tetap hanya disentuh satu thread. submit(urls, format, resolution,
+    start) disediakan aplikasi pemilik antrean (GUI atau CLI) dan mengembalikan ID job;
+    move(job_id, baris) opsional untuk pemilik yang menampilkan urutan antrean.
+    """
+
+    def __init__(self, loop, manager, submit, host="127.0.0.1", port=8765, socket_path=None, token="", move=None):
+        self.loop = loop
+        self.manager = manager
+        self.submit = submit
+        self.move = move or manager.move_job # GUI membungkusnya dengan notifikasi model
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.token = token
+        self.hub = EventHub()
+        self.server = None
+        self.thread = None
+        self.closed = False
+        manager.add_listener(self.on_manager_event)
+
+    def start(self):
+        if self.socket_path and UnixStreamServer is not None:
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path) # Sisa sesi sebelumnya
+            self.server = ControlUnixServer(self.socket_path, ControlHandler)
+        else:
+            self.server = ControlHTTPServer((self.host, self.port), ControlHandler)
+        self.server.control = self
+        self.thread = threading.Thread(target=self.server.serve_forever, name="ControlServer", daemon=True)
+        self.thread.start()
+
+    @property
+    def address(self):
+        return self.socket_path if isinstance(self.server.server_address, str) else "http://%s:%d" % self.server.server_address[:2]
+
+    def call(self, fn, *args, timeout=30):
+        """Menjalankan fn di thread loop dan menunggu hasilnya (dari thread permintaan)."""
+        future = Future()
+        def run():
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+        self.loop.post(run)
+        return future.result(timeout)
+
+    # Dijalankan di thread loop
+    def list_jobs(self, status=None):
+        return [job_summary(job) for job in self.manager.jobs if status is None or job["status"] == status]
+
+    def get_job(self, job_id):
+        job = self.manager.jobs.get(job_id)
+        return job_summary(job) if job else None
+
+    def submit_request(self, body):
+        """Memvalidasi body POST /jobs di thread permintaan, lalu menambahkan job di thread loop."""
+        urls = body.get("urls") or ([body["url"]] if body.get("url") else [])
+        if not isinstance(urls, list) or not all(isinstance(u, str) for u in urls):
+            raise ValueError("urls must be a list of strings")
+        urls = [u.strip() for u in urls if u.strip()]
+        if not urls:
+            raise ValueError("no urls given")
+        fmt = FORMAT_NAMES.get(body.get("format", "video"))
+        if fmt is None:
+            raise ValueError("format must be 'video' or 'audio'")
+        format_map = self.manager.config["format_map"]
+        resolution = body.get("resolution") or next(iter(format_map))
+        if fmt == FORMAT_VIDEO and resolution not in format_map:
+            raise ValueError(f"resolution must be one of: {', '.join(format_map)}")
+        # Duplikat digabung ke job yang sudah ada (ID None untuk URL berulang dalam body)
+        job_ids = self.call(self.submit, urls, fmt, resolution, bool(body.get("start", True)))
+        return 201, {"jobs": self.call(lambda: [self.get_job(job_id) if job_id else None for job_id in job_ids])}
+
+    def move_job(self, job_id, position):
+        if self.manager.jobs.get(job_id) is None:
+            return False
+        self.move(job_id, position)
+        return True
+
+    def on_manager_event(self, event, job_id, data):
+        if event in ("status", "progress"):
+            job = self.manager.jobs.get(job_id)
+            if job:
+                self.hub.publish(event, job_summary(job))
+        elif event == "log":
+            self.hub.publish("log", {"id": job_id, "lines": [message for message, _ in data]})
+        elif event == "finished":
+            status, message = data
+            self.hub.publish("finished", {"id": job_id, "status": status, "message": message})
+        elif event == "idle":
+            self.hub.publish("idle", {})
+
+    def close(self):
+        self.closed = True
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            if isinstance(self.server.server_address, str):
+                try: os.remove(self.socket_path)
+                except OSError: pass
+            self.server = None
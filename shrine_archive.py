@@ -0,0 +1,38 @@
+import os
+
+def archive_key(extractor, video_id):
+    """Kunci arsip seperti yt-dlp: '<extractor_key huruf kecil> <id>', atau None."""
+    return f"{extractor.lower()} {video_id}" if extractor and video_id else None
+
+class DownloadArchive:
+    """Arsip video yang sudah selesai diunduh, dalam format file --download-archive yt-dlp.
+
+    File dibaca sekali ke set saat start-up, jadi pengecekan duplikat tetap instan untuk
+    arsip ratusan ribu baris. Baris baru ditulis yt-dlp sendiri saat unduhan selesai
+    (perintah unduhan membawa --download-archive); aplikasi hanya menambah set di memori.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.keys = set()
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) >= 2:
+                        self.keys.add(f"{parts[0]} {parts[1]}")
+        except OSError:
+            pass
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key):
+        if key:
+            self.keys.add(key)
@@ -0,0 +1,127 @@
+import os, json, sqlite3, threading, time
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+from shrine_archive import archive_key
+
+# Parameter query yang hanya berisi pelacakan, tidak mengubah video yang dituju
+TRACKING_PARAMS = {"si", "feature", "fbclid", "gclid", "igshid", "igsh", "pp", "ab_channel", "is_from_webapp", "sender_device"}
+
+def app_data_dir(override=None):
+    """Folder data aplikasi (cache, state) di luar folder kerja."""
+    if override:
+        path = override
+    else:
+        base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        path = os.path.join(base, "ShrineDownloader")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def normalize_url(url):
+    """Menormalkan URL agar link yang sama (beda www/m., tracking, fragment) punya kunci yang sama."""
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    for prefix in ("www.", "m.", "mobile."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    path = parsed.path.rstrip("/") or "/"
+    query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+             if k not in TRACKING_PARAMS and not k.startswith("utm_")]
+    if host == "youtu.be" and path != "/":
+        # youtu.be/<id> dan youtube.com/watch?v=<id> adalah video yang sama
+        host, query = "youtube.com", [("v", path.lstrip("/"))] + [(k, v) for k, v in query if k != "v"]
+        path = "/watch"
+    return urlunparse(((parsed.scheme or "https").lower(), host, path, "", urlencode(sorted(query)), ""))
+
+def video_key(info):
+    """Kunci extractor+id dari info yt-dlp, atau None jika tidak lengkap. Sama dengan kunci
+    arsip unduhan (archive_key), jadi cache, cek duplikat, dan arsip memakai satu format."""
+    return archive_key(info.get("extractor_key") or info.get("ie_key"), info.get("id"))
+
+def compact_info(info):
+    """Menyimpan hanya field yang dipakai UI; URL stream bertanda tangan sengaja dibuang."""
+    formats = [
+        {k: f.get(k) for k in ("format_id", "ext", "width", "height", "fps", "vcodec", "acodec", "tbr", "filesize", "filesize_approx") if f.get(k) is not None}
+        for f in info.get("formats") or []
+    ]
+    return {
+        "title": info.get("title", "N/A"),
+        "duration": info.get("duration"),
+        "width": info.get("width"),
+        "height": info.get("height"),
+        "extractor": info.get("extractor_key"),
+        "id": info.get("id"),
+        "thumbnail": info.get("thumbnail"),
+        "formats": formats,
+    }
+
+class MetadataCache:
+    """Cache metadata persisten di SQLite dengan masa berlaku (TTL) dan batas ukuran LRU.
+
+    Satu koneksi dipakai bersama oleh thread GUI (lookup) dan worker metadata (simpan),
+    dijaga dengan lock. URL dinormalkan lalu dipetakan ke kunci extractor:id, sehingga
+    beberapa bentuk link ke video yang sama berbagi satu entri.
+    """
+
+    EVICT_CHECK_EVERY = 50
+
+    def __init__(self, path, ttl_seconds=7 * 24 * 3600, max_entries=20000):
+        self.ttl = ttl_seconds
+        self.max_entries = max(1, int(max_entries))
+        self.lock = threading.Lock()
+        self.puts_since_check = 0
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, data TEXT NOT NULL, fetched REAL NOT NULL, accessed REAL NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS metadata_accessed ON metadata (accessed)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, key TEXT NOT NULL)")
+        self.db.commit()
+
+    def get(self, url):
+        """Mengembalikan metadata ringkas untuk URL, atau None jika tidak ada/kedaluwarsa."""
+        url_key = normalize_url(url)
+        now = time.time()
+        with self.lock:
+            row = self.db.execute(
+                "SELECT m.key, m.data, m.fetched FROM urls u JOIN metadata m ON m.key = u.key WHERE u.url = ?",
+                (url_key,)).fetchone()
+            if not row:
+                return None
+            key, data, fetched = row
+            if now - fetched > self.ttl:
+                self.db.execute("DELETE FROM metadata WHERE key = ?", (key,))
+                self.db.execute("DELETE FROM urls WHERE key = ?", (key,))
+                self.db.commit()
+                return None
+            self.db.execute("UPDATE metadata SET accessed = ? WHERE key = ?", (now, key))
+            self.db.commit()
+        return json.loads(data)
+
+    def put(self, url, info):
+        """Menyimpan info yt-dlp (lengkap atau ringkas) untuk URL."""
+        url_key = normalize_url(url)
+        key = video_key(info) or url_key
+        data = json.dumps(compact_info(info), ensure_ascii=False)
+        now = time.time()
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO metadata (key, data, fetched, accessed) VALUES (?, ?, ?, ?)", (key, data, now, now))
+            self.db.execute("INSERT OR REPLACE INTO urls (url, key) VALUES (?, ?)", (url_key, key))
+            self.db.commit()
+            self.puts_since_check += 1
+            if self.puts_since_check >= self.EVICT_CHECK_EVERY:
+                self.puts_since_check = 0
+                self._evict()
+
+    def _evict(self):
+        """Membuang entri kedaluwarsa, lalu entri yang paling lama tidak dipakai di atas batas."""
+        self.db.execute("DELETE FROM metadata WHERE fetched < ?", (time.time() - self.ttl,))
+        (count,) = self.db.execute("SELECT COUNT(*) FROM metadata").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self.db.execute("DELETE FROM metadata WHERE key IN (SELECT key FROM metadata ORDER BY accessed LIMIT ?)", (excess,))
+        self.db.execute("DELETE FROM urls WHERE key NOT IN (SELECT key FROM metadata)")
+        self.db.commit()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
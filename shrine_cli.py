@@ -0,0 +1,297 @@
+"""Shrine Downloader tanpa GUI.
+
+Membaca daftar URL dari argumen, file, atau stdin (satu URL per baris), menjalankan
+antrean paralel yang sama dengan GUI (shrine_core.DownloadManager), dan mencetak
+progress sebagai JSON Lines ke stdout:
+
+    python shrine_cli.py -i links.txt --format audio
+    cat links.txt | python shrine_cli.py -i - -o D:\\Musik
+
+Setiap baris output adalah objek dengan field "event" (added, queued, progress, log,
+finished, skipped, error, playlist, playlist_done, done) dan "job" (ID job). Link
+playlist/channel dijabarkan bertahap: entrinya masuk antrean per halaman begitu terbaca.
+Exit code 1 jika ada job yang gagal.
+
+Dengan --api, API kontrol lokal (shrine_api) ikut berjalan; --serve membuatnya tetap
+hidup sebagai daemon yang menerima job lewat API sampai dihentikan (Ctrl+C).
+"""
+import sys, os, json, argparse, threading, multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from shrine_cache import MetadataCache, app_data_dir, normalize_url
+from shrine_core import (DownloadManager, EventLoop, MetadataFetcher, PlaylistExpander, new_job,
+                         is_playlist_url, FORMAT_VIDEO, FORMAT_AUDIO)
+from shrine_api import ControlServer
+
+def emit(event, job=None, **fields):
+    """Mencetak satu event sebagai JSON Lines; hanya dipanggil dari thread loop."""
+    record = {"event": event}
+    if job is not None:
+        record["job"] = job
+    record.update(fields)
+    sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+class HeadlessRunner:
+    """Menghubungkan sumber URL, pool metadata, dan DownloadManager di satu EventLoop.
+
+    Thread pembaca input dan worker metadata hanya mengirim hasil lewat loop.post(), jadi
+    state antrean tetap hanya disentuh thread loop seperti di GUI. Program selesai saat
+    semua input sudah ditutup dan antrean manager kosong.
+    """
+
+    def __init__(self, config, output_folder, fmt, resolution, show_logs=False):
+        self.config = config
+        self.fmt = fmt
+        self.resolution = resolution
+        self.show_logs = show_logs
+        self.loop = EventLoop()
+        self.manager = DownloadManager(config, self.loop, output_folder, listener=self.on_manager_event)
+        self.metadata_cache = MetadataCache(
+            os.path.join(app_data_dir(config.get("data_dir")), "metadata.db"),
+            ttl_seconds=float(config.get("metadata_cache_ttl_hours", 168)) * 3600,
+            max_entries=config.get("metadata_cache_max_entries", 20000))
+        self.meta_workers = max(1, int(config.get("metadata_workers", 4)))
+        self.meta_pool = ThreadPoolExecutor(self.meta_workers)
+        self.meta_inflight = 0
+        self.meta_batch_size = max(1, int(config.get("metadata_batch_size", 20)))
+        self.meta_in_process = bool(config.get("metadata_in_process", True))
+        self.expand_playlists = bool(config.get("expand_playlists", True))
+        self.playlist_page_size = max(1, int(config.get("playlist_page_size", 50)))
+        self.expanders = {} # (URL ternormalisasi, format) -> PlaylistExpander yang berjalan
+        self.open_inputs = 0
+        self.failed = 0
+
+    # Input
+    def read_input(self, stream):
+        """Thread pembaca: URL dikirim per baris agar stdin yang terus mengalir langsung diproses."""
+        try:
+            for line in stream:
+                url = line.strip()
+                if url and not url.startswith("#"):
+                    self.loop.post(self.add_urls, [url])
+        finally:
+            self.loop.post(self.input_closed)
+
+    def input_closed(self):
+        self.open_inputs -= 1
+        self.check_done()
+
+    def add_urls(self, urls, fmt=None, resolution=None, start=True):
+        """Menambahkan URL ke antrean (juga dipakai API kontrol); mengembalikan ID job per
+        URL, dengan ID job lama untuk URL yang sudah ada di antrean dan None untuk link
+        playlist (entrinya menyusul lewat expand_playlist). start=False hanya mengantrekan;
+        antrean berjalan pada permintaan berikutnya dengan start=True atau saat input habis."""
+        fmt = fmt or self.fmt
+        resolution = resolution or self.resolution
+        playlists = [url for url in urls if self.expand_playlists and is_playlist_url(url)]
+        for url in playlists:
+            self.expand_playlist(url, fmt, resolution)
+        fresh, duplicates = self.manager.screen_urls([url for url in urls if url not in playlists], fmt)
+        for url, existing in duplicates.items():
+            emit("skipped", existing, url=url, reason="duplicate")
+        job_ids = {}
+        for url in fresh:
+            job = new_job(url, fmt, resolution)
+            job_id = self.manager.jobs.add(job)
+            job_ids[url] = job_id
+            emit("added", job_id, url=url)
+            cached = self.metadata_cache.get(url)
+            if cached:
+                self.on_metadata({"title": cached["title"], "extractor_key": cached.get("extractor"), "id": cached.get("id")}, url, job_id)
+            else:
+                self.manager.metadata.add(job) # Di-fetch saat mendekati giliran unduh
+        self.pump_metadata_queue()
+        if start and not self.manager.running:
+            self.manager.start()
+        return [job_ids.get(url, duplicates.get(url)) for url in urls]
+
+    # Playlist
+    def expand_playlist(self, url, fmt, resolution):
+        key = (normalize_url(url), fmt)
+        if key in self.expanders:
+            return # Playlist yang sama sedang dijabarkan
+        expander = PlaylistExpander(
+            url, self.manager.yt_dlp_path,
+            on_entries=lambda page: self.loop.post(self.on_playlist_entries, page, url, fmt, resolution),
+            on_done=lambda count, error: self.loop.post(self.on_playlist_done, key, url, count, error),
+            in_process=self.meta_in_process, page_size=self.playlist_page_size)
+        self.expanders[key] = expander
+        emit("playlist", url=url)
+        threading.Thread(target=expander.run, name="PlaylistExpander", daemon=True).start()
+
+    def on_playlist_entries(self, page, source, fmt, resolution):
+        """Satu halaman entri playlist: langsung antre dengan judul/ID dari daftar flat,
+        tanpa fetch metadata per video (yt-dlp mengambilnya sendiri saat mengunduh)."""
+        fresh, duplicates = self.manager.screen_urls([url for url, _ in page], fmt)
+        for url, existing in duplicates.items():
+            emit("skipped", existing, url=url, reason="duplicate")
+        fresh = set(fresh)
+        for url, info in page:
+            if url not in fresh:
+                continue
+            fresh.discard(url)
+            job_id = self.manager.jobs.add(new_job(url, fmt, resolution))
+            emit("added", job_id, url=url, playlist=source)
+            self.manager.accept_metadata(job_id, info)
+        if not self.manager.running:
+            self.manager.start()
+
+    def on_playlist_done(self, key, url, count, error):
+        self.expanders.pop(key, None)
+        if error and not count:
+            self.failed += 1
+            emit("error", url=url, message=error)
+        emit("playlist_done", url=url, entries=count)
+        self.check_done()
+
+    # Metadata
+    def pump_metadata_queue(self):
+        """Mengirim batch ke pool selama masih ada worker kosong (sama seperti GUI). Tanpa
+        tampilan, yang diambil hanya job dalam horizon scheduler (metadata_horizon)."""
+        if self.meta_inflight >= self.meta_workers:
+            return
+        wanted = self.manager.metadata.wanted()
+        while wanted and self.meta_inflight < self.meta_workers:
+            free_workers = self.meta_workers - self.meta_inflight
+            size = min(self.meta_batch_size, -(-len(wanted) // free_workers))
+            items = self.manager.metadata.claim(wanted[:size])
+            del wanted[:size]
+            fetcher = MetadataFetcher(
+                items, self.manager.yt_dlp_path,
+                on_result=lambda info, url, job_id: self.loop.post(self.on_metadata, info, url, job_id),
+                on_error=lambda message, job_id: self.loop.post(self.on_metadata_error, message, job_id),
+                in_process=self.meta_in_process, cache=self.metadata_cache)
+            self.meta_inflight += 1
+            self.meta_pool.submit(self.run_fetcher, fetcher)
+
+    def run_fetcher(self, fetcher):
+        try:
+            fetcher.run()
+        finally:
+            self.loop.post(self.on_metadata_batch_done)
+
+    def on_metadata_batch_done(self):
+        self.meta_inflight -= 1
+        self.pump_metadata_queue()
+        self.check_done()
+
+    def on_metadata(self, info, url, job_id):
+        self.manager.accept_metadata(job_id, {"title": info.get("title", "N/A"), "extractor": info.get("extractor_key"), "id": info.get("id")})
+
+    def on_metadata_error(self, message, job_id):
+        emit("error", job_id, message=message)
+        self.manager.reject_metadata(job_id, message)
+
+    # Event manager
+    def on_manager_event(self, event, job_id, data):
+        if event in ("status", "finished"):
+            self.pump_metadata_queue() # Horizon bergeser saat job mulai atau selesai
+        if event == "status":
+            job = self.manager.jobs.get(job_id)
+            if job["status"] == "Queued":
+                emit("queued", job_id, title=job["title"], host=job["host"], details=job["details"])
+            elif job["status"] == "Error":
+                self.failed += 1
+            elif job["status"] == "Skipped":
+                emit("skipped", job_id, url=job["url"], reason=job["details"].split(" | ")[-1])
+        elif event == "progress":
+            # fragments: --concurrent-fragments pilihan FragmentTuner untuk unduhan ini
+            emit("progress", job_id, percent=data.percent, fragments=self.manager.jobs.get(job_id).get("fragments"),
+                 **{k: v for k, v in asdict(data).items() if k != "job_id"})
+        elif event == "log":
+            if self.show_logs:
+                for message, status in data:
+                    emit("log", job_id, status=status, message=message)
+        elif event == "finished":
+            status, message = data
+            if status == "error":
+                self.failed += 1
+            emit("finished", job_id, status=status, message=message)
+        elif event == "idle":
+            self.check_done()
+
+    def check_done(self):
+        if self.open_inputs or self.expanders or self.meta_inflight or self.manager.running:
+            return
+        # Pemeriksaan terakhir: manager bisa saja masih menunggu job Fetching
+        if self.manager.scheduler.has_pending() or self.manager.active or self.manager.jobs.count("Fetching"):
+            # Job yang ditahan lewat API (start=false) dijalankan setelah semua input ditutup
+            if not self.manager.running:
+                self.manager.start()
+            return
+        emit("done", total=len(self.manager.jobs), failed=self.failed)
+        self.loop.stop()
+
+    def run(self, urls, inputs, api=False, serve=False):
+        # Mode serve dihitung sebagai input yang tidak pernah ditutup
+        self.open_inputs = len(inputs) + (1 if serve else 0)
+        control = None
+        if api:
+            config = self.config
+            control = ControlServer(self.loop, self.manager, self.add_urls,
+                                    config.get("api_host", "127.0.0.1"), config.get("api_port", 8765),
+                                    config.get("api_socket") or None, config.get("api_token", ""))
+            control.start()
+            emit("api", address=control.address)
+        if urls:
+            self.loop.post(self.add_urls, urls)
+        for stream in inputs:
+            threading.Thread(target=self.read_input, args=(stream,), daemon=True).start()
+        self.loop.post(self.check_done)
+        try:
+            self.loop.run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if control is not None:
+                control.close()
+            for expander in self.expanders.values():
+                expander.cancel()
+            self.meta_pool.shutdown(wait=False, cancel_futures=True)
+            self.manager.close()
+            self.metadata_cache.close()
+        return 1 if self.failed else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shrine Downloader headless: unduh daftar URL dan cetak progress sebagai JSON Lines.")
+    parser.add_argument("urls", nargs="*", help="URL yang akan diunduh")
+    parser.add_argument("-i", "--input", action="append", default=[], metavar="FILE",
+                        help="file berisi satu URL per baris ('-' untuk stdin); boleh diulang")
+    parser.add_argument("-f", "--format", choices=("video", "audio"), default="video")
+    parser.add_argument("-r", "--resolution",
+                        help="kunci format_map di video_config.json (default: kunci pertama, sama seperti GUI)")
+    parser.add_argument("-o", "--output", default="downloads", help="folder hasil unduhan")
+    parser.add_argument("-c", "--config", default="video_config.json")
+    parser.add_argument("--logs", action="store_true", help="ikut cetak output yt-dlp sebagai event log")
+    parser.add_argument("--api", action="store_true", help="jalankan API kontrol lokal (api_host/api_port/api_socket di config)")
+    parser.add_argument("--serve", action="store_true", help="tetap berjalan dan terima job lewat API kontrol (menyiratkan --api)")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.config, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        parser.error(f"config {args.config}: {e}")
+    args.resolution = args.resolution or next(iter(config["format_map"]))
+    if args.resolution not in config["format_map"]:
+        parser.error(f"resolution must be one of: {', '.join(config['format_map'])}")
+    if not args.urls and not args.input and not args.serve:
+        parser.error("no URLs given (use arguments, -i FILE / -i -, or --serve)")
+
+    inputs = []
+    for path in args.input:
+        try:
+            inputs.append(sys.stdin if path == "-" else open(path, "r", encoding="utf-8"))
+        except OSError as e:
+            parser.error(f"input {path}: {e}")
+
+    output_folder = os.path.abspath(args.output)
+    os.makedirs(output_folder, exist_ok=True)
+    fmt = FORMAT_AUDIO if args.format == "audio" else FORMAT_VIDEO
+    runner = HeadlessRunner(config, output_folder, fmt, args.resolution, args.logs)
+    return runner.run(args.urls, inputs, args.api or args.serve, args.serve)
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support() # Proses worker engine pada build executable
+    sys.exit(main())
@@ -0,0 +1,1484 @@
+"""Inti Shrine Downloader tanpa GUI: model job, scheduler, pembangun perintah yt-dlp,
+pembacaan progress, pengambilan metadata, dan DownloadManager yang menjalankan antrean.
+
+Dipakai bersama oleh GUI (shrine_downloader61.py) dan entry point headless (shrine_cli.py).
+Modul ini tidak mengimpor Qt; pemanggil menyediakan loop event (post/call_later) tempat
+semua perubahan state antrean dijalankan, sehingga state hanya disentuh dari satu thread.
+"""
+import sys, os, re, subprocess, json, platform, time, itertools, heapq, queue, threading
+from collections import deque, Counter
+from dataclasses import dataclass
+from datetime import datetime
+from urllib.parse import urlparse, parse_qs
+from shrine_cache import app_data_dir, normalize_url
+from shrine_archive import DownloadArchive, archive_key
+from shrine_engine import EnginePool
+from shrine_resume import PartialStore
+from shrine_journal import QueueJournal, JOURNAL_FIELDS
+try:
+    import yt_dlp # Opsional: metadata dan mode engine di dalam proses
+except ImportError:
+    yt_dlp = None
+
+FORMAT_VIDEO = "Video (MP4)"
+FORMAT_AUDIO = "Audio (MP3)"
+# Prioritas job: "download next" dan "download now" (yang terakhir boleh menyela unduhan lain)
+PRIORITY_NORMAL, PRIORITY_NEXT, PRIORITY_NOW = 0, 1, 2
+
+# --- JOB STORE ---
+class JobStore:
+    """Penyimpanan job dengan ID stabil.
+
+    Sinyal worker membawa ID job, bukan nomor baris tabel, sehingga pencarian job
+    cukup satu lookup dict. Urutan tampilan disimpan terpisah (order) beserta indeks
+    ID -> baris untuk model tabel, dan jumlah job per status dijaga agar pengecekan
+    seperti "masih ada yang Fetching?" tidak perlu memindai seluruh antrean.
+    Jika ada QueueJournal, setiap penambahan dan perubahan field persisten dicatat di sana.
+    Indeks URL ternormalisasi dan kunci video (extractor + id), masing-masing per format,
+    dipakai untuk menolak duplikat saat enqueue tanpa memindai antrean.
+    """
+
+    INACTIVE = ("Error", "Cancelled", "Skipped") # tidak menghalangi job baru untuk video yang sama
+
+    def __init__(self, journal=None):
+        self.jobs = {}   # id -> job
+        self.order = []  # id dalam urutan tampilan
+        self.rows = {}   # id -> indeks di order
+        self.url_index = {}   # (URL ternormalisasi, format) -> ID job terbaru
+        self.video_index = {} # (kunci arsip, format) -> ID job
+        self.status_counts = Counter()
+        self.ids = itertools.count(1)
+        self.journal = journal
+
+    def __len__(self):
+        return len(self.order)
+
+    def __iter__(self):
+        return (self.jobs[job_id] for job_id in self.order)
+
+    def add(self, job):
+        job_id = next(self.ids)
+        job["id"] = job_id
+        if job.get("rank") is None:
+            # Urutan masuk; sudah ada sejak job masih Fetching agar move_job bisa memakainya
+            job["rank"] = job_id
+        self.jobs[job_id] = job
+        self.rows[job_id] = len(self.order)
+        self.order.append(job_id)
+        self.url_index[(normalize_url(job["url"]), job["format"])] = job_id
+        if job.get("video_key"):
+            self.video_index.setdefault((job["video_key"], job["format"]), job_id)
+        self.status_counts[job["status"]] += 1
+        if self.journal:
+            self.journal.append(QueueJournal.add_record(job))
+        return job_id
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def at(self, row):
+        return self.jobs[self.order[row]]
+
+    def row_of(self, job_id):
+        return self.rows.get(job_id)
+
+    def set_status(self, job, status):
+        self.status_counts[job["status"]] -= 1
+        self.status_counts[status] += 1
+        job["status"] = status
+        if self.journal:
+            self.journal.update(job["id"], status=status)
+
+    def update(self, job, **fields):
+        """Mengubah field job; field yang persisten ikut dicatat di jurnal."""
+        job.update(fields)
+        if self.journal:
+            persisted = {k: v for k, v in fields.items() if k in JOURNAL_FIELDS}
+            if persisted:
+                self.journal.update(job["id"], **persisted)
+
+    def count(self, status):
+        return self.status_counts[status]
+
+    def move(self, job_id, row):
+        """Memindahkan job ke baris lain dalam urutan tampilan."""
+        old = self.rows[job_id]
+        row = max(0, min(row, len(self.order) - 1))
+        if row == old:
+            return
+        self.order.pop(old)
+        self.order.insert(row, job_id)
+        for index in range(min(old, row), max(old, row) + 1):
+            self.rows[self.order[index]] = index
+
+    def find_duplicate(self, fmt, url=None, video_key=None, exclude=None):
+        """ID job aktif/selesai lain untuk URL atau video yang sama dengan format yang sama, atau None."""
+        for index, key in ((self.url_index, normalize_url(url) if url else None), (self.video_index, video_key)):
+            job_id = index.get((key, fmt)) if key else None
+            job = self.jobs.get(job_id)
+            if job and job_id != exclude and job["status"] not in self.INACTIVE:
+                return job_id
+        return None
+
+    def index_video(self, job, video_key):
+        """Mencatat kunci video job; job lama yang gagal/dibatalkan digantikan."""
+        key = (video_key, job["format"])
+        current = self.jobs.get(self.video_index.get(key))
+        if current is None or current["status"] in self.INACTIVE:
+            self.video_index[key] = job["id"]
+        self.update(job, video_key=video_key)
+
+    def clear(self):
+        self.jobs.clear()
+        self.order.clear()
+        self.rows.clear()
+        self.url_index.clear()
+        self.video_index.clear()
+        self.status_counts.clear()
+        if self.journal:
+            self.journal.rewrite([])
+
+# --- SCHEDULER ---
+def host_key(url, extractor=None):
+    """Kunci pengelompokan job: nama extractor yt-dlp, atau domain dari URL."""
+    if extractor:
+        return extractor.lower()
+    netloc = urlparse(url).netloc.lower().split(":")[0]
+    labels = [label for label in netloc.split(".") if label]
+    return labels[-2] if len(labels) >= 2 else (netloc or "unknown")
+
+class DownloadScheduler:
+    """Memilih job berikutnya dengan memperhatikan prioritas, slot global, dan batas per host.
+
+    Job yang siap disimpan di heap per host dengan kunci (-prioritas, rank): prioritas
+    lebih tinggi dulu, lalu rank (urutan antrean) terkecil. Mengubah prioritas atau
+    urutan cukup mendorong entri baru; entri lama dibuang saat muncul di puncak heap
+    (lazy deletion), jadi memilih job tetap O(jumlah host · log n) berapa pun panjang
+    antrean. Setiap host punya batas proses bersamaan (max_concurrent) dan jeda minimum
+    antar-mulai (min_start_interval) dari video_config.json; slot yang tidak bisa
+    dipakai satu host diisi host lain.
+    """
+
+    def __init__(self, max_parallel, host_limits=None):
+        self.max_parallel = max(1, int(max_parallel))
+        self.host_limits = host_limits or {}
+        self.ready = {}       # host -> heap (kunci, ID job)
+        self.keys = {}        # ID job yang menunggu -> (host, kunci) yang berlaku
+        self.running = {}     # ID job -> host
+        self.running_per_host = {}
+        self.waiting_per_host = Counter()
+        self.last_start = {}  # host -> time.monotonic() saat terakhir mulai
+
+    def limits_for(self, host):
+        limits = dict(self.host_limits.get("default", {}))
+        limits.update(self.host_limits.get(host, {}))
+        max_concurrent = max(1, int(limits.get("max_concurrent", self.max_parallel)))
+        return max_concurrent, float(limits.get("min_start_interval", 0))
+
+    def enqueue(self, job_id, host, priority=0, rank=None):
+        """Memasukkan (atau memperbarui kunci) job yang menunggu."""
+        key = (-priority, job_id if rank is None else rank)
+        old = self.keys.get(job_id)
+        if old is not None:
+            self.waiting_per_host[old[0]] -= 1
+        self.waiting_per_host[host] += 1
+        self.keys[job_id] = (host, key)
+        heapq.heappush(self.ready.setdefault(host, []), (key, job_id))
+
+    def remove(self, job_id):
+        # Entri di heap ikut terbuang saat sampai di puncak
+        old = self.keys.pop(job_id, None)
+        if old is not None:
+            self.waiting_per_host[old[0]] -= 1
+
+    def is_waiting(self, job_id):
+        return job_id in self.keys
+
+    def has_free_slot(self):
+        return len(self.running) < self.max_parallel
+
+    def host_is_full(self, host):
+        return self.running_per_host.get(host, 0) >= self.limits_for(host)[0]
+
+    def has_pending(self):
+        return bool(self.running) or bool(self.keys)
+
+    def saturated(self, host):
+        """True jika host dibatasi di bawah slot global, semua slotnya terpakai, dan sudah
+        punya cukup job siap untuk mengisinya lagi; job tambahan dari host ini tidak akan
+        membantu mengisi slot global yang kosong."""
+        max_concurrent = self.limits_for(host)[0]
+        return (max_concurrent < self.max_parallel and self.running_per_host.get(host, 0) >= max_concurrent
+                and self.waiting_per_host[host] >= max_concurrent)
+
+    def ready_count(self):
+        """Jumlah job menunggu yang masih berguna untuk slot kosong (host jenuh tidak dihitung)."""
+        return sum(count for host, count in self.waiting_per_host.items() if count and not self.saturated(host))
+
+    def head(self, host):
+        """Entri berlaku di puncak heap host (entri usang dibuang), atau None."""
+        heap = self.ready.get(host)
+        while heap:
+            key, job_id = heap[0]
+            if self.keys.get(job_id) == (host, key):
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def pop_next(self):
+        """Mengembalikan (ID job, None) atau (None, detik_tunggu) jika semua host sedang dibatasi."""
+        now = time.monotonic()
+        best, wait = None, None
+        for host in list(self.ready):
+            entry = self.head(host)
+            if entry is None:
+                del self.ready[host]
+                continue
+            max_concurrent, interval = self.limits_for(host)
+            if self.running_per_host.get(host, 0) >= max_concurrent:
+                continue
+            remaining = self.last_start.get(host, -interval) + interval - now
+            if remaining > 0:
+                wait = remaining if wait is None else min(wait, remaining)
+                continue
+            if best is None or entry < best[0]:
+                best = (entry, host)
+        if best is None:
+            return None, wait
+        (_, job_id), host = best
+        heapq.heappop(self.ready[host])
+        del self.keys[job_id]
+        self.waiting_per_host[host] -= 1
+        return job_id, None
+
+    def mark_started(self, job_id, host):
+        self.running[job_id] = host
+        self.running_per_host[host] = self.running_per_host.get(host, 0) + 1
+        self.last_start[host] = time.monotonic()
+
+    def mark_finished(self, job_id):
+        host = self.running.pop(job_id, None)
+        if host is not None:
+            self.running_per_host[host] -= 1
+
+    def clear(self):
+        self.ready.clear()
+        self.keys.clear()
+        self.waiting_per_host.clear()
+
+class FragmentTuner:
+    """Memilih --concurrent-fragments per unduhan.
+
+    Dengan "concurrent_fragments": "auto", nilai per host dipelajari dari throughput
+    rata-rata unduhan berfragmen (HLS/DASH) yang sudah selesai: naik satu selama
+    throughput masih membaik, turun satu bila memburuk, dan dibagi dua bila unduhan
+    gagal. Nilai yang dipakai saat start juga dibatasi oleh fragment_budget yang dibagi
+    rata ke semua unduhan yang berjalan, agar banyak job paralel tidak membanjiri koneksi.
+    yt-dlp tidak bisa mengubah konkurensi di tengah unduhan, jadi penyesuaian berlaku
+    untuk unduhan berikutnya dari host yang sama. Angka bulat tetap berarti nilai tetap.
+    """
+
+    def __init__(self, setting, tuning=None):
+        tuning = tuning or {}
+        self.adaptive = str(setting).lower() == "auto"
+        self.fixed = 1 if self.adaptive else max(1, int(setting))
+        self.minimum = max(1, int(tuning.get("min", 1)))
+        self.maximum = max(self.minimum, int(tuning.get("max", 8)))
+        self.initial = min(self.maximum, max(self.minimum, int(tuning.get("initial", 4))))
+        self.budget = max(self.minimum, int(tuning.get("budget", 16)))
+        self.hosts = {} # host -> {"n": nilai berikutnya, "rate": throughput terakhir}
+
+    def choose(self, host, running):
+        """Nilai untuk unduhan baru; running termasuk unduhan yang akan dimulai ini."""
+        if not self.adaptive:
+            return self.fixed
+        state = self.hosts.setdefault(host, {"n": self.initial, "rate": 0.0})
+        share = max(self.minimum, self.budget // max(1, running))
+        return min(state["n"], share)
+
+    def report(self, host, used, rate, ok):
+        """Hasil satu unduhan: nilai yang dipakai, throughput rata-rata (byte/detik), sukses?"""
+        if not self.adaptive:
+            return
+        state = self.hosts.setdefault(host, {"n": self.initial, "rate": 0.0})
+        if not ok:
+            state["n"] = max(self.minimum, used // 2)
+            state["rate"] = 0.0
+            return
+        if rate <= 0:
+            return
+        if state["rate"] and rate < state["rate"] * 0.9:
+            state["n"] = max(self.minimum, used - 1)
+        elif not state["rate"] or rate > state["rate"] * 1.1:
+            state["n"] = min(self.maximum, used + 1)
+        state["rate"] = rate
+
+class BandwidthGovernor:
+    """Batas bandwidth global (byte/detik) yang dibagi ke semua unduhan yang berjalan.
+
+    limit adalah batas dasar (0 = tanpa batas); schedule berisi jendela waktu harian
+    {"start": "HH:MM", "end": "HH:MM", "limit": byte/detik} yang menggantikannya selama
+    jendela itu aktif (jendela boleh melewati tengah malam).
+    """
+
+    def __init__(self, limit=0, schedule=None):
+        self.limit = max(0, int(limit or 0))
+        self.schedule = []
+        for window in schedule or []:
+            start_h, start_m = (int(x) for x in window["start"].split(":"))
+            end_h, end_m = (int(x) for x in window["end"].split(":"))
+            self.schedule.append((start_h * 60 + start_m, end_h * 60 + end_m, max(0, int(window["limit"]))))
+
+    def current_limit(self, now=None):
+        now = now or datetime.now()
+        minute = now.hour * 60 + now.minute
+        for start, end, limit in self.schedule:
+            inside = start <= minute < end if start <= end else (minute >= start or minute < end)
+            if inside:
+                return limit
+        return self.limit
+
+    def share(self, running):
+        """Bagian per unduhan jika batas dibagi rata ke running unduhan; 0 = tanpa batas."""
+        limit = self.current_limit()
+        return max(1, limit // max(1, running)) if limit else 0
+
+# --- PROGRESS TERSTRUKTUR ---
+# yt-dlp diminta mencetak progress sebagai JSON per baris (--progress-template + --newline)
+# dengan prefix penanda, jadi tidak perlu regex pada teks progress bar.
+PROGRESS_PREFIX = "[shrine-progress] "
+POSTPROCESS_PREFIX = "[shrine-pp] "
+PROGRESS_ARGS = [
+    "--newline",
+    "--progress-template", "download:" + PROGRESS_PREFIX + "%(progress)j",
+    "--progress-template", "postprocess:" + POSTPROCESS_PREFIX
+        + '{"postprocessor": %(progress.postprocessor)j, "status": %(progress.status)j, "filepath": %(info.filepath)j}',
+]
+POSTPROCESS_PHASES = {"Merger": "merging", "ExtractAudio": "extracting"}
+
+@dataclass
+class ProgressRecord:
+    """Progress satu job: byte, kecepatan, ETA, fragmen, dan fase (downloading/merging/...)."""
+    job_id: int
+    phase: str = "downloading"
+    downloaded_bytes: int = 0
+    total_bytes: int = 0
+    total_exact: bool = False # False jika total_bytes hanya perkiraan (umum di HLS/DASH)
+    speed: float = 0.0
+    eta: int = 0
+    fragment_index: int = 0
+    fragment_count: int = 0
+    filename: str = ""
+    tmpfilename: str = "" # file .part yang sedang ditulis (untuk resume)
+
+    @property
+    def percent(self):
+        if self.phase != "downloading":
+            return 100
+        if self.total_bytes:
+            return min(100, int(self.downloaded_bytes * 100 / self.total_bytes))
+        if self.fragment_count:
+            return min(100, int(self.fragment_index * 100 / self.fragment_count))
+        return 0
+
+    @classmethod
+    def from_download(cls, job_id, data):
+        return cls(
+            job_id=job_id,
+            phase="downloading",
+            downloaded_bytes=int(data.get("downloaded_bytes") or 0),
+            total_bytes=int(data.get("total_bytes") or data.get("total_bytes_estimate") or 0),
+            total_exact=bool(data.get("total_bytes")),
+            speed=float(data.get("speed") or 0),
+            eta=int(data.get("eta") or 0),
+            fragment_index=int(data.get("fragment_index") or 0),
+            fragment_count=int(data.get("fragment_count") or 0),
+            filename=data.get("filename") or "",
+            tmpfilename=data.get("tmpfilename") or "")
+
+class ProgressTracker:
+    """Menggabungkan event progress yt-dlp satu job (dari template JSON maupun hook
+    di mode engine) menjadi ProgressRecord terbaru beserta path file akhirnya."""
+
+    def __init__(self, job_id):
+        self.record = ProgressRecord(job_id)
+        self.dirty = False
+        self.final_filepath = ""
+
+    def on_download(self, data):
+        self.record = ProgressRecord.from_download(self.record.job_id, data)
+        self.dirty = True
+
+    def on_postprocess(self, data):
+        """Mencatat event postprocessor; True jika fase job berubah."""
+        if data.get("filepath") and data.get("status") == "finished":
+            self.final_filepath = data["filepath"]
+        phase = POSTPROCESS_PHASES.get(data.get("postprocessor"), "postprocessing")
+        if data.get("status") != "started" or phase == self.record.phase:
+            return False
+        self.record = ProgressRecord(self.record.job_id, phase=phase, filename=self.record.filename)
+        self.dirty = True
+        return True
+
+    def take(self):
+        """ProgressRecord yang belum terkirim, atau None."""
+        if not self.dirty:
+            return None
+        self.dirty = False
+        return self.record
+
+    def final_name(self, cmd):
+        path = self.final_filepath or self.record.filename
+        if not path and "-o" in cmd:
+            path = cmd[cmd.index("-o") + 1]
+        return os.path.basename(path)
+
+def format_bytes(num):
+    for unit in ("B", "KB", "MB", "GB"):
+        if num < 1024 or unit == "GB":
+            return f"{num:.1f} {unit}" if unit != "B" else f"{int(num)} B"
+        num /= 1024
+
+
+# --- PERINTAH YT-DLP ---
+def find_yt_dlp():
+    """Path executable yt-dlp: yang dibundel di build PyInstaller, atau dari PATH."""
+    executable = "yt-dlp.exe" if platform.system() == "Windows" else "yt-dlp"
+    if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
+        return os.path.join(sys._MEIPASS, executable)
+    return executable
+
+def new_job(url, fmt=FORMAT_VIDEO, resolution="Original Size"):
+    """Data awal job; judul berisi URL sampai metadata didapat."""
+    return {
+        "url": url,
+        "format": fmt,
+        "resolution": resolution if fmt != FORMAT_AUDIO else "N/A",
+        "status": "Fetching",
+        "title": url,
+        "details": "",
+        "progress": 0,
+        "thumb_key": None,
+        "thumb_url": None
+    }
+
+def job_summary(job):
+    """Ringkasan job yang bisa di-serialisasi JSON (untuk CLI dan API kontrol)."""
+    summary = {k: job.get(k) for k in ("id", "url", "format", "resolution", "status", "title", "details", "host", "progress", "priority", "fragments")}
+    record = job.get("progress_record")
+    if record and job["status"] in ("Downloading", "Merging"):
+        summary.update(phase=record.phase, downloaded_bytes=record.downloaded_bytes,
+                       total_bytes=record.total_bytes, speed=record.speed, eta=record.eta)
+    return summary
+
+def build_download_command(job, config, yt_dlp_path, output_folder, resume=True, rate_limit=0, archive_path=None):
+    """Membangun perintah yt-dlp untuk satu job (format_map, merge_format, ekstraksi audio)."""
+    resume_args = ["--continue", "--part"] if resume else ["--no-part", "--no-continue"]
+    base_cmd = [yt_dlp_path] + resume_args + ["--fragment-retries", str(config["fragment_retries"]), "--concurrent-fragments", str(job.get("fragments", 1))] + PROGRESS_ARGS
+    if rate_limit:
+        base_cmd += ["--limit-rate", str(rate_limit)]
+    if archive_path:
+        base_cmd += ["--download-archive", archive_path]
+
+    if job["format"] == FORMAT_AUDIO:
+        output_template = os.path.join(output_folder, "%(title)s.%(ext)s")
+        return base_cmd + ["-f", "bestaudio/best", "--extract-audio", "--audio-format", "mp3", "--audio-quality", "0", "-o", output_template, job["url"]]
+    # Video
+    res = job["resolution"]
+    format_str = config["format_map"].get(res, "best")
+    output_template = os.path.join(output_folder, f"%(title)s_{res}.%(ext)s")
+    return base_cmd + ["--merge-output-format", config["merge_format"], "--format", format_str, "-o", output_template, job["url"]]
+
+def run_subprocess_download(cmd, job_id, on_progress, on_logs, progress_hz=10, on_start=None):
+    """Menjalankan satu proses yt-dlp sampai selesai dan membaca progress JSON-nya.
+
+    Progress (ProgressRecord) dan log (list (pesan, status)) digabung dan dikirim lewat
+    callback paling banyak progress_hz kali per detik; nilai terakhir dan perubahan fase
+    selalu ikut terkirim. on_start menerima objek Popen (untuk pembatalan).
+    Mengembalikan (status, pesan) untuk event finished.
+    """
+    flush_interval = 1.0 / max(0.1, float(progress_hz))
+    pending_logs = [("log_download_start", "retry")]
+    tracker = ProgressTracker(job_id)
+
+    def flush():
+        record = tracker.take()
+        if record:
+            on_progress(record)
+        if pending_logs:
+            on_logs(job_id, pending_logs[:])
+            pending_logs.clear()
+
+    try:
+        creationflags = subprocess.CREATE_NO_WINDOW if sys.platform.startswith("win") else 0
+        process = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, encoding='utf-8', errors='replace', creationflags=creationflags
+        )
+        if on_start:
+            on_start(process)
+        last_flush = time.monotonic()
+        for line in iter(process.stdout.readline, ''):
+            phase_changed = False
+            try:
+                if line.startswith(PROGRESS_PREFIX):
+                    tracker.on_download(json.loads(line[len(PROGRESS_PREFIX):]))
+                elif line.startswith(POSTPROCESS_PREFIX):
+                    phase_changed = tracker.on_postprocess(json.loads(line[len(POSTPROCESS_PREFIX):]))
+                else:
+                    pending_logs.append((line.strip(), "retry"))
+            except (ValueError, TypeError):
+                pass
+            now = time.monotonic()
+            if phase_changed or now - last_flush >= flush_interval:
+                flush()
+                last_flush = now
+        process.wait()
+        flush()
+        if process.returncode == 0:
+            return "success", tracker.final_name(cmd)
+        return "error", "log_download_error"
+    except Exception as e:
+        flush()
+        return "error", f"log_worker_error\n{str(e)}"
+
+# --- METADATA ---
+class MetadataFetcher:
+    """Mengambil metadata satu batch URL: satu proses yt-dlp --dump-json, atau satu
+    instance yt_dlp.YoutubeDL di dalam proses. Hasil dikirim per ID job lewat callback
+    on_result(info, url, job_id) / on_error(pesan, job_id); hasil sukses disimpan ke cache."""
+
+    def __init__(self, items, yt_dlp_path, on_result, on_error, in_process=False, cache=None):
+        self.items = items # list (url, job_id)
+        self.yt_dlp_path = yt_dlp_path
+        self.on_result = on_result
+        self.on_error = on_error
+        self.in_process = in_process and yt_dlp is not None
+        self.cache = cache
+        self.cancelled = False
+        self.process = None
+
+    def cancel(self):
+        """Membatalkan fetch; proses yt-dlp yang sedang berjalan ikut dihentikan."""
+        self.cancelled = True
+        if self.process and self.process.poll() is None:
+            try: self.process.kill()
+            except OSError: pass
+
+    def run(self):
+        try:
+            if self.in_process:
+                self.run_in_process()
+            else:
+                self.run_subprocess()
+        finally:
+            self.process = None
+
+    def run_in_process(self):
+        opts = {"quiet": True, "no_warnings": True, "noplaylist": True, "skip_download": True}
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            for url, job_id in self.items:
+                if self.cancelled: return
+                try:
+                    info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+                    self.emit_result(info, url, job_id)
+                except Exception as e:
+                    self.emit_error(str(e), job_id)
+
+    def run_subprocess(self):
+        # Dengan --ignore-errors yt-dlp memproses URL berurutan dan mencetak satu baris JSON
+        # per URL yang berhasil, atau baris "ERROR:" untuk yang gagal.
+        urls = [url for url, _ in self.items]
+        pending = list(self.items) # (url, job_id) yang belum punya hasil, urut sesuai perintah
+        errors = deque()
+        try:
+            cmd = [self.yt_dlp_path, '--dump-json', '--no-playlist', '--ignore-errors', '--no-warnings'] + urls
+            creationflags = subprocess.CREATE_NO_WINDOW if sys.platform.startswith("win") else 0
+            self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding='utf-8', errors='replace', creationflags=creationflags)
+            if self.cancelled: self.process.kill()
+            for line in iter(self.process.stdout.readline, ''):
+                if self.cancelled: break
+                if line.startswith("ERROR:"):
+                    errors.append(line.strip())
+                    continue
+                if not line.startswith("{"):
+                    continue
+                try:
+                    info = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                source = info.get("original_url") or info.get("webpage_url")
+                index = next((i for i, (url, _) in enumerate(pending) if url == source), None)
+                if index is None:
+                    index = 0 if pending else None
+                if index is None:
+                    continue
+                # URL sebelum hasil ini sudah dilewati yt-dlp, berarti gagal
+                for _, job_id in pending[:index]:
+                    self.emit_error(errors.popleft() if errors else "yt-dlp: no metadata", job_id)
+                url, job_id = pending[index]
+                del pending[:index + 1]
+                self.emit_result(info, url, job_id)
+            self.process.wait()
+        except Exception as e:
+            errors.append(str(e))
+        for _, job_id in pending:
+            self.emit_error(errors.popleft() if errors else "yt-dlp: no metadata", job_id)
+
+    def emit_result(self, info, url, job_id):
+        if self.cancelled: return
+        if self.cache:
+            try: self.cache.put(url, info)
+            except Exception: pass # Cache hanya percepatan, jangan gagalkan fetch
+        if not self.cancelled: self.on_result(info, url, job_id)
+
+    def emit_error(self, message, job_id):
+        if not self.cancelled: self.on_error(message, job_id)
+
+class MetadataPlanner:
+    """Menentukan job mana yang metadatanya diambil sekarang.
+
+    Job baru tidak langsung di-fetch. Metadata hanya diminta untuk baris yang sedang
+    terlihat di tabel (set_visible) dan untuk job yang sebentar lagi dijalankan
+    scheduler: job berprioritas next/now, ditambah job terdepan sampai `horizon` job
+    siap (Queued) tersedia. Job yang belum punya metadata disimpan di heap per host
+    (ditebak dari URL) dengan kunci urutan scheduler (-prioritas, rank) dan lazy
+    deletion, lalu digabung seperti di DownloadScheduler, jadi memilih job tidak memindai
+    seluruh antrean. ready() mengembalikan jumlah job Queued yang masih berguna untuk
+    slot kosong; saturated(host) menandai host yang slotnya penuh dan sudah punya cukup
+    job siap, sehingga horizon melewati job host itu dan slot sisanya bisa diisi host lain.
+    """
+
+    def __init__(self, ready, horizon=10, saturated=None):
+        self.ready = ready
+        self.horizon = max(1, int(horizon))
+        self.saturated = saturated or (lambda host: False)
+        self.heaps = {}     # host -> heap (kunci, ID job), boleh berisi entri usang
+        self.keys = {}      # ID job yang belum punya metadata -> (host, kunci) yang berlaku
+        self.urls = {}
+        self.inflight = set() # ID job yang sedang di-fetch
+        self.visible = []   # ID job di viewport, urut baris
+
+    @staticmethod
+    def key_for(job):
+        return (-(job.get("priority") or 0), job["rank"] if job.get("rank") is not None else job["id"])
+
+    def add(self, job):
+        host = job.get("host") or host_key(job["url"])
+        key = self.key_for(job)
+        self.keys[job["id"]] = (host, key)
+        self.urls[job["id"]] = job["url"]
+        heapq.heappush(self.heaps.setdefault(host, []), (key, job["id"]))
+
+    def update(self, job):
+        """Prioritas atau urutan job berubah."""
+        if job["id"] in self.keys and self.keys[job["id"]][1] != self.key_for(job):
+            self.add(job)
+
+    def done(self, job_id):
+        """Metadata job sudah didapat, gagal, atau job tidak lagi butuh metadata."""
+        self.keys.pop(job_id, None)
+        self.urls.pop(job_id, None)
+        self.inflight.discard(job_id)
+
+    def release(self, job_ids):
+        """Fetch dibatalkan: job kembali menunggu sampai dibutuhkan lagi."""
+        self.inflight.difference_update(job_ids)
+
+    def set_visible(self, job_ids):
+        self.visible = list(job_ids)
+
+    def head(self, host):
+        """Entri berlaku di puncak heap host (entri usang dibuang), atau None."""
+        heap = self.heaps.get(host)
+        while heap:
+            key, job_id = heap[0]
+            if self.keys.get(job_id) == (host, key):
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def ahead(self):
+        """ID job (termasuk yang sedang di-fetch) yang masuk horizon scheduler, urut kunci."""
+        limit = max(0, self.horizon - self.ready())
+        frontier = []
+        for host in list(self.heaps):
+            entry = self.head(host)
+            if entry is None:
+                del self.heaps[host]
+            else:
+                frontier.append((entry, host))
+        heapq.heapify(frontier)
+        picked, popped, normal = [], [], 0
+        while frontier:
+            (key, job_id), host = frontier[0]
+            if key[0] >= 0: # prioritas normal dibatasi horizon; next/now selalu ikut
+                if normal >= limit:
+                    break
+                if self.saturated(host):
+                    heapq.heappop(frontier) # sisa job host ini belum dibutuhkan
+                    continue
+                normal += 1
+            heapq.heappop(frontier)
+            popped.append((host, heapq.heappop(self.heaps[host])))
+            picked.append(job_id)
+            entry = self.head(host)
+            if entry is not None:
+                heapq.heappush(frontier, (entry, host))
+        for host, entry in popped:
+            heapq.heappush(self.heaps[host], entry)
+        return picked
+
+    def wanted(self):
+        """ID job yang perlu di-fetch sekarang dan belum berjalan: baris terlihat dulu, lalu horizon."""
+        wanted = [job_id for job_id in self.visible if job_id in self.keys and job_id not in self.inflight]
+        seen = set(wanted)
+        wanted += [job_id for job_id in self.ahead() if job_id not in self.inflight and job_id not in seen]
+        return wanted
+
+    def is_wanted(self, job_ids):
+        """True jika salah satu job masih terlihat atau masuk horizon (fetch jangan dibatalkan)."""
+        job_ids = set(job_ids) & set(self.keys)
+        return bool(job_ids) and bool(job_ids & set(self.visible) or job_ids & set(self.ahead()))
+
+    def claim(self, job_ids):
+        """Menandai job sedang di-fetch; mengembalikan item (url, ID job) untuk fetcher."""
+        self.inflight.update(job_ids)
+        return [(self.urls[job_id], job_id) for job_id in job_ids]
+
+    def __contains__(self, job_id):
+        return job_id in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def clear(self):
+        self.heaps.clear()
+        self.keys.clear()
+        self.urls.clear()
+        self.inflight.clear()
+        self.visible.clear()
+
+# --- PLAYLIST ---
+# Halaman playlist/channel/album (bukan satu video); link video yang membawa ?list= tetap
+# diperlakukan sebagai satu video, sama seperti --no-playlist
+PLAYLIST_PATH_RE = re.compile(
+    r"/(?:playlist|channel/[^/]+|c/[^/]+|user/[^/]+|@[^/]+|sets/[^/]+|album/[^/]+)"
+    r"(?:/(?:videos|shorts|streams|live|playlists|featured|releases))?/?$", re.IGNORECASE)
+
+def is_playlist_url(url):
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    if "list" in query and "v" not in query:
+        return True
+    return bool(PLAYLIST_PATH_RE.search(parsed.path))
+
+def playlist_entry(entry):
+    """(url, info) dari satu entri --flat-playlist, atau None jika entri tidak punya URL.
+
+    info berbentuk sama dengan hasil metadata untuk accept_metadata: "title",
+    "extractor" (ie_key) dan "id", ditambah "thumbnail" jika extractor menyertakannya."""
+    url = entry.get("webpage_url") or entry.get("url")
+    if not url or not url.startswith(("http://", "https://")):
+        return None
+    thumbnail = entry.get("thumbnail")
+    if not thumbnail and entry.get("thumbnails"):
+        thumbnail = entry["thumbnails"][-1].get("url") # yt-dlp mengurutkan dari yang terkecil
+    return url, {"title": entry.get("title") or url, "extractor": entry.get("ie_key"),
+                 "id": entry.get("id"), "thumbnail": thumbnail}
+
+class PlaylistExpander:
+    """Menjabarkan playlist/channel menjadi daftar entri video secara bertahap.
+
+    yt-dlp dijalankan dengan --flat-playlist --lazy-playlist, jadi setiap entri tercetak
+    begitu halaman daftarnya diterima, tanpa mengambil metadata per video. Entri dikirim
+    per halaman lewat on_entries(entri) saat page_size entri terkumpul atau page_interval
+    detik berlalu, sehingga channel ribuan video sudah mengisi antrean dalam hitungan
+    detik. Entri yang sendirinya playlist (mis. tab Videos/Shorts sebuah channel) ikut
+    dijabarkan. on_done(jumlah, pesan_error) dipanggil sekali di akhir.
+    """
+
+    def __init__(self, url, yt_dlp_path, on_entries, on_done, in_process=False,
+                 page_size=50, page_interval=0.5, max_depth=2):
+        self.url = url
+        self.yt_dlp_path = yt_dlp_path
+        self.on_entries = on_entries
+        self.on_done = on_done
+        self.in_process = in_process and yt_dlp is not None
+        self.page_size = max(1, int(page_size))
+        self.page_interval = page_interval
+        self.max_depth = max_depth
+        self.cancelled = False
+        self.process = None
+        self.page = []
+        self.page_started = None
+        self.count = 0
+
+    def cancel(self):
+        self.cancelled = True
+        if self.process and self.process.poll() is None:
+            try: self.process.kill()
+            except OSError: pass
+
+    def run(self):
+        error = None
+        try:
+            self.expand(self.url, 0)
+        except Exception as e:
+            error = str(e)
+        finally:
+            self.process = None
+        if self.cancelled:
+            return
+        self.flush()
+        self.on_done(self.count, error)
+
+    def expand(self, url, depth):
+        entries = self.entries_in_process(url) if self.in_process else self.entries_subprocess(url)
+        for entry in entries:
+            if self.cancelled:
+                return
+            item = playlist_entry(entry)
+            if item is None:
+                continue
+            if is_playlist_url(item[0]) and depth < self.max_depth:
+                self.expand(item[0], depth + 1)
+                continue
+            self.add(item)
+
+    def entries_in_process(self, url):
+        opts = {"quiet": True, "no_warnings": True, "skip_download": True, "ignoreerrors": True,
+                "extract_flat": "in_playlist", "lazy_playlist": True}
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            # process=False: entri dibaca dari generator halaman extractor, bukan daftar penuh
+            result = ydl.extract_info(url, download=False, process=False)
+            while result and result.get("_type") in ("url", "url_transparent"):
+                result = ydl.extract_info(result["url"], download=False, process=False, ie_key=result.get("ie_key"))
+            if not result:
+                raise RuntimeError(f"yt-dlp: no playlist entries for {url}")
+            if result.get("_type") not in ("playlist", "multi_video"):
+                yield dict(result, webpage_url=result.get("webpage_url") or url)
+                return
+            for entry in result.get("entries") or []:
+                if entry:
+                    yield entry
+
+    def entries_subprocess(self, url):
+        cmd = [self.yt_dlp_path, "--flat-playlist", "--lazy-playlist", "--dump-json",
+               "--ignore-errors", "--no-warnings", url]
+        creationflags = subprocess.CREATE_NO_WINDOW if sys.platform.startswith("win") else 0
+        process = self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                                                  encoding="utf-8", errors="replace", creationflags=creationflags)
+        if self.cancelled: process.kill()
+        errors = []
+        found = False
+        try:
+            for line in iter(process.stdout.readline, ""):
+                if line.startswith("ERROR:"):
+                    errors.append(line.strip())
+                elif line.startswith("{"):
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    found = True
+                    yield entry
+            process.wait()
+        finally:
+            # Generator ditutup lebih awal (dibatalkan): proses daftar ikut dihentikan
+            if process.poll() is None:
+                try: process.kill()
+                except OSError: pass
+        if not found and errors and not self.cancelled:
+            raise RuntimeError(errors[0])
+
+    def add(self, item):
+        if not self.page:
+            self.page_started = time.monotonic()
+        self.page.append(item)
+        self.count += 1
+        # Entri pertama dikirim sendiri agar unduhan bisa mulai tanpa menunggu satu halaman
+        if self.count == 1 or len(self.page) >= self.page_size or time.monotonic() - self.page_started >= self.page_interval:
+            self.flush()
+
+    def flush(self):
+        page, self.page = self.page, []
+        if page and not self.cancelled:
+            self.on_entries(page)
+
+# --- LOOP EVENT & MANAGER ---
+class EventLoop:
+    """Loop event sederhana untuk pemakaian headless. post() aman dipanggil dari thread
+    mana pun; call_later() dan stop() dipanggil dari thread loop (lewat callback)."""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.timers = [] # heap (waktu, urutan, fn, args)
+        self.seq = itertools.count()
+        self.stopped = False
+
+    def post(self, fn, *args):
+        self.queue.put((fn, args))
+
+    def call_later(self, delay, fn, *args):
+        heapq.heappush(self.timers, (time.monotonic() + delay, next(self.seq), fn, args))
+
+    def stop(self):
+        self.stopped = True
+
+    def run(self):
+        while not self.stopped:
+            timeout = None
+            if self.timers:
+                timeout = max(0.0, self.timers[0][0] - time.monotonic())
+            try:
+                fn, args = self.queue.get(timeout=timeout)
+                fn(*args)
+            except queue.Empty:
+                pass
+            now = time.monotonic()
+            while self.timers and self.timers[0][0] <= now and not self.stopped:
+                _, _, fn, args = heapq.heappop(self.timers)
+                fn(*args)
+
+class DownloadManager:
+    """Menjalankan antrean unduhan: scheduler per host, slot paralel, tuning fragmen,
+    batas bandwidth, resume, dan backend subprocess/engine.
+
+    Semua method dipanggil di thread loop; thread unduhan dan pembaca engine hanya
+    mengirim hasil lewat loop.post(). Perubahan dilaporkan ke setiap listener(event,
+    job_id, data) dengan event "status" (status/field job berubah), "progress"
+    (ProgressRecord), "log" (list (pesan, status)), "finished" ((status, pesan); status
+    "success", "error" atau "cancelled") dan "idle" (antrean habis, job_id None).
+    """
+
+    HOUSEKEEPING_INTERVAL = 5.0
+
+    def __init__(self, config, loop, output_folder, yt_dlp_path=None, listener=None):
+        self.config = config
+        self.loop = loop
+        self.output_folder = output_folder
+        self.yt_dlp_path = yt_dlp_path or config.get("yt_dlp_path") or find_yt_dlp()
+        self.listeners = [listener] if listener else []
+        self.progress_hz = config.get("progress_hz", 10)
+        self.jobs = JobStore() # Menyimpan data lengkap job, diindeks per ID
+        self.running = False
+        self.scheduler = DownloadScheduler(config.get("max_parallel_downloads", 3), config.get("host_limits", {}))
+        self.fragment_tuner = FragmentTuner(config.get("concurrent_fragments", "auto"), config.get("fragment_tuning"))
+        self.governor = BandwidthGovernor(config.get("bandwidth_limit", 0), config.get("bandwidth_schedule"))
+        self.subprocess_limit = self.governor.current_limit() # batas yang dipakai proses yang berjalan
+        self.active = set() # ID job yang sedang diunduh
+        self.processes = {} # job_id -> Popen di mode subprocess, untuk pembatalan
+        self.wake_deadline = None
+        self.front_ranks = itertools.count(-1, -1) # rank untuk job yang didahulukan, selalu di depan
+        # Metadata diambil saat dibutuhkan: baris terlihat dan job yang segera dijalankan
+        self.metadata = MetadataPlanner(self.scheduler.ready_count, config.get("metadata_horizon", 10), self.scheduler.saturated)
+        # Mode resume: file .part disimpan dan dilanjutkan, statusnya diingat antar-sesi
+        self.resume_downloads = bool(config.get("resume_downloads", True))
+        self.partials = PartialStore(os.path.join(app_data_dir(config.get("data_dir")), "partials.json"),
+                                     config.get("partial_max_age_days", 7))
+        self.partials.prune()
+        # Deteksi duplikat: indeks antrean di JobStore dan arsip unduhan yang sudah selesai
+        self.skip_duplicates = bool(config.get("skip_duplicates", True))
+        # Arsip dipisah per format: video yang sudah diunduh tetap boleh diambil audionya
+        self.archives = {}
+        archive = config.get("download_archive", True)
+        if archive:
+            base, ext = os.path.splitext(archive if isinstance(archive, str) else os.path.join(app_data_dir(config.get("data_dir")), "archive.txt"))
+            self.archives = {FORMAT_VIDEO: DownloadArchive(base + ext), FORMAT_AUDIO: DownloadArchive(f"{base}-audio{ext}")}
+        # Mode engine: unduhan dijalankan yt_dlp.YoutubeDL di proses worker berumur panjang,
+        # bukan satu proses yt-dlp baru per job. Dibuat saat unduhan pertama dimulai.
+        self.use_engine = config.get("download_engine", "subprocess") == "inprocess" and yt_dlp is not None
+        self.engine = None
+        self.engine_jobs = {} # job_id -> perintah, dibaca thread pembaca engine
+        self.engine_reader = None
+        self.closed = False
+        self.loop.call_later(self.HOUSEKEEPING_INTERVAL, self.housekeeping)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def notify(self, event, job_id, data):
+        for listener in self.listeners:
+            listener(event, job_id, data)
+
+    def screen_urls(self, urls, fmt):
+        """Memisahkan URL baru dari duplikat (format yang sama) sebelum masuk antrean.
+
+        Mengembalikan (url_baru, duplikat) dengan duplikat berupa dict url -> ID job yang
+        sudah ada di antrean (None untuk URL yang berulang dalam batch yang sama)."""
+        if not self.skip_duplicates:
+            return list(urls), {}
+        fresh, duplicates, seen = [], {}, set()
+        for url in urls:
+            key = normalize_url(url)
+            existing = self.jobs.find_duplicate(fmt, url)
+            if existing is not None:
+                duplicates[url] = existing
+            elif key in seen:
+                duplicates.setdefault(url, None)
+            else:
+                seen.add(key)
+                fresh.append(url)
+        return fresh, duplicates
+
+    # Metadata
+    def accept_metadata(self, job_id, info, **fields):
+        """Job siap diunduh: judul dan host dari metadata, file parsial diperiksa, lalu antre.
+
+        info berisi "title", "extractor" (extractor_key yt-dlp) dan "id". Video yang sudah
+        ada di arsip atau sudah ada di antrean lewat URL lain ditandai Skipped."""
+        self.metadata.done(job_id)
+        job = self.jobs.get(job_id)
+        if not job or job["status"] != "Fetching": return
+        video_key = archive_key(info.get("extractor"), info.get("id"))
+        if video_key and self.skip_duplicates:
+            duplicate = self.jobs.find_duplicate(job["format"], video_key=video_key, exclude=job_id)
+            archive = self.archives.get(job["format"])
+            if duplicate is not None or (archive is not None and video_key in archive):
+                reason = f"duplicate of #{duplicate}" if duplicate is not None else "already downloaded"
+                self.jobs.update(job, title=info.get("title", "N/A"), details=f"{job['format']} | {reason}", video_key=video_key)
+                self.jobs.set_status(job, "Skipped")
+                self.notify("status", job_id, None)
+                self.pump()
+                return
+        if video_key:
+            self.jobs.index_video(job, video_key)
+        details = f"{job['format']} | {job['resolution']}"
+        job['progress'] = 0
+        partial_key = None
+        if self.resume_downloads:
+            # Lanjutkan dari file parsial sesi sebelumnya jika masih ada dan utuh
+            partial_key = PartialStore.key_for(job)
+            done, total = self.partials.validate(partial_key)
+            if done:
+                job['progress'] = min(99, int(done * 100 / total)) if total else 0
+                details += f" | resume {format_bytes(done)}"
+        fields.update(title=info.get("title", "N/A"), host=host_key(job['url'], info.get("extractor")),
+                      details=details, partial_key=partial_key)
+        self.jobs.update(job, **fields)
+        self.jobs.set_status(job, "Queued")
+        self.enqueue(job)
+        self.notify("status", job_id, None)
+        # Jika antrean sedang berjalan, job ini bisa langsung mengisi slot yang kosong
+        self.pump()
+        if self.running:
+            self.make_room(job) # "download now" yang diminta saat metadata belum ada
+
+    def reject_metadata(self, job_id, message):
+        self.metadata.done(job_id)
+        job = self.jobs.get(job_id)
+        if job and job["status"] == "Fetching":
+            self.jobs.set_status(job, "Error")
+            self.jobs.update(job, title=f"Failed: {message}")
+            self.notify("status", job_id, None)
+        self.pump()
+
+    # Antrean
+    def start(self):
+        self.running = True
+        self.notify("started", None, None)
+        self.pump()
+
+    def pump(self):
+        """Mengisi setiap slot unduhan yang kosong dengan job 'Queued' berikutnya."""
+        if not self.running:
+            return
+
+        while self.scheduler.has_free_slot():
+            job_id, wait = self.scheduler.pop_next()
+            if job_id is None:
+                # Semua host yang tersisa sedang penuh atau masih dalam jeda
+                if wait is not None:
+                    self.wake_after(wait)
+                break
+            job = self.jobs.get(job_id)
+            if job and job["status"] == "Queued":
+                self.start_download(job)
+
+        if self.scheduler.has_pending() or self.active:
+            return
+        # Tunggu job yang metadatanya masih diambil sebelum menyatakan antrean selesai
+        if self.jobs.count("Fetching"):
+            return
+        self.running = False
+        self.notify("idle", None, None)
+
+    def wake_after(self, delay):
+        deadline = time.monotonic() + delay
+        if self.wake_deadline is not None and self.wake_deadline <= deadline:
+            return
+        self.wake_deadline = deadline
+        self.loop.call_later(delay + 0.001, self.wake)
+
+    def wake(self):
+        if self.wake_deadline is not None and time.monotonic() >= self.wake_deadline:
+            self.wake_deadline = None
+        self.pump()
+
+    def clear(self):
+        """Mengosongkan antrean tunggu scheduler (job di JobStore dibersihkan pemanggil)."""
+        self.scheduler.clear()
+        self.metadata.clear()
+
+    def cancel(self, job_id):
+        """Membatalkan job yang belum selesai. Job yang menunggu dilewati scheduler saat
+        gilirannya tiba; unduhan yang berjalan dihentikan dan file parsialnya disimpan."""
+        job = self.jobs.get(job_id)
+        if not job or job["status"] in ("Completed", "Error", "Cancelled", "Skipped"):
+            return False
+        self.jobs.set_status(job, "Cancelled")
+        self.scheduler.remove(job_id)
+        self.metadata.done(job_id)
+        if job_id in self.active:
+            if self.use_engine:
+                self.engine.cancel(job_id)
+            else:
+                self.kill_process(job_id)
+        self.notify("status", job_id, None)
+        self.pump()
+        return True
+
+    # Prioritas & urutan
+    def enqueue(self, job):
+        if job.get("rank") is None:
+            job["rank"] = job["id"] # urutan masuk
+        self.scheduler.enqueue(job["id"], job["host"], job.get("priority") or 0, job["rank"])
+
+    def set_priority(self, job_id, priority, front=False):
+        """Mengubah prioritas job; front=True juga menaruhnya di depan job berprioritas sama."""
+        job = self.jobs.get(job_id)
+        if not job or job["status"] in ("Completed", "Error", "Cancelled", "Skipped"):
+            return False
+        fields = {"priority": int(priority)}
+        if front:
+            fields["rank"] = next(self.front_ranks)
+        self.jobs.update(job, **fields)
+        if self.scheduler.is_waiting(job_id):
+            self.enqueue(job)
+        self.metadata.update(job)
+        self.notify("status", job_id, None)
+        self.pump()
+        return True
+
+    def download_next(self, job_id):
+        """Job ini diunduh begitu ada slot kosong, mendahului antrean lain."""
+        return self.set_priority(job_id, max(PRIORITY_NEXT, self.priority_of(job_id)), front=True)
+
+    def download_now(self, job_id):
+        """Job ini langsung diunduh; jika tidak ada slot, unduhan berprioritas lebih rendah
+        dijeda (dan dilanjutkan nanti dari file parsialnya) untuk memberi tempat."""
+        if not self.set_priority(job_id, PRIORITY_NOW, front=True):
+            return False
+        if not self.running:
+            self.start()
+        self.make_room(self.jobs.get(job_id))
+        return True
+
+    def make_room(self, job):
+        if job["status"] == "Queued" and (job.get("priority") or 0) >= PRIORITY_NOW:
+            victim = self.pick_victim(job)
+            if victim is not None:
+                self.preempt(victim)
+
+    def priority_of(self, job_id):
+        job = self.jobs.get(job_id)
+        return (job.get("priority") or 0) if job else 0
+
+    def pick_victim(self, job):
+        """Unduhan berprioritas lebih rendah yang dijeda agar job bisa mulai, atau None
+        jika job hanya tertahan jeda antar-mulai host."""
+        if self.scheduler.host_is_full(job["host"]):
+            candidates = [job_id for job_id, host in self.scheduler.running.items() if host == job["host"]]
+        elif not self.scheduler.has_free_slot():
+            candidates = list(self.scheduler.running)
+        else:
+            return None
+        priority = job.get("priority") or 0
+        candidates = [self.jobs.get(job_id) for job_id in candidates]
+        candidates = [j for j in candidates if j and (j.get("priority") or 0) < priority
+                      and not j.get("preempted") and j["status"] == "Downloading"]
+        if not candidates:
+            return None
+        # Prioritas terendah dulu, lalu yang paling belakang di antrean
+        return max(candidates, key=lambda j: (-(j.get("priority") or 0), j.get("rank") or 0))["id"]
+
+    def preempt(self, job_id):
+        """Menghentikan unduhan yang berjalan lalu mengantrekannya lagi (lihat on_finished)."""
+        job = self.jobs.get(job_id)
+        job["preempted"] = True
+        if self.use_engine:
+            self.engine.cancel(job_id)
+        else:
+            self.kill_process(job_id)
+
+    def move_job(self, job_id, row):
+        """Memindahkan job di urutan tampilan; urutan unduhan ikut menyesuaikan.
+
+        Job mengambil prioritas job sesudahnya (di baris terakhir: tidak lebih tinggi dari
+        job sebelumnya) dan rank di antara keduanya; jika tidak ada celah, rank semua job
+        dinomori ulang sesuai urutan tampilan."""
+        job = self.jobs.get(job_id)
+        if not job:
+            return
+        self.jobs.move(job_id, row)
+        row = self.jobs.row_of(job_id)
+        before = self.jobs.at(row - 1) if row > 0 else None
+        after = self.jobs.at(row + 1) if row + 1 < len(self.jobs) else None
+        low = before.get("rank") if before else None
+        high = after.get("rank") if after else None
+        if low is None and high is None:
+            rank = job.get("rank") or job_id
+        elif low is None:
+            rank = high - 1
+        elif high is None:
+            rank = low + 1
+        else:
+            rank = (low + high) / 2
+        if after is not None:
+            priority = after.get("priority") or 0
+        else:
+            priority = min(job.get("priority") or 0, (before.get("priority") or 0) if before else 0)
+        fields = {"priority": priority}
+        if low is not None and high is not None and not low < rank < high:
+            self.renumber_ranks()
+        else:
+            fields["rank"] = rank
+        self.jobs.update(job, **fields)
+        if self.scheduler.is_waiting(job_id):
+            self.enqueue(job)
+        self.metadata.update(job)
+        self.notify("status", job_id, None)
+
+    def renumber_ranks(self):
+        for row, job in enumerate(self.jobs):
+            if job.get("rank") != row:
+                self.jobs.update(job, rank=row)
+                if self.scheduler.is_waiting(job["id"]):
+                    self.enqueue(job)
+                self.metadata.update(job)
+
+    def kill_process(self, job_id):
+        process = self.processes.get(job_id)
+        if process is not None and process.poll() is None:
+            try: process.kill()
+            except OSError: pass
+
+    def build_command(self, job):
+        archive = self.archives.get(job["format"])
+        return build_download_command(job, self.config, self.yt_dlp_path, self.output_folder,
+                                      self.resume_downloads, job.get("rate_limit", 0), archive.path if archive is not None else None)
+
+    def expected_downloads(self, starting=0):
+        """Jumlah unduhan yang diperkirakan berjalan bersamaan: yang aktif, yang sedang dimulai,
+        dan job yang menunggu atau masih Fetching, dibatasi slot global."""
+        pending = len(self.scheduler.keys) + self.jobs.count("Fetching")
+        return max(1, min(self.scheduler.max_parallel, len(self.active) + starting + pending))
+
+    def rebalance_subprocess_rates(self):
+        """Mode subprocess: --limit-rate tidak bisa diubah setelah proses mulai, jadi unduhan
+        yang bagiannya tidak lagi sesuai dimulai ulang dari file parsialnya (--continue) lewat
+        jalur jeda yang sama dengan preempt. Semua unduhan dimulai ulang saat batas berubah
+        (kotak Limit atau jadwal); selain itu hanya unduhan yang melewati bagiannya, misalnya
+        setelah unduhan baru ikut berjalan. Tanpa resume_downloads bagian tetap seperti saat mulai."""
+        if self.use_engine or not self.resume_downloads:
+            return
+        limit = self.governor.current_limit()
+        changed, self.subprocess_limit = limit != self.subprocess_limit, limit
+        target = self.governor.share(self.expected_downloads())
+        for job_id in list(self.active):
+            job = self.jobs.get(job_id)
+            rate = job.get("rate_limit", 0)
+            if job["status"] != "Downloading" or job.get("preempted") or rate == target:
+                continue
+            if changed or (target and (not rate or rate > target)):
+                self.preempt(job_id)
+
+    def start_download(self, job):
+        """Menjalankan satu job di thread unduhan miliknya sendiri, atau di engine."""
+        self.jobs.set_status(job, "Downloading")
+        job["fragments"] = self.fragment_tuner.choose(job["host"], len(self.scheduler.running) + 1)
+        job["rate_sum"], job["rate_samples"] = 0.0, 0
+        # Mode engine membagi batas lewat nilai bersama; proses subprocess mendapat bagiannya di sini
+        job["rate_limit"] = 0 if self.use_engine else self.governor.share(self.expected_downloads(starting=1))
+        cmd = self.build_command(job)
+        job_id = job["id"]
+        self.scheduler.mark_started(job_id, job["host"])
+        self.active.add(job_id)
+        self.notify("status", job_id, None)
+
+        if self.use_engine:
+            self.ensure_engine()
+            self.engine_jobs[job_id] = cmd
+            self.apply_bandwidth_limit()
+            self.engine.submit(job_id, cmd[1:]) # tanpa path executable yt-dlp
+            return
+        self.rebalance_subprocess_rates()
+        threading.Thread(target=self.run_subprocess_job, args=(cmd, job_id), daemon=True).start()
+
+    def run_subprocess_job(self, cmd, job_id):
+        # Berjalan di thread unduhan; semua hasil dikirim ke thread loop
+        status, message = run_subprocess_download(
+            cmd, job_id,
+            on_progress=lambda record: self.loop.post(self.on_progress, record),
+            on_logs=lambda job, lines: self.loop.post(self.on_logs, job, lines),
+            progress_hz=self.progress_hz,
+            on_start=lambda process: self.on_process_started(job_id, process))
+        self.loop.post(self.on_finished, job_id, status, message)
+
+    def on_process_started(self, job_id, process):
+        # Thread unduhan: job yang dibatalkan atau dijeda (atau manager yang ditutup) sebelum
+        # prosesnya sempat jalan langsung dihentikan
+        self.processes[job_id] = process
+        job = self.jobs.get(job_id)
+        if self.closed or job["status"] == "Cancelled" or job.get("preempted"):
+            self.kill_process(job_id)
+
+    def ensure_engine(self):
+        if self.engine is not None:
+            return
+        self.engine = EnginePool(self.config.get("engine_workers", self.config.get("max_parallel_downloads", 3)), self.progress_hz)
+        self.engine.start()
+        self.engine_reader = threading.Thread(target=self.read_engine_events, daemon=True)
+        self.engine_reader.start()
+
+    def read_engine_events(self):
+        """Thread pembaca EnginePool: event diterjemahkan dengan ProgressTracker yang sama
+        seperti mode subprocess, lalu dikirim ke thread loop."""
+        trackers = {}
+        while not self.closed:
+            event = self.engine.next_event(timeout=0.25)
+            if event is None:
+                continue
+            kind, job_id, data = event
+            cmd = self.engine_jobs.get(job_id)
+            if cmd is None:
+                continue
+            tracker = trackers.setdefault(job_id, ProgressTracker(job_id))
+            if kind == "started":
+                self.loop.post(self.on_logs, job_id, [("log_download_start", "retry")])
+            elif kind == "log":
+                self.loop.post(self.on_logs, job_id, [(line, "retry") for line in data])
+            elif kind in ("progress", "postprocess"):
+                if kind == "progress":
+                    tracker.on_download(data)
+                else:
+                    tracker.on_postprocess(data)
+                record = tracker.take()
+                if record:
+                    self.loop.post(self.on_progress, record)
+            elif kind == "finished":
+                del trackers[job_id]
+                if data["returncode"] == 0:
+                    status, message = "success", tracker.final_name(cmd)
+                elif data["error"]:
+                    status, message = "error", f"log_worker_error\n{data['error']}"
+                else:
+                    status, message = "error", "log_download_error"
+                self.loop.post(self.on_finished, job_id, status, message)
+
+    # Hasil dari thread unduhan
+    def on_progress(self, record):
+        """Menerima ProgressRecord: progress, kecepatan/ETA, dan fase job."""
+        job = self.jobs.get(record.job_id)
+        if not job or job["status"] not in ("Downloading", "Merging"): return
+        job["progress"] = record.percent
+        job["progress_record"] = record
+        if record.phase == "downloading" and record.fragment_count and record.speed:
+            # Sampel throughput unduhan berfragmen untuk FragmentTuner
+            job["rate_sum"] += record.speed
+            job["rate_samples"] += 1
+        if record.tmpfilename and job.get("partial_key"):
+            self.partials.update(job["partial_key"], record.tmpfilename, record.downloaded_bytes, record.total_bytes, record.total_exact)
+        if record.phase in ("merging", "extracting") and job["status"] != "Merging":
+            self.jobs.set_status(job, "Merging")
+        self.notify("progress", record.job_id, record)
+
+    def on_logs(self, job_id, lines):
+        self.notify("log", job_id, lines)
+
+    def on_finished(self, job_id, status, message):
+        self.engine_jobs.pop(job_id, None)
+        self.processes.pop(job_id, None)
+        if self.closed:
+            return # Dihentikan oleh close(); status 'Queued' di jurnal dipertahankan
+        job = self.jobs.get(job_id)
+        preempted = job.pop("preempted", False) if job else False
+        if job and job["status"] == "Cancelled":
+            # File parsial tetap disimpan agar job bisa dilanjutkan jika ditambahkan lagi
+            status, message = "cancelled", "log_download_cancelled"
+        elif preempted and status != "success":
+            # Dijeda untuk job mendesak: kembali ke antrean dan dilanjutkan dari file parsial
+            status, message = "paused", "log_download_paused"
+            self.jobs.set_status(job, "Queued")
+            self.enqueue(job)
+            self.notify("status", job_id, None)
+        elif job:
+            self.jobs.set_status(job, "Completed" if status == "success" else "Error")
+            if status == "success":
+                job["progress"] = 100
+                # yt-dlp sudah menulis baris arsipnya sendiri (--download-archive)
+                archive = self.archives.get(job["format"])
+                if archive is not None:
+                    archive.add(job.get("video_key"))
+            # Job gagal tetap menyimpan file parsialnya untuk dilanjutkan nanti
+            if status == "success" and job.get("partial_key"):
+                self.partials.finish(job["partial_key"])
+            if job.get("rate_samples") or status != "success":
+                rate = job["rate_sum"] / job["rate_samples"] if job.get("rate_samples") else 0.0
+                self.fragment_tuner.report(job["host"], job.get("fragments", 1), rate, status == "success")
+        self.notify("finished", job_id, (status, message))
+
+        # Bebaskan slot milik job ini, lalu langsung isi dengan job berikutnya
+        self.scheduler.mark_finished(job_id)
+        self.active.discard(job_id)
+        self.apply_bandwidth_limit()
+        self.pump()
+
+    # Bandwidth & perawatan
+    def set_bandwidth_limit(self, bytes_per_second):
+        """Batas baru berlaku langsung tanpa memulai ulang unduhan (mode engine); di mode
+        subprocess unduhan yang berjalan dimulai ulang pada housekeeping berikutnya."""
+        self.governor.limit = max(0, int(bytes_per_second))
+        self.apply_bandwidth_limit()
+
+    def apply_bandwidth_limit(self):
+        """Membagi ulang batas bandwidth ke unduhan yang sedang berjalan.
+
+        Mode engine membaca batas per unduhan dari nilai bersama, jadi pembagian ulang
+        langsung berlaku; proses subprocess menerima bagiannya saat mulai (start_download)
+        dan diatur ulang oleh rebalance_subprocess_rates()."""
+        if self.engine is not None:
+            self.engine.set_rate_limit(self.governor.share(len(self.active)))
+
+    def housekeeping(self):
+        # Simpan status file parsial dan ikuti pergantian jadwal bandwidth
+        if self.closed: return
+        self.partials.save()
+        self.apply_bandwidth_limit()
+        self.rebalance_subprocess_rates()
+        self.loop.call_later(self.HOUSEKEEPING_INTERVAL, self.housekeeping)
+
+    def close(self, timeout=5.0):
+        """Menghentikan manager saat aplikasi ditutup. Unduhan yang masih berjalan dicatat
+        kembali sebagai 'Queued' (dijeda) sebelum pemilik menutup jurnal, lalu proses yt-dlp
+        atau job engine-nya dihentikan dan ditunggu agar tidak ada penulis kedua pada file
+        .part yang sama saat antrean dipulihkan."""
+        self.closed = True
+        self.running = False
+        for job_id in list(self.active):
+            job = self.jobs.get(job_id)
+            if job and job["status"] in ("Downloading", "Merging"):
+                self.jobs.set_status(job, "Queued")
+            self.kill_process(job_id)
+        if self.engine is not None:
+            if self.engine_reader is not None:
+                self.engine_reader.join()
+            self.engine.close(timeout) # job yang berjalan dibatalkan lewat flag pembatalan
+        deadline = time.monotonic() + timeout
+        for process in list(self.processes.values()):
+            try:
+                process.wait(max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                pass
+        self.partials.save()
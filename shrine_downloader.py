@@ -1,4 +1,4 @@
-import sys, os, subprocess, requests, json, re
+import sys, os, subprocess, json, re
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QLabel, QLineEdit, QTextEdit, QPushButton,
     QVBoxLayout, QHBoxLayout, QComboBox, QFileDialog, QProgressBar,
@@ -9,6 +9,8 @@ from PyQt6.QtCore import Qt, QTimer, QThread, QObject, pyqtSignal
 import yt_dlp, socket
 import dns.resolver
 from shrine_browser import ShrineBrowser # Pastikan shrine_browser.py juga dimigrasi
+from shrine_log import LogWriter, text_line
+import shrine_http
 
 # 📜 Load video config
 with open("video_config.json", "r", encoding="utf-8") as f:
@@ -88,6 +90,11 @@ class ShrineDownloader(QWidget):
         self.setWindowTitle("Macan Shrine Video Downloader - SilentStream Edition V3")
         self.output_folder = os.path.abspath("downloads")
         os.makedirs(self.output_folder, exist_ok=True)
+        # Log ditulis thread latar per batch; panel hanya menampilkan baris terakhir
+        self.log_buffer_lines = CONFIG.get("log_buffer_lines", 2000)
+        self.logger = LogWriter("shrine_log.txt", formatter=text_line,
+                                max_bytes=CONFIG.get("log_max_mb", 5) * 1024 * 1024,
+                                backups=CONFIG.get("log_backups", 3), buffer_lines=self.log_buffer_lines)
         self.setup_ui()
         self.setup_downloader_thread()
 
@@ -196,8 +203,7 @@ class ShrineDownloader(QWidget):
             self.log_writer(f"❌ Gagal buka folder ➤ {str(e)}", "error")
 
     def reset_log(self):
-        if os.path.exists("shrine_log.txt"):
-            open("shrine_log.txt", "w").close()
+        self.logger.reset()
         self.log_panel.clear()
 
     def log_writer(self, text, status="success"):
@@ -205,9 +211,10 @@ class ShrineDownloader(QWidget):
         item = QListWidgetItem(text)
         item.setForeground(QColor(color))
         self.log_panel.addItem(item)
+        while self.log_panel.count() > self.log_buffer_lines:
+            self.log_panel.takeItem(0)
         self.log_panel.scrollToBottom() # Auto-scroll
-        with open("shrine_log.txt", "a", encoding="utf-8") as f: 
-            f.write(f"{text}\n")
+        self.logger.write(text, status)
 
     def show_thumbnail(self):
         url = self.url_input.text().strip()
@@ -232,8 +239,13 @@ class ShrineDownloader(QWidget):
                 self.log_writer(f"🔍 Preview ➤ {width}x{height}, durasi {duration_str}", "retry")     
                
                 thumb_url = info.get("thumbnail", None)  
+                img_data = None
                 if thumb_url:
-                    img_data = requests.get(thumb_url).content
+                    try:
+                        img_data = shrine_http.get_client().get_bytes(thumb_url)
+                    except Exception:
+                        pass # Thumbnail gagal cukup dikosongkan, metadata tetap dipakai
+                if img_data:
                     pixmap = QPixmap()
                     pixmap.loadFromData(img_data)
                     self.thumb_frame.setPixmap(pixmap.scaled(320,180))
@@ -343,9 +355,11 @@ class ShrineDownloader(QWidget):
         if self.thread.isRunning():
             self.thread.quit()
             self.thread.wait()
+        self.logger.close()
         event.accept()
 
 if __name__ == "__main__":
+    shrine_http.configure(CONFIG)
     app = QApplication(sys.argv)
     splash = SplashScreen()
     splash.show()
@@ -1,4 +1,4 @@
-import sys, os, subprocess, requests, json, re, platform, tempfile
+import sys, os, subprocess, json, re, platform, tempfile
 from datetime import datetime
 from PySide6.QtWidgets import (
     QApplication, QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout,
@@ -8,6 +8,9 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtGui import QPixmap, QColor, QIcon, QFont
 from PySide6.QtCore import Qt, QTimer, QThread, QObject, Signal
+import shrine_http
+from shrine_cache import app_data_dir
+from shrine_thumbs import ThumbnailCache, QUEUE_THUMB_SIZE
 
 # --- CONFIG & LANGUAGE FILES ---
 # Memuat file konfigurasi dan bahasa, sama seperti sebelumnya.
@@ -81,6 +84,10 @@ class MetadataWorker(QObject):
     finished = Signal(dict, int) # Mengirimkan hasil dan nomor baris
     error = Signal(str, int)    # Mengirimkan error dan nomor baris
 
+    def __init__(self, thumb_cache):
+        super().__init__()
+        self.thumb_cache = thumb_cache
+
     def run(self, url, yt_dlp_path, row):
         try:
             cmd = [yt_dlp_path, '--dump-json', '--no-playlist', url]
@@ -88,8 +95,12 @@ class MetadataWorker(QObject):
             process = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='replace', check=True, creationflags=creationflags)
             info = json.loads(process.stdout)
             thumb_url = info.get("thumbnail")
-            img_data = requests.get(thumb_url).content if thumb_url else None
-            result = {"title": info.get("title", "N/A"), "thumbnail_data": img_data, "url": url}
+            # Thumbnail 160x90 diambil dari cache bersama (disk/memori) atau diunduh sekali
+            try:
+                thumb_image = self.thumb_cache.load(thumb_url, QUEUE_THUMB_SIZE, shrine_http.get_client().get_bytes) if thumb_url else None
+            except Exception:
+                thumb_image = None # Thumbnail gagal cukup dikosongkan, metadata tetap dipakai
+            result = {"title": info.get("title", "N/A"), "thumbnail_image": thumb_image, "url": url}
             self.finished.emit(result, row)
         except Exception as e:
             self.error.emit(str(e), row)
@@ -106,6 +117,7 @@ class ShrineDownloader(QWidget):
         self.is_downloading = False
         self.current_download_index = -1
         self.meta_threads = [] # Menyimpan referensi thread metadata agar tidak hilang
+        self.thumb_cache = ThumbnailCache(os.path.join(app_data_dir(CONFIG.get("data_dir")), "thumbnails"))
 
         self.init_ui()
         self.connect_signals()
@@ -285,7 +297,7 @@ class ShrineDownloader(QWidget):
     def fetch_metadata_for_row(self, url, row):
         """Membuat worker terpisah untuk mengambil metadata satu URL."""
         thread = QThread()
-        worker = MetadataWorker()
+        worker = MetadataWorker(self.thumb_cache)
         worker.moveToThread(thread)
 
         thread.started.connect(lambda: worker.run(url, self.get_yt_dlp_path(), row))
@@ -310,10 +322,8 @@ class ShrineDownloader(QWidget):
         # Tampilkan thumbnail
         thumb_label = QLabel()
         thumb_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        if info["thumbnail_data"]:
-            pixmap = QPixmap()
-            pixmap.loadFromData(info["thumbnail_data"])
-            thumb_label.setPixmap(pixmap.scaled(160, 90, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        if info["thumbnail_image"] is not None:
+            thumb_label.setPixmap(QPixmap.fromImage(info["thumbnail_image"]))
         else:
             thumb_label.setText("No Thumb")
         self.queue_table.setCellWidget(row, 0, thumb_label)
@@ -507,6 +517,7 @@ class ShrineDownloader(QWidget):
         """)
 
 if __name__ == "__main__":
+    shrine_http.configure(CONFIG)
     app = QApplication(sys.argv)
     window = ShrineDownloader()
     window.show()
@@ -1,13 +1,22 @@
-import sys, os, subprocess, requests, json, re, platform, tempfile
-from datetime import datetime
+import sys, os, subprocess, json, platform, tempfile, multiprocessing
+from collections import deque
 from PySide6.QtWidgets import (
     QApplication, QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout,
     QHBoxLayout, QComboBox, QFileDialog, QProgressBar, QMessageBox,
-    QCheckBox, QTableWidget, QTableWidgetItem, QHeaderView, QGroupBox,
-    QPlainTextEdit, QSizePolicy
+    QCheckBox, QTableView, QHeaderView, QGroupBox, QAbstractItemView,
+    QPlainTextEdit, QSizePolicy, QSpinBox, QStyledItemDelegate, QStyleOptionProgressBar, QStyle, QMenu
 )
-from PySide6.QtGui import QPixmap, QColor, QIcon, QFont
-from PySide6.QtCore import Qt, QTimer, QThread, QObject, Signal
+from PySide6.QtGui import QPixmap, QPixmapCache, QColor, QIcon, QFont
+from PySide6.QtCore import Qt, QTimer, QThreadPool, QRunnable, QObject, Signal, QAbstractTableModel, QModelIndex, QMimeData
+from shrine_cache import MetadataCache, app_data_dir, normalize_url
+from shrine_thumbs import ThumbnailCache, QUEUE_THUMB_SIZE
+import shrine_http
+from shrine_http import get_client
+from shrine_journal import QueueJournal
+from shrine_log import LogWriter
+from shrine_api import ControlServer
+from shrine_core import (DownloadManager, MetadataFetcher, PlaylistExpander, new_job, format_bytes,
+                         is_playlist_url, FORMAT_VIDEO, FORMAT_AUDIO, PRIORITY_NEXT, PRIORITY_NOW)
 
 # --- CONFIG & LANGUAGE FILES ---
 # Memuat file konfigurasi dan bahasa, sama seperti sebelumnya.
@@ -31,68 +40,279 @@ except FileNotFoundError:
     sys.exit(1)
 
 # --- WORKERS FOR THREADING ---
-# Worker untuk download, sudah dioptimalkan di kode Anda dan dipertahankan.
-class DownloadWorker(QObject):
-    progress = Signal(int, int)
-    finished = Signal(int, str, str)
-    log = Signal(str, str)
-    update_status = Signal(int, str)
-
-    def __init__(self, lang_pack):
+# Worker untuk mengambil metadata (judul, thumbnail).
+# Dijalankan di QThreadPool berukuran tetap; sinyal dikirim lewat objek MetadataSignals
+# bersama karena QRunnable bukan QObject. Satu worker memproses satu batch URL sekaligus
+# (satu proses yt-dlp atau satu instance yt_dlp.YoutubeDL), hasilnya dikirim per ID job.
+class MetadataSignals(QObject):
+    finished = Signal(dict, int) # Mengirimkan hasil dan ID job
+    error = Signal(str, int)    # Mengirimkan error dan ID job
+    batch_done = Signal(int)    # Worker batch selesai, slot pool bisa dipakai lagi
+    thumbnail = Signal(object, int) # QImage thumbnail (atau None) dan ID job
+
+class MetadataWorker(QRunnable):
+    """Menjalankan MetadataFetcher (shrine_core) di pool, lalu menambahkan thumbnail
+    yang sudah di-decode ke setiap hasil sebelum dikirim ke GUI."""
+
+    def __init__(self, batch_id, items, yt_dlp_path, signals, in_process=False, cache=None, thumb_cache=None):
         super().__init__()
-        self.lang_pack = lang_pack
+        self.batch_id = batch_id
+        self.signals = signals
+        self.thumb_cache = thumb_cache
+        self.fetcher = MetadataFetcher(items, yt_dlp_path, self.emit_result, self.signals.error.emit, in_process, cache)
 
-    def _t(self, key):
-        return self.lang_pack.get(key, key)
+    def cancel(self):
+        self.fetcher.cancel()
 
-    def run(self, cmd, row_index):
+    def run(self):
         try:
-            self.log.emit("log_download_start", "retry")
-            self.update_status.emit(row_index, self._t("status_downloading"))
-            creationflags = subprocess.CREATE_NO_WINDOW if sys.platform.startswith("win") else 0
-            process = subprocess.Popen(
-                cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                text=True, encoding='utf-8', errors='replace', creationflags=creationflags
-            )
-            final_filepath = ""
-            for line in iter(process.stdout.readline, ''):
-                if progress_match := re.search(r"\[download\]\s+([0-9\.]+)%", line):
-                    self.progress.emit(row_index, int(float(progress_match.group(1))))
-                if "[Merger]" in line:
-                    self.update_status.emit(row_index, self._t("status_merging"))
-                if merge_match := re.search(r"\[Merger\] Merging formats into \"(.+?)\"", line):
-                    final_filepath = merge_match.group(1)
-                if mp3_match := re.search(r"\[ExtractAudio\] Destination: (.+?)\n", line):
-                    final_filepath = mp3_match.group(1)
-                self.log.emit(line.strip(), "retry")
-            process.wait()
-            if not final_filepath and "-o" in cmd:
-                 final_filepath = cmd[cmd.index("-o") + 1]
-            if process.returncode == 0:
-                self.finished.emit(row_index, "success", os.path.basename(final_filepath))
-            else:
-                self.finished.emit(row_index, "error", "log_download_error")
-        except Exception as e:
-            self.finished.emit(row_index, "error", f"log_worker_error\n{str(e)}")
+            self.fetcher.run()
+        finally:
+            if not self.fetcher.cancelled: self.signals.batch_done.emit(self.batch_id)
 
-# Worker untuk mengambil metadata (judul, thumbnail).
-# Diubah untuk membawa 'row' agar tahu baris mana yang harus diperbarui.
-class MetadataWorker(QObject):
-    finished = Signal(dict, int) # Mengirimkan hasil dan nomor baris
-    error = Signal(str, int)    # Mengirimkan error dan nomor baris
+    def emit_result(self, info, url, job_id):
+        thumb_url = info.get("thumbnail")
+        try:
+            thumb_image = self.thumb_cache.load(thumb_url, QUEUE_THUMB_SIZE, get_client().get_bytes) if thumb_url else None
+        except Exception:
+            thumb_image = None
+        result = {"title": info.get("title", "N/A"), "thumbnail_image": thumb_image, "thumbnail": thumb_url, "url": url, "extractor": info.get("extractor_key"), "id": info.get("id")}
+        if not self.fetcher.cancelled: self.signals.finished.emit(result, job_id)
+
+# Worker ringan untuk memuat thumbnail (cache disk atau unduh) saat metadata diambil dari cache.
+class ThumbnailWorker(QRunnable):
+    def __init__(self, thumb_url, job_id, signals, thumb_cache):
+        super().__init__()
+        self.thumb_url = thumb_url
+        self.job_id = job_id
+        self.signals = signals
+        self.thumb_cache = thumb_cache
+
+    def run(self):
+        try:
+            thumb_image = self.thumb_cache.load(self.thumb_url, QUEUE_THUMB_SIZE, get_client().get_bytes)
+        except Exception:
+            thumb_image = None
+        self.signals.thumbnail.emit(thumb_image, self.job_id)
 
-    def run(self, url, yt_dlp_path, row):
+# Worker untuk menjabarkan playlist/channel: entri dikirim per halaman selama daftar dibaca.
+class PlaylistSignals(QObject):
+    entries = Signal(list, int) # halaman [(url, info)], ID penjabaran
+    done = Signal(int, int, str) # ID penjabaran, jumlah entri, pesan error ("" jika berhasil)
+
+class PlaylistWorker(QRunnable):
+    def __init__(self, expansion_id, url, yt_dlp_path, signals, in_process=False, page_size=50):
+        super().__init__()
+        self.expansion_id = expansion_id
+        self.signals = signals
+        self.expander = PlaylistExpander(url, yt_dlp_path, self.emit_entries, self.emit_done, in_process, page_size)
+
+    def cancel(self):
+        self.expander.cancel()
+
+    def run(self):
+        self.expander.run()
+
+    def emit_entries(self, page):
+        self.signals.entries.emit(page, self.expansion_id)
+
+    def emit_done(self, count, error):
+        self.signals.done.emit(self.expansion_id, count, error or "")
+
+# Worker untuk cek versi terbaru (version.json) lewat klien HTTP bersama.
+class UpdateSignals(QObject):
+    available = Signal(dict)
+
+class UpdateCheckWorker(QRunnable):
+    def __init__(self, update_url, signals):
+        super().__init__()
+        self.update_url = update_url
+        self.signals = signals
+
+    def run(self):
         try:
-            cmd = [yt_dlp_path, '--dump-json', '--no-playlist', url]
-            creationflags = subprocess.CREATE_NO_WINDOW if sys.platform.startswith("win") else 0
-            process = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='replace', check=True, creationflags=creationflags)
-            info = json.loads(process.stdout)
-            thumb_url = info.get("thumbnail")
-            img_data = requests.get(thumb_url).content if thumb_url else None
-            result = {"title": info.get("title", "N/A"), "thumbnail_data": img_data, "url": url}
-            self.finished.emit(result, row)
-        except Exception as e:
-            self.error.emit(str(e), row)
+            latest = shrine_http.check_for_update("version.json", self.update_url)
+        except Exception:
+            return # Cek update bersifat opsional, gagal jaringan diabaikan
+        if latest:
+            self.signals.available.emit(latest)
+
+# Loop event DownloadManager di atas event loop Qt: callback dari thread unduhan
+# dikirim lewat sinyal (queued connection) sehingga selalu berjalan di thread GUI.
+class QtLoop(QObject):
+    posted = Signal(object, object) # fungsi, tuple argumen
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.posted.connect(self.dispatch, Qt.ConnectionType.QueuedConnection)
+
+    def post(self, fn, *args):
+        self.posted.emit(fn, args)
+
+    def dispatch(self, fn, args):
+        fn(*args)
+
+    def call_later(self, delay, fn, *args):
+        QTimer.singleShot(int(delay * 1000), self, lambda: fn(*args))
+
+# --- MODEL/VIEW ANTREAN ---
+STATUS_KEYS = {
+    "Queued": "status_queued",
+    "Fetching": "status_fetching",
+    "Downloading": "status_downloading",
+    "Merging": "status_merging",
+    "Completed": "status_completed",
+    "Error": "status_error",
+    "Cancelled": "status_cancelled",
+    "Skipped": "status_skipped"
+}
+COL_THUMB, COL_TITLE, COL_DETAILS, COL_PROGRESS, COL_STATUS = range(5)
+JOB_MIME_TYPE = "application/x-shrine-job-ids"
+JOB_ROLE = Qt.ItemDataRole.UserRole + 1
+QUEUE_ROW_HEIGHT = 95 # Tinggi baris untuk thumbnail 160x90
+
+class QueueTableModel(QAbstractTableModel):
+    """Model antrean di atas JobStore. View hanya meminta data baris yang terlihat,
+    jadi tidak ada widget per baris dan biaya repaint tidak tumbuh dengan panjang antrean.
+    Baris bisa diseret untuk mengubah urutan; pemindahannya diserahkan ke on_move."""
+
+    def __init__(self, jobs, status_text, on_move=None, parent=None):
+        super().__init__(parent)
+        self.jobs = jobs # JobStore yang sama dengan ShrineDownloader.job_store
+        self.status_text = status_text # callable(job) -> teks status terjemahan
+        self.on_move = on_move # callable(job_id, baris_tujuan)
+        self.headers = [""] * 5
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.jobs)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 5
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        job = self.jobs.at(index.row())
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == COL_TITLE: return job["title"]
+            if column == COL_DETAILS: return job["details"]
+            if column == COL_STATUS: return self.status_text(job)
+        elif role == Qt.ItemDataRole.ToolTipRole and column == COL_TITLE:
+            return job["url"]
+        elif role == JOB_ROLE:
+            return job
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index) | Qt.ItemFlag.ItemIsDropEnabled
+        return flags | Qt.ItemFlag.ItemIsDragEnabled if index.isValid() else flags
+
+    def supportedDropActions(self):
+        return Qt.DropAction.MoveAction
+
+    def mimeTypes(self):
+        return [JOB_MIME_TYPE]
+
+    def mimeData(self, indexes):
+        job_ids = sorted({self.jobs.at(index.row())["id"] for index in indexes if index.isValid()})
+        mime = QMimeData()
+        mime.setData(JOB_MIME_TYPE, json.dumps(job_ids).encode("ascii"))
+        return mime
+
+    def dropMimeData(self, data, action, row, column, parent):
+        if action != Qt.DropAction.MoveAction or not data.hasFormat(JOB_MIME_TYPE) or self.on_move is None:
+            return False
+        target = row if row != -1 else (parent.row() if parent.isValid() else len(self.jobs))
+        for job_id in json.loads(bytes(data.data(JOB_MIME_TYPE)).decode("ascii")):
+            source = self.jobs.row_of(job_id)
+            if source is None:
+                continue
+            # Baris tujuan dihitung sebelum sumber dilepas dari posisinya
+            self.on_move(job_id, target - 1 if source < target else target)
+            target = self.jobs.row_of(job_id) + 1
+        # False: pemindahan sudah dilakukan di sini, view tidak perlu menghapus baris sumber
+        return False
+
+    def move_job(self, job_id, row):
+        """Memindahkan satu baris dengan notifikasi move, bukan reset model."""
+        source = self.jobs.row_of(job_id)
+        row = max(0, min(row, len(self.jobs) - 1))
+        if source is None or row == source:
+            return False
+        # Qt memakai indeks tujuan sebelum baris sumber dilepas
+        self.beginMoveRows(QModelIndex(), source, source, QModelIndex(), row + 1 if row > source else row)
+        self.jobs.move(job_id, row)
+        self.endMoveRows()
+        return True
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def set_headers(self, headers):
+        self.headers = list(headers)
+        self.headerDataChanged.emit(Qt.Orientation.Horizontal, 0, len(self.headers) - 1)
+
+    def append_jobs(self, jobs):
+        """Menambahkan banyak job dengan satu notifikasi insert."""
+        if not jobs: return
+        first = len(self.jobs)
+        self.beginInsertRows(QModelIndex(), first, first + len(jobs) - 1)
+        for job in jobs:
+            self.jobs.add(job)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.jobs.clear()
+        self.endResetModel()
+
+    def refresh_job(self, job_id, first_column=COL_THUMB, last_column=COL_STATUS):
+        row = self.jobs.row_of(job_id)
+        if row is not None:
+            self.dataChanged.emit(self.index(row, first_column), self.index(row, last_column))
+
+    def refresh_column(self, column):
+        if self.jobs:
+            self.dataChanged.emit(self.index(0, column), self.index(len(self.jobs) - 1, column))
+
+class QueueItemDelegate(QStyledItemDelegate):
+    """Menggambar thumbnail dan progress bar langsung di sel, tanpa QLabel/QProgressBar per baris."""
+
+    def __init__(self, thumbnail_for, parent):
+        super().__init__(parent)
+        self.thumbnail_for = thumbnail_for # callable(job) -> QPixmap atau None
+        # QProgressBar tersembunyi hanya sebagai acuan agar stylesheet QProgressBar ikut dipakai
+        self.style_bar = QProgressBar(parent)
+        self.style_bar.hide()
+
+    def paint(self, painter, option, index):
+        column = index.column()
+        if column not in (COL_THUMB, COL_PROGRESS):
+            return super().paint(painter, option, index)
+        job = index.data(JOB_ROLE)
+        if not job or not job["details"]:
+            return # Metadata belum ada atau gagal: sel dibiarkan kosong
+        if column == COL_THUMB:
+            pixmap = self.thumbnail_for(job)
+            if pixmap is not None:
+                x = option.rect.x() + (option.rect.width() - pixmap.width()) // 2
+                y = option.rect.y() + (option.rect.height() - pixmap.height()) // 2
+                painter.drawPixmap(x, y, pixmap)
+            elif not job["thumb_key"]:
+                painter.drawText(option.rect, Qt.AlignmentFlag.AlignCenter, "No Thumb")
+            return
+        bar = QStyleOptionProgressBar()
+        bar.rect = option.rect.adjusted(4, 0, -4, 0)
+        bar.rect.setHeight(24)
+        bar.rect.moveCenter(option.rect.center())
+        bar.minimum, bar.maximum, bar.progress = 0, 100, job["progress"]
+        bar.text = f"{job['progress']}%"
+        bar.textVisible = True
+        bar.state = option.state | QStyle.StateFlag.State_Horizontal
+        self.style_bar.style().drawControl(QStyle.ControlElement.CE_ProgressBar, bar, painter, self.style_bar)
 
 # --- Main Application Window ---
 class ShrineDownloader(QWidget):
@@ -103,24 +323,94 @@ class ShrineDownloader(QWidget):
         self.output_folder = os.path.abspath("downloads")
         os.makedirs(self.output_folder, exist_ok=True)
         
-        self.download_queue_data = [] # Menyimpan data lengkap job
-        self.is_downloading = False
-        self.current_download_index = -1
-        self.meta_threads = [] # Menyimpan referensi thread metadata agar tidak hilang
+        # Antrean dicatat di jurnal append-only agar bisa dipulihkan setelah aplikasi ditutup/crash
+        self.journal = QueueJournal(os.path.join(app_data_dir(CONFIG.get("data_dir")), "queue.jsonl"))
+        # Output yt-dlp dan pesan job ditulis thread latar per batch, dengan rotasi ukuran
+        self.logger = LogWriter(os.path.join(app_data_dir(CONFIG.get("data_dir")), "logs", "shrine.log"),
+                                max_bytes=CONFIG.get("log_max_mb", 5) * 1024 * 1024,
+                                backups=CONFIG.get("log_backups", 3),
+                                buffer_lines=CONFIG.get("log_buffer_lines", 2000))
+        # Antrean, scheduler, unduhan, bandwidth, dan resume dijalankan DownloadManager
+        # (shrine_core); GUI hanya menampilkan job dan meneruskan perintah pengguna.
+        self.loop = QtLoop(self)
+        self.manager = DownloadManager(CONFIG, self.loop, self.output_folder, listener=self.on_manager_event)
+        self.job_store = self.manager.jobs # Menyimpan data lengkap job, diindeks per ID
+        # Pool metadata berukuran tetap. Job menunggu di manager.metadata (MetadataPlanner) dan
+        # hanya baris yang terlihat serta job yang segera diunduh yang dikirim ke pool, jadi
+        # menempel ribuan link tidak memicu ribuan fetch sekaligus.
+        self.meta_pool = QThreadPool(self)
+        self.meta_pool.setMaxThreadCount(max(1, int(CONFIG.get("metadata_workers", 4))))
+        self.meta_inflight = {} # batch_id -> MetadataWorker yang sedang berjalan
+        self.meta_batch_size = max(1, int(CONFIG.get("metadata_batch_size", 20)))
+        self.meta_in_process = bool(CONFIG.get("metadata_in_process", True))
+        self.meta_batch_counter = 0
+        # Link playlist/channel dijabarkan di thread sendiri; entrinya langsung antre per halaman
+        self.expand_playlists = bool(CONFIG.get("expand_playlists", True))
+        self.playlist_page_size = max(1, int(CONFIG.get("playlist_page_size", 50)))
+        self.playlist_signals = PlaylistSignals()
+        self.playlist_signals.entries.connect(self.on_playlist_entries)
+        self.playlist_signals.done.connect(self.on_playlist_done)
+        self.expansions = {} # ID penjabaran -> (PlaylistWorker, kunci, url, format, resolusi)
+        self.expansion_counter = 0
+        self.metadata_cache = MetadataCache(
+            os.path.join(app_data_dir(CONFIG.get("data_dir")), "metadata.db"),
+            ttl_seconds=float(CONFIG.get("metadata_cache_ttl_hours", 168)) * 3600,
+            max_entries=CONFIG.get("metadata_cache_max_entries", 20000))
+        self.thumb_cache = ThumbnailCache(
+            os.path.join(app_data_dir(CONFIG.get("data_dir")), "thumbnails"),
+            memory_items=CONFIG.get("thumbnail_memory_items", 400),
+            max_disk_mb=CONFIG.get("thumbnail_cache_max_mb", 200))
+        self.meta_signals = None
+        self.reset_metadata_signals()
+        # Thumbnail sudah di-decode dan diskalakan di worker (QImage); GUI hanya memasang
+        # beberapa per putaran event loop agar ratusan hasil sekaligus tidak membuat UI tersendat.
+        self.thumb_install_queue = deque() # (job_id, QImage/None)
+        self.thumb_requests = {} # thumb_key -> set ID job yang menunggu pixmap dimuat ulang
+        # Pixmap thumbnail hanya disimpan di QPixmapCache yang dibatasi; baris yang tidak
+        # terlihat tidak memegang gambar apa pun dan dimuat ulang dari ThumbnailCache saat perlu.
+        QPixmapCache.setCacheLimit(int(CONFIG.get("thumbnail_pixmap_cache_mb", 32)) * 1024)
+        self.thumb_installs_per_tick = max(1, int(CONFIG.get("thumbnail_installs_per_tick", 16)))
+        self.thumb_install_timer = QTimer(self)
+        self.thumb_install_timer.setInterval(0)
+        self.thumb_install_timer.timeout.connect(self.install_pending_thumbnails)
+        # Baris yang terlihat dihitung ulang sekali setelah scroll/insert/resize mereda
+        self.viewport_timer = QTimer(self)
+        self.viewport_timer.setSingleShot(True)
+        self.viewport_timer.setInterval(50)
+        self.viewport_timer.timeout.connect(self.update_visible_jobs)
 
         self.init_ui()
         self.connect_signals()
         self.retranslate_ui()
         self.apply_stylesheet()
+        self.restore_queue()
 
-    def _t(self, key, **kwargs):
-        return LANGUAGES.get(self.current_lang, {}).get(key, key).format(**kwargs)
+        # API kontrol lokal: alat lain bisa menambah, memantau, dan membatalkan job
+        self.control = None
+        if CONFIG.get("api_enabled", False):
+            self.control = ControlServer(self.loop, self.manager, self.api_submit,
+                                         CONFIG.get("api_host", "127.0.0.1"), CONFIG.get("api_port", 8765),
+                                         CONFIG.get("api_socket") or None, CONFIG.get("api_token", ""),
+                                         move=self.move_job)
+            try:
+                self.control.start()
+            except OSError as e:
+                self.control = None
+                self.write_log(f"Control API: {e}", "error")
 
-    def get_yt_dlp_path(self):
-        executable = "yt-dlp.exe" if platform.system() == "Windows" else "yt-dlp"
-        if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
-            return os.path.join(sys._MEIPASS, executable)
-        return executable
+        # Cek update saat start hanya jika diaktifkan (update_check di video_config.json)
+        if CONFIG.get("update_check", False):
+            self.update_signals = UpdateSignals()
+            self.update_signals.available.connect(self.on_update_available)
+            QThreadPool.globalInstance().start(UpdateCheckWorker(CONFIG.get("update_url", shrine_http.UPDATE_URL), self.update_signals))
+
+    def on_update_available(self, latest):
+        QMessageBox.information(self, self._t("update_title", default="Update Available"),
+                                f"{latest.get('tag_name', '')}\n{latest.get('release_notes', '')}\n{latest.get('html_url', '')}")
+
+    def _t(self, key, **kwargs):
+        default_val = kwargs.pop('default', key)
+        return LANGUAGES.get(self.current_lang, {}).get(key, default_val).format(**kwargs)
 
     def init_ui(self):
         """Membangun semua elemen UI dengan layout yang baru."""
@@ -149,7 +439,7 @@ class ShrineDownloader(QWidget):
         self.url_input = QLineEdit()
         self.format_label = QLabel()
         self.format_combo = QComboBox()
-        self.format_combo.addItems(["Video (MP4)", "Audio (MP3)"])
+        self.format_combo.addItems([FORMAT_VIDEO, FORMAT_AUDIO])
         self.res_label = QLabel()
         self.res_combo = QComboBox()
         self.res_combo.addItems(CONFIG["format_map"].keys())
@@ -181,14 +471,33 @@ class ShrineDownloader(QWidget):
         queue_group = QGroupBox()
         queue_layout = QVBoxLayout()
         
-        self.queue_table = QTableWidget()
-        self.queue_table.setColumnCount(5)
-        self.queue_table.setSelectionMode(QTableWidget.SelectionMode.NoSelection)
-        self.queue_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.queue_model = QueueTableModel(self.job_store, self.status_text, self.move_job, self)
+        self.queue_table = QTableView()
+        self.queue_table.setModel(self.queue_model)
+        self.queue_table.setItemDelegate(QueueItemDelegate(self.queue_thumbnail, self.queue_table))
+        # Satu baris dipilih untuk diseret (ubah urutan) atau dibuka menu konteksnya
+        self.queue_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.queue_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.queue_table.setDragEnabled(True)
+        self.queue_table.setAcceptDrops(True)
+        self.queue_table.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
+        self.queue_table.setDragDropOverwriteMode(False)
+        self.queue_table.setDropIndicatorShown(True)
+        self.queue_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.queue_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.queue_table.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.queue_table.setWordWrap(False)
+        # Tinggi baris dan lebar kolom tetap: tanpa ResizeToContents yang memindai semua baris
         self.queue_table.verticalHeader().setVisible(False)
-        self.queue_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
-        self.queue_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
-        self.queue_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
+        self.queue_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.queue_table.verticalHeader().setDefaultSectionSize(QUEUE_ROW_HEIGHT)
+        header = self.queue_table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        header.setSectionResizeMode(COL_TITLE, QHeaderView.ResizeMode.Stretch)
+        self.queue_table.setColumnWidth(COL_THUMB, QUEUE_THUMB_SIZE[0] + 10)
+        self.queue_table.setColumnWidth(COL_DETAILS, 160)
+        self.queue_table.setColumnWidth(COL_PROGRESS, 140)
+        self.queue_table.setColumnWidth(COL_STATUS, 110)
         
         queue_layout.addWidget(self.queue_table)
         queue_group.setLayout(queue_layout)
@@ -200,10 +509,17 @@ class ShrineDownloader(QWidget):
         self.clear_queue_button = QPushButton() # Tombol baru
         self.open_folder_button = QPushButton()
         self.shutdown_checkbox = QCheckBox()
+        self.limit_label = QLabel()
+        self.limit_spin = QSpinBox() # Batas bandwidth global dalam KB/s, 0 = tanpa batas
+        self.limit_spin.setRange(0, 1000000)
+        self.limit_spin.setSingleStep(256)
+        self.limit_spin.setValue(self.manager.governor.limit // 1024)
         action_buttons_layout.addWidget(self.start_queue_button)
         action_buttons_layout.addWidget(self.clear_queue_button) # Ditambahkan ke layout
         action_buttons_layout.addWidget(self.open_folder_button)
         action_buttons_layout.addStretch(1)
+        action_buttons_layout.addWidget(self.limit_label)
+        action_buttons_layout.addWidget(self.limit_spin)
         action_buttons_layout.addWidget(self.shutdown_checkbox)
         right_column.addLayout(action_buttons_layout)
 
@@ -224,6 +540,12 @@ class ShrineDownloader(QWidget):
         self.open_folder_button.clicked.connect(self.open_result_folder)
         self.clear_queue_button.clicked.connect(self.clear_queue) # Sinyal baru
         self.lang_combo.currentIndexChanged.connect(self.change_language) # Sinyal baru
+        self.limit_spin.valueChanged.connect(self.change_bandwidth_limit)
+        self.queue_table.customContextMenuRequested.connect(self.show_queue_menu)
+        self.queue_table.verticalScrollBar().valueChanged.connect(self.schedule_viewport_update)
+        self.queue_model.rowsInserted.connect(self.schedule_viewport_update)
+        self.queue_model.rowsMoved.connect(self.schedule_viewport_update)
+        self.queue_model.modelReset.connect(self.schedule_viewport_update)
 
     def retranslate_ui(self):
         """Memperbarui teks UI berdasarkan bahasa yang dipilih."""
@@ -242,7 +564,7 @@ class ShrineDownloader(QWidget):
         self.add_batch_button.setText(self._t("add_batch_button", default="Add from Batch"))
         # Grup Antrean
         self.findChildren(QGroupBox)[2].setTitle(self._t("queue_group_title", default="Download Queue"))
-        self.queue_table.setHorizontalHeaderLabels([
+        self.queue_model.set_headers([
             self._t("queue_thumb", default=""),
             self._t("queue_title", default="Title"),
             self._t("queue_format", default="Details"),
@@ -253,6 +575,7 @@ class ShrineDownloader(QWidget):
         self.start_queue_button.setText(self._t("start_download", default="Start Download"))
         self.open_folder_button.setText(self._t("open_folder"))
         self.shutdown_checkbox.setText(self._t("shutdown_checkbox"))
+        self.limit_label.setText(self._t("bandwidth_limit_label", default="Limit (KB/s, 0 = off)"))
         self.clear_queue_button.setText(self._t("clear_queue_button", default="Clear List")) # Teks tombol baru
         
         # Set Ikon
@@ -266,14 +589,17 @@ class ShrineDownloader(QWidget):
 
     def clear_queue(self):
         """Membersihkan semua item dari antrean unduhan."""
-        if self.is_downloading:
+        if self.manager.running:
             QMessageBox.warning(self, self._t("clear_warning_title", default="Warning"),
                                 self._t("clear_warning_message", default="Cannot clear the queue while a download is in progress."))
             return
         
-        self.queue_table.setRowCount(0)
-        self.download_queue_data.clear()
-        self.current_download_index = -1
+        self.cancel_metadata_fetches()
+        self.cancel_playlist_expansions()
+        self.thumb_install_queue.clear()
+        self.thumb_requests.clear()
+        self.queue_model.clear()
+        self.manager.clear()
 
     def change_language(self):
         """Mengganti bahasa UI dan memperbarui semua teks."""
@@ -281,19 +607,50 @@ class ShrineDownloader(QWidget):
         if selected_code and selected_code != self.current_lang:
             self.current_lang = selected_code
             self.retranslate_ui()
-            # Perbarui status teks item yang sudah ada di antrean
-            for job in self.download_queue_data:
-                status_key_map = {
-                    "Queued": "status_queued",
-                    "Fetching": "status_fetching",
-                    "Downloading": "status_downloading",
-                    "Merging": "status_merging",
-                    "Completed": "status_completed",
-                    "Error": "status_error"
-                }
-                status_key = status_key_map.get(job['status'], "status_queued")
-                self.update_status_in_table(job['row'], self._t(status_key, default=job['status']))
+            # Teks status dihitung model dari job['status'], cukup minta view menggambar ulang
+            self.queue_model.refresh_column(COL_STATUS)
 
+    def status_text(self, job):
+        status = job["status"]
+        text = self._t(STATUS_KEYS.get(status, "status_queued"), default=status)
+        record = job.get("progress_record")
+        if status == "Downloading" and record and record.speed:
+            # Angka throughput nyata dari progress terstruktur yt-dlp
+            eta = f" · ETA {record.eta // 60}:{record.eta % 60:02d}" if record.eta else ""
+            frags = f"{job['fragments']} frag · " if record.fragment_count and job.get("fragments") else ""
+            text += f"\n{frags}{format_bytes(record.speed)}/s{eta}"
+        elif status in ("Queued", "Fetching") and job.get("priority"):
+            key, default = ("priority_now", "now") if job["priority"] >= PRIORITY_NOW else ("priority_next", "next")
+            text += f" · {self._t(key, default=default)}"
+        return text
+
+    def show_queue_menu(self, pos):
+        """Menu konteks baris antrean: unduh berikutnya, unduh sekarang, batalkan."""
+        index = self.queue_table.indexAt(pos)
+        if not index.isValid():
+            return
+        job = self.job_store.at(index.row())
+        waiting = job["status"] in ("Fetching", "Queued")
+        menu = QMenu(self)
+        next_action = menu.addAction(self._t("menu_download_next", default="Download next"))
+        now_action = menu.addAction(self._t("menu_download_now", default="Download now"))
+        menu.addSeparator()
+        cancel_action = menu.addAction(self._t("menu_cancel", default="Cancel"))
+        next_action.setEnabled(waiting and (job.get("priority") or 0) < PRIORITY_NEXT)
+        now_action.setEnabled(waiting)
+        cancel_action.setEnabled(job["status"] not in ("Completed", "Error", "Cancelled", "Skipped"))
+        chosen = menu.exec(self.queue_table.viewport().mapToGlobal(pos))
+        if chosen is next_action:
+            self.manager.download_next(job["id"])
+        elif chosen is now_action:
+            self.manager.download_now(job["id"])
+        elif chosen is cancel_action:
+            self.manager.cancel(job["id"])
+
+    def move_job(self, job_id, row):
+        """Seret-lepas di tabel (dan POST /jobs/<id>/move): urutan unduhan ikut berubah."""
+        if self.queue_model.move_job(job_id, row):
+            self.manager.move_job(job_id, self.job_store.row_of(job_id))
 
     def add_single_url(self):
         """Menambahkan satu URL dari input."""
@@ -310,177 +667,288 @@ class ShrineDownloader(QWidget):
             self.add_to_queue(urls)
             self.batch_urls_input.clear()
 
-    def add_to_queue(self, urls):
-        """Fungsi inti untuk menambahkan URL ke antrean dan memulai pengambilan metadata."""
-        for url in urls:
-            row_position = self.queue_table.rowCount()
-            self.queue_table.insertRow(row_position)
-            self.queue_table.setRowHeight(row_position, 95) # Tinggi baris untuk thumbnail
+    def add_to_queue(self, urls, fmt=None, resolution=None):
+        """Fungsi inti untuk menambahkan URL ke antrean dan memulai pengambilan metadata.
+        Tanpa fmt/resolution dipakai pilihan di UI. URL yang sudah ada di antrean tidak
+        ditambahkan lagi. Mengembalikan ID job per URL (job lama untuk duplikat)."""
+        fmt = fmt or self.format_combo.currentText()
+        resolution = resolution or self.res_combo.currentText()
+        # Link playlist/channel tidak menjadi job sendiri; entrinya menyusul (ID None)
+        playlists = [url for url in urls if self.expand_playlists and is_playlist_url(url)]
+        for url in playlists:
+            self.expand_playlist(url, fmt, resolution)
+        fresh, duplicates = self.manager.screen_urls([url for url in urls if url not in playlists], fmt)
+        if duplicates:
+            self.write_log(self._t("log_duplicates_skipped", default="{count} duplicate link(s) skipped", count=len(duplicates)), "retry")
+        new_jobs = [new_job(url, fmt, resolution) for url in fresh]
+        # Satu insert ke model untuk seluruh batch
+        self.queue_model.append_jobs(new_jobs)
+        for job in new_jobs:
+            self.fetch_metadata_for_row(job["url"], job["id"])
+        added = {job["url"]: job["id"] for job in new_jobs}
+        return [added.get(url, duplicates.get(url)) for url in urls]
 
-            # Tambahkan placeholder saat metadata diambil
-            self.queue_table.setItem(row_position, 1, QTableWidgetItem(url))
-            self.queue_table.setItem(row_position, 4, QTableWidgetItem(self._t("status_fetching", default="Fetching...")))
-            
-            # Data sementara untuk job
-            job_data = {
-                "url": url,
-                "format": self.format_combo.currentText(),
-                "resolution": self.res_combo.currentText() if self.format_combo.currentIndex() == 0 else "N/A",
-                "status": "Fetching",
-                "row": row_position
-            }
-            self.download_queue_data.append(job_data)
-            
-            self.fetch_metadata_for_row(url, row_position)
+    def expand_playlist(self, url, fmt, resolution):
+        key = (normalize_url(url), fmt)
+        if any(expansion[1] == key for expansion in self.expansions.values()):
+            return # Playlist yang sama sedang dijabarkan
+        self.expansion_counter += 1
+        worker = PlaylistWorker(self.expansion_counter, url, self.manager.yt_dlp_path, self.playlist_signals,
+                                self.meta_in_process, self.playlist_page_size)
+        self.expansions[self.expansion_counter] = (worker, key, url, fmt, resolution)
+        self.write_log(self._t("log_playlist_expanding", default="Reading playlist: {url}", url=url), "retry")
+        QThreadPool.globalInstance().start(worker)
 
-    def fetch_metadata_for_row(self, url, row):
-        """Membuat worker terpisah untuk mengambil metadata satu URL."""
-        thread = QThread()
-        worker = MetadataWorker()
-        worker.moveToThread(thread)
+    def on_playlist_entries(self, page, expansion_id):
+        """Satu halaman entri playlist masuk antrean sekaligus. Judul, ID, dan thumbnail dari
+        daftar flat sudah cukup untuk mengantre; thumbnail baru dimuat saat barisnya terlihat
+        dan detail video diambil yt-dlp sendiri saat unduhan dimulai."""
+        expansion = self.expansions.get(expansion_id)
+        if expansion is None:
+            return # Dibatalkan (antrean dibersihkan)
+        _, _, _, fmt, resolution = expansion
+        fresh, duplicates = self.manager.screen_urls([url for url, _ in page], fmt)
+        fresh = set(fresh)
+        entries = []
+        for url, info in page:
+            if url in fresh:
+                fresh.discard(url)
+                entries.append((new_job(url, fmt, resolution), info))
+        self.queue_model.append_jobs([job for job, _ in entries])
+        for job, info in entries:
+            self.update_row_with_metadata(info, job["id"])
 
-        thread.started.connect(lambda: worker.run(url, self.get_yt_dlp_path(), row))
-        worker.finished.connect(self.update_row_with_metadata)
-        worker.error.connect(self.on_metadata_error)
-        
-        # Membersihkan setelah selesai
-        worker.finished.connect(thread.quit)
-        worker.finished.connect(worker.deleteLater)
-        thread.finished.connect(thread.deleteLater)
-        
-        thread.start()
-        self.meta_threads.append((thread, worker)) # Simpan referensi
+    def on_playlist_done(self, expansion_id, count, error):
+        expansion = self.expansions.pop(expansion_id, None)
+        if expansion is None:
+            return
+        url = expansion[2]
+        if error and not count:
+            self.write_log(self._t("log_playlist_failed", default="Playlist could not be read: {url}", url=url) + f" ({error})", "error")
+        else:
+            self.write_log(self._t("log_playlist_done", default="{count} video(s) added from playlist: {url}", count=count, url=url), "success")
+
+    def cancel_playlist_expansions(self):
+        for worker, *_ in self.expansions.values():
+            worker.cancel()
+        self.expansions.clear()
+
+    def api_submit(self, urls, fmt, resolution, start):
+        """Job dari API kontrol; start=True langsung menjalankan antrean seperti tombol Start."""
+        job_ids = self.add_to_queue(urls, fmt, resolution)
+        if start and not self.manager.running:
+            self.process_queue()
+        return job_ids
+
+    def restore_queue(self):
+        """Memulihkan antrean dari jurnal. Job yang selesai/gagal tampil apa adanya; job yang
+        terputus (Fetching/Queued/Downloading/Merging) diantrekan ulang lewat jalur metadata,
+        yang untuk link yang sudah dikenal langsung terisi dari cache."""
+        restored = []
+        # Urutan antrean sesi lalu (hasil seret/"download next") dipulihkan dari rank
+        saved_jobs = self.journal.load()
+        saved_jobs = [saved for _, saved in sorted(enumerate(saved_jobs),
+                      key=lambda item: (item[1].get("rank") if item[1].get("rank") is not None else item[0], item[0]))]
+        for saved in saved_jobs:
+            # ID baru sesi ini menjadi rank; prioritas next/now tetap berlaku
+            job = dict(saved, progress=100 if saved.get("status") == "Completed" else 0, rank=None)
+            job["details"] = job.get("details") or ""
+            if job["status"] not in ("Completed", "Error", "Cancelled", "Skipped"):
+                job["status"] = "Fetching"
+            restored.append(job)
+        # Snapshot dengan ID sesi ini menggantikan seluruh isi jurnal lama (pemadatan)
+        self.queue_model.append_jobs(restored)
+        self.journal.rewrite(QueueJournal.add_record(job) for job in restored)
+        self.job_store.journal = self.journal
+        self.journal.start()
+        for job in restored:
+            if job["status"] == "Fetching":
+                self.fetch_metadata_for_row(job["url"], job["id"])
+
+    def fetch_metadata_for_row(self, url, job_id):
+        """Mengisi baris dari cache metadata, atau mendaftarkan job ke MetadataPlanner; fetch
+        baru berjalan saat barisnya terlihat atau job mendekati giliran unduh."""
+        cached = self.metadata_cache.get(url)
+        if cached:
+            info = {"title": cached["title"], "thumbnail_image": None, "url": url,
+                    "extractor": cached.get("extractor"), "id": cached.get("id"), "thumbnail": cached.get("thumbnail")}
+            self.update_row_with_metadata(info, job_id)
+            return
+        self.manager.metadata.add(self.job_store.get(job_id))
+        self.pump_metadata_queue()
+
+    def pump_metadata_queue(self):
+        """Mengirim batch job yang dibutuhkan sekarang ke pool selama masih ada worker kosong."""
+        max_workers = self.meta_pool.maxThreadCount()
+        if len(self.meta_inflight) >= max_workers:
+            return
+        wanted = self.manager.metadata.wanted()
+        while wanted and len(self.meta_inflight) < max_workers:
+            # Batch kecil bila antrean pendek agar semua worker kebagian, maksimal meta_batch_size
+            free_workers = max_workers - len(self.meta_inflight)
+            size = min(self.meta_batch_size, -(-len(wanted) // free_workers))
+            items = self.manager.metadata.claim(wanted[:size])
+            del wanted[:size]
+            self.meta_batch_counter += 1
+            worker = MetadataWorker(self.meta_batch_counter, items, self.manager.yt_dlp_path, self.meta_signals, self.meta_in_process, self.metadata_cache, self.thumb_cache)
+            self.meta_inflight[self.meta_batch_counter] = worker
+            self.meta_pool.start(worker)
+
+    def schedule_viewport_update(self):
+        if not self.viewport_timer.isActive():
+            self.viewport_timer.start()
 
-    def update_row_with_metadata(self, info, row):
+    def update_visible_jobs(self):
+        """Baris yang terlihat menentukan metadata mana yang diambil. Batch yang sedang
+        berjalan untuk baris yang sudah digulir menjauh (dan tidak segera diunduh) dibatalkan."""
+        view = self.queue_table
+        first = view.rowAt(0)
+        if first < 0:
+            self.manager.metadata.set_visible([])
+        else:
+            last = view.rowAt(view.viewport().height() - 1)
+            last = len(self.job_store) - 1 if last < 0 else last
+            self.manager.metadata.set_visible(self.job_store.at(row)["id"] for row in range(first, last + 1))
+        for batch_id, worker in list(self.meta_inflight.items()):
+            job_ids = [job_id for _, job_id in worker.fetcher.items]
+            if not self.manager.metadata.is_wanted(job_ids):
+                worker.cancel()
+                del self.meta_inflight[batch_id]
+                self.manager.metadata.release(job_ids)
+        self.pump_metadata_queue()
+
+    def on_metadata_batch_done(self, batch_id):
+        """Melepas worker batch yang sudah selesai lalu mengisi slot dengan batch berikutnya."""
+        self.meta_inflight.pop(batch_id, None)
+        self.pump_metadata_queue()
+
+    def reset_metadata_signals(self):
+        """Membuat objek sinyal baru agar hasil dari fetch yang dibatalkan tidak sampai ke tabel."""
+        if self.meta_signals is not None:
+            self.meta_signals.finished.disconnect()
+            self.meta_signals.error.disconnect()
+            self.meta_signals.batch_done.disconnect()
+            self.meta_signals.thumbnail.disconnect()
+        self.meta_signals = MetadataSignals()
+        self.meta_signals.finished.connect(self.update_row_with_metadata)
+        self.meta_signals.error.connect(self.on_metadata_error)
+        self.meta_signals.batch_done.connect(self.on_metadata_batch_done)
+        self.meta_signals.thumbnail.connect(self.set_row_thumbnail)
+
+    def cancel_metadata_fetches(self):
+        """Membatalkan semua fetch metadata yang sedang berjalan (job yang menunggu dibersihkan
+        bersama antrean lewat manager.clear)."""
+        for worker in self.meta_inflight.values():
+            worker.cancel()
+        self.meta_inflight.clear()
+        self.reset_metadata_signals()
+
+    def update_row_with_metadata(self, info, job_id):
         """Memperbarui baris tabel dengan metadata yang sudah didapat."""
-        # Update data di list utama
-        job = next((item for item in self.download_queue_data if item['row'] == row), None)
-        if not job: return
-        job['title'] = info['title']
-        job['status'] = "Queued"
-        
-        # Tampilkan thumbnail
-        thumb_label = QLabel()
-        thumb_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        if info["thumbnail_data"]:
-            pixmap = QPixmap()
-            pixmap.loadFromData(info["thumbnail_data"])
-            thumb_label.setPixmap(pixmap.scaled(160, 90, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        # Thumbnail: hasil fetch baru sudah membawa QImage; untuk hasil dari cache metadata
+        # gambar dimuat oleh delegate saat baris terlihat (lihat queue_thumbnail)
+        fields = {}
+        if info.get("thumbnail"):
+            fields.update(thumb_url=info["thumbnail"], thumb_key=ThumbnailCache.key_for(info["thumbnail"]))
+        # Manager mengisi judul/host, memeriksa file parsial, lalu mengantrekan job
+        # (dan langsung memulainya jika antrean sedang berjalan)
+        self.manager.accept_metadata(job_id, info, **fields)
+        if info.get("thumbnail_image") is not None and self.job_store.get(job_id):
+            self.set_row_thumbnail(info["thumbnail_image"], job_id)
+
+    def queue_thumbnail(self, job):
+        """Dipanggil delegate saat menggambar: pixmap dari QPixmapCache, atau minta dimuat di pool."""
+        key = job["thumb_key"]
+        if not key:
+            return None
+        pixmap = QPixmapCache.find(key)
+        if pixmap is not None and not pixmap.isNull():
+            return pixmap
+        waiting_jobs = self.thumb_requests.get(key)
+        if waiting_jobs is None:
+            self.thumb_requests[key] = {job["id"]}
+            self.meta_pool.start(ThumbnailWorker(job["thumb_url"], job["id"], self.meta_signals, self.thumb_cache))
         else:
-            thumb_label.setText("No Thumb")
-        self.queue_table.setCellWidget(row, 0, thumb_label)
-        
-        # Tampilkan Judul dan Detail
-        self.queue_table.setItem(row, 1, QTableWidgetItem(info["title"]))
-        details = f"{job['format']} | {job['resolution']}"
-        self.queue_table.setItem(row, 2, QTableWidgetItem(details))
-        
-        # Tambahkan Progress Bar
-        progress_bar = QProgressBar()
-        progress_bar.setValue(0)
-        progress_bar.setTextVisible(True)
-        self.queue_table.setCellWidget(row, 3, progress_bar)
-        
-        # Update status
-        self.queue_table.setItem(row, 4, QTableWidgetItem(self._t("status_queued", default="Queued")))
+            waiting_jobs.add(job["id"])
+        return None
+
+    def set_row_thumbnail(self, thumb_image, job_id):
+        """Menjadwalkan pemasangan thumbnail; dipasang bertahap oleh install_pending_thumbnails."""
+        self.thumb_install_queue.append((job_id, thumb_image))
+        if not self.thumb_install_timer.isActive():
+            self.thumb_install_timer.start()
 
-    def on_metadata_error(self, error_msg, row):
+    def install_pending_thumbnails(self):
+        """Memasang sejumlah kecil thumbnail per putaran event loop."""
+        for _ in range(min(self.thumb_installs_per_tick, len(self.thumb_install_queue))):
+            job_id, thumb_image = self.thumb_install_queue.popleft()
+            job = self.job_store.get(job_id)
+            if not job or not job["thumb_key"]: continue
+            key = job["thumb_key"]
+            job_ids = self.thumb_requests.pop(key, set()) | {job_id}
+            if thumb_image is not None:
+                # Gambar sudah di-decode dan diskalakan 160x90 di worker; di sini hanya jadi pixmap
+                QPixmapCache.insert(key, QPixmap.fromImage(thumb_image))
+            else:
+                job["thumb_key"] = None # Delegate akan menulis "No Thumb"
+            for waiting_id in job_ids:
+                self.queue_model.refresh_job(waiting_id, COL_THUMB, COL_THUMB)
+        if not self.thumb_install_queue:
+            self.thumb_install_timer.stop()
+
+    def on_metadata_error(self, error_msg, job_id):
         """Menangani jika gagal mengambil metadata."""
-        self.queue_table.setItem(row, 1, QTableWidgetItem(f"Failed: {error_msg}"))
-        self.queue_table.setItem(row, 4, QTableWidgetItem(self._t("status_error", default="Error")))
-        job = next((item for item in self.download_queue_data if item['row'] == row), None)
-        if job: job['status'] = "Error"
+        self.manager.reject_metadata(job_id, error_msg)
         
     def process_queue(self):
         """Memulai atau menghentikan proses unduhan."""
-        if self.is_downloading:
+        if self.manager.running:
             # Logika untuk menghentikan unduhan (implementasi lebih lanjut)
             pass
         else:
-            self.is_downloading = True
+            self.manager.start()
+
+    def on_manager_event(self, event, job_id, data):
+        """Menerima perubahan dari DownloadManager dan memperbarui tampilan."""
+        if event in ("status", "finished"):
+            self.pump_metadata_queue() # Horizon scheduler bergeser saat job mulai atau selesai
+        if event == "started":
+            # Juga saat antrean dimulai dari API atau "download now"
             self.start_queue_button.setText(self._t("stop_download", default="Stop Download"))
             self.start_queue_button.setIcon(QIcon("icons/stop.png"))
-            self.start_next_in_queue()
-
-    def start_next_in_queue(self):
-        """Mencari item berikutnya dalam antrean dan memulai unduhan."""
-        next_job_index = -1
-        for i, job in enumerate(self.download_queue_data):
-            if job["status"] == "Queued":
-                next_job_index = i
-                break
-
-        if next_job_index == -1:
-            self.is_downloading = False
+        elif event == "status":
+            self.queue_model.refresh_job(job_id)
+        elif event == "progress":
+            self.queue_model.refresh_job(job_id, COL_PROGRESS, COL_STATUS)
+        elif event == "log":
+            self.on_log_batch(job_id, data)
+        elif event == "finished":
+            status, message = data
+            self.write_log(message, "retry" if status in ("cancelled", "paused") else status, job_id)
+            self.queue_model.refresh_job(job_id, COL_PROGRESS, COL_STATUS)
+        elif event == "idle":
             self.start_queue_button.setText(self._t("start_download", default="Start Download"))
             self.start_queue_button.setIcon(QIcon("icons/download.png"))
             if self.shutdown_checkbox.isChecked():
                 self.initiate_shutdown()
-            return
 
-        self.current_download_index = next_job_index
-        job = self.download_queue_data[self.current_download_index]
-        job["status"] = "Downloading"
-        
-        # Bangun perintah yt-dlp
-        yt_dlp_path = self.get_yt_dlp_path()
-        base_cmd = [yt_dlp_path, "--no-part", "--no-continue", "--fragment-retries", str(CONFIG["fragment_retries"]), "--concurrent-fragments", str(CONFIG["concurrent_fragments"])]
-        
-        if job["format"] == "Audio (MP3)":
-            output_template = os.path.join(self.output_folder, "%(title)s.%(ext)s")
-            cmd = base_cmd + ["-f", "bestaudio/best", "--extract-audio", "--audio-format", "mp3", "--audio-quality", "0", "-o", output_template, job["url"]]
-        else: # Video
-            res = job["resolution"]
-            format_str = CONFIG["format_map"].get(res, "best")
-            output_template = os.path.join(self.output_folder, f"%(title)s_{res}.%(ext)s")
-            cmd = base_cmd + ["--merge-output-format", CONFIG["merge_format"], "--format", format_str, "-o", output_template, job["url"]]
-
-        # Siapkan dan mulai thread unduhan
-        self.download_thread = QThread()
-        self.download_worker = DownloadWorker(LANGUAGES.get(self.current_lang, {}))
-        self.download_worker.moveToThread(self.download_thread)
-        
-        self.download_worker.progress.connect(self.update_progress_in_table)
-        self.download_worker.update_status.connect(self.update_status_in_table)
-        self.download_worker.finished.connect(self.on_download_finished)
+    def change_bandwidth_limit(self, kbps):
+        """Batas dari UI berlaku langsung tanpa memulai ulang unduhan (mode engine)."""
+        self.manager.set_bandwidth_limit(kbps * 1024)
 
-        self.download_thread.started.connect(lambda: self.download_worker.run(cmd, job['row']))
-        self.download_thread.start()
+    def write_log(self, message, status, job_id=None):
+        # Pesan dari worker bisa berupa kunci bahasa (mis. "log_download_start")
+        key, _, detail = message.partition("\n")
+        if key in LANGUAGES.get(self.current_lang, {}):
+            message = self._t(key) + (f" {detail}" if detail else "")
+        self.logger.write(message, status, job_id)
 
-    def on_download_finished(self, row, status, message):
-        job = next((item for item in self.download_queue_data if item['row'] == row), None)
-        if not job: return
-
-        if status == "success":
-            job["status"] = "Completed"
-            self.update_status_in_table(row, self._t("status_completed", default="Completed"))
-        else:
-            job["status"] = "Error"
-            self.update_status_in_table(row, self._t("status_error", default="Error"))
-
-        self.download_thread.quit()
-        self.download_thread.wait()
-        self.start_next_in_queue()
-
-    def update_progress_in_table(self, row, percentage):
-        progress_bar = self.queue_table.cellWidget(row, 3)
-        if isinstance(progress_bar, QProgressBar):
-            progress_bar.setValue(percentage)
-
-    def update_status_in_table(self, row, status_text):
-        # Perbarui status internal terlebih dahulu
-        job = next((item for item in self.download_queue_data if item['row'] == row), None)
-        if job and status_text == self._t("status_merging"):
-            job['status'] = "Merging"
-
-        status_item = self.queue_table.item(row, 4)
-        if status_item:
-            status_item.setText(status_text)
-        else:
-            self.queue_table.setItem(row, 4, QTableWidgetItem(status_text))
+    def on_log_batch(self, job_id, lines):
+        for message, status in lines:
+            self.write_log(message, status, job_id)
 
     def toggle_resolution_box(self):
-        is_audio = self.format_combo.currentText() == "Audio (MP3)"
+        is_audio = self.format_combo.currentText() == FORMAT_AUDIO
         self.res_combo.setEnabled(not is_audio)
         self.res_label.setEnabled(not is_audio)
         
@@ -500,6 +968,22 @@ class ShrineDownloader(QWidget):
             else: os.system("sudo shutdown -h now")
         except Exception: pass
 
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.schedule_viewport_update()
+
+    def closeEvent(self, event):
+        # Hentikan proses yt-dlp metadata agar pool tidak menahan aplikasi saat ditutup
+        self.cancel_metadata_fetches()
+        self.cancel_playlist_expansions()
+        if self.control is not None:
+            self.control.close()
+        self.manager.close()
+        self.journal.close()
+        self.logger.close()
+        self.metadata_cache.close()
+        event.accept()
+
     def apply_stylesheet(self):
         """Menerapkan tema gelap pada aplikasi."""
         self.setStyleSheet("""
@@ -540,7 +1024,7 @@ class ShrineDownloader(QWidget):
             QPushButton:pressed {
                 background-color: #003c6a;
             }
-            QTableWidget {
+            QTableView {
                 gridline-color: #4a4a4a;
                 background-color: #3c3f41;
             }
@@ -564,6 +1048,8 @@ class ShrineDownloader(QWidget):
         """)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Proses worker engine pada build executable Windows
+    shrine_http.configure(CONFIG)
     app = QApplication(sys.argv)
     window = ShrineDownloader()
     window.show()
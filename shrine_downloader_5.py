@@ -1,13 +1,17 @@
-import sys, os, subprocess, requests, json, re, platform, tempfile
-from datetime import datetime
+import sys, os, subprocess, json, re, platform, tempfile
 from PySide6.QtWidgets import (
     QApplication, QWidget, QLabel, QLineEdit, QPushButton,
     QVBoxLayout, QHBoxLayout, QComboBox, QFileDialog, QProgressBar,
-    QListWidget, QListWidgetItem, QMessageBox, QInputDialog, QCheckBox,
+    QMessageBox, QInputDialog, QCheckBox,
     QTableWidget, QTableWidgetItem, QHeaderView
 )
-from PySide6.QtGui import QPixmap, QColor, QIcon
+from PySide6.QtGui import QPixmap, QIcon
 from PySide6.QtCore import Qt, QTimer, QThread, QObject, Signal
+from shrine_log import LogWriter
+from shrine_logview import LogPanel
+import shrine_http
+from shrine_cache import app_data_dir
+from shrine_thumbs import ThumbnailCache, PREVIEW_THUMB_SIZE
 
 # --- CONFIG & LANGUAGE FILES (TETAP SAMA) ---
 try:
@@ -89,6 +93,9 @@ class DownloadWorker(QObject):
 class MetadataWorker(QObject):
     finished = Signal(dict)
     error = Signal(str)
+    def __init__(self, thumb_cache):
+        super().__init__()
+        self.thumb_cache = thumb_cache
     def run(self, url, yt_dlp_path):
         try:
             cmd = [yt_dlp_path, '--dump-json', '--no-playlist', url]
@@ -96,8 +103,12 @@ class MetadataWorker(QObject):
             process = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='replace', check=True, creationflags=creationflags)
             info = json.loads(process.stdout)
             thumb_url = info.get("thumbnail")
-            img_data = requests.get(thumb_url).content if thumb_url else None
-            result = {"title": info.get("title", "N/A"), "duration": info.get("duration", 0), "height": info.get("height", "N/A"), "width": info.get("width", "N/A"), "thumbnail_data": img_data}
+            # Thumbnail 320x180 diambil dari cache bersama (disk/memori) atau diunduh sekali
+            try:
+                thumb_image = self.thumb_cache.load(thumb_url, PREVIEW_THUMB_SIZE, shrine_http.get_client().get_bytes) if thumb_url else None
+            except Exception:
+                thumb_image = None # Thumbnail gagal cukup dikosongkan, metadata tetap dipakai
+            result = {"title": info.get("title", "N/A"), "duration": info.get("duration", 0), "height": info.get("height", "N/A"), "width": info.get("width", "N/A"), "thumbnail_image": thumb_image}
             self.finished.emit(result)
         except Exception as e: self.error.emit(str(e))
 
@@ -132,13 +143,18 @@ class ShrineDownloader(QWidget):
         os.makedirs(self.output_folder, exist_ok=True)
         
         # --- LOGGING YANG DIOPTIMALKAN ---
+        # Record dikirim ke thread penulis dan ditulis per batch; panel log dibatasi
+        # sebanyak log_buffer_lines baris terakhir
         log_handle, self.log_file_path = tempfile.mkstemp(suffix=".log", prefix="shrine_log_")
         os.close(log_handle)
-        self.log_file = open(self.log_file_path, "a", encoding="utf-8")
+        self.log_buffer_lines = CONFIG.get("log_buffer_lines", 2000)
+        self.logger = LogWriter(self.log_file_path, max_bytes=CONFIG.get("log_max_mb", 5) * 1024 * 1024,
+                                backups=CONFIG.get("log_backups", 3), buffer_lines=self.log_buffer_lines)
         
         self.download_queue = [] # List untuk menyimpan data job
         self.current_download_index = -1
         self.is_downloading = False
+        self.thumb_cache = ThumbnailCache(os.path.join(app_data_dir(CONFIG.get("data_dir")), "thumbnails"))
 
         self.setWindowIcon(QIcon("video.ico"))
         self.setup_ui()
@@ -207,7 +223,7 @@ class ShrineDownloader(QWidget):
         bottom_layout.addWidget(self.queue_table)
         
         self.log_label = QLabel(); bottom_layout.addWidget(self.log_label)
-        self.log_panel = QListWidget(); bottom_layout.addWidget(self.log_panel)
+        self.log_panel = LogPanel(self.log_buffer_lines); bottom_layout.addWidget(self.log_panel) # Ring buffer, tampilan virtual
         self.reset_log_button = QPushButton(); self.reset_log_button.clicked.connect(self.reset_log); bottom_layout.addWidget(self.reset_log_button)
 
         # Gabungkan semua layout
@@ -231,6 +247,7 @@ class ShrineDownloader(QWidget):
         self.thumb_label.setText(self._t("thumbnail"))
         self.meta_preview.setText(self._t("meta_preview"))
         self.log_label.setText(self._t("log_title"))
+        self.log_panel.set_texts(self._t("log_filter_all_levels", default="All levels"), self._t("log_filter_all_jobs", default="All jobs"))
         self.reset_log_button.setText(self._t("reset_log"))
         self.shutdown_checkbox.setText(self._t("shutdown_checkbox"))
         self.lang_label.setText(self._t("lang_select"))
@@ -253,7 +270,7 @@ class ShrineDownloader(QWidget):
         self.download_worker.log.connect(self.log_writer)
         self.download_worker.finished.connect(self.on_download_finished)
         
-        self.meta_thread = QThread(); self.meta_worker = MetadataWorker(); self.meta_worker.moveToThread(self.meta_thread); self.meta_worker.finished.connect(self.update_ui_with_metadata); self.meta_worker.error.connect(lambda e: self.log_writer(self._t("log_meta_fail", error=e), "error"))
+        self.meta_thread = QThread(); self.meta_worker = MetadataWorker(self.thumb_cache); self.meta_worker.moveToThread(self.meta_thread); self.meta_worker.finished.connect(self.update_ui_with_metadata); self.meta_worker.error.connect(lambda e: self.log_writer(self._t("log_meta_fail", error=e), "error"))
         # DNS thread tetap sama
 
     def add_to_queue(self):
@@ -366,34 +383,22 @@ class ShrineDownloader(QWidget):
 
     def log_writer(self, text, status="success"):
         # --- LOG WRITER YANG SUDAH DIOPTIMALKAN ---
-        color = {"success": "green", "retry": "orange", "error": "red"}.get(status, "black")
-        
-        # 1. Update UI (Cepat)
+        # 1. Antrekan ke penulis log latar (tanpa write/flush di thread GUI); baris dari
+        #    unduhan yang sedang berjalan diberi nomor job untuk filter di panel log
+        job = self.current_download_index + 1 if self.is_downloading and self.current_download_index >= 0 else None
+        record = self.logger.write(text, status, job)
+
+        # 2. Panel log menggabungkan baris baru per frame dan membuang yang tertua
         item_text = self._t(text) if text in LANGUAGES.get(self.current_lang, {}) else text
-        item = QListWidgetItem(f"[{datetime.now().strftime('%H:%M:%S')}] {item_text}")
-        item.setForeground(QColor(color))
-        self.log_panel.addItem(item)
-        self.log_panel.scrollToBottom()
-
-        # 2. Tulis ke file log (Operasi Append, Sangat Ringan)
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "status": status,
-            "message": text.strip() # Hapus whitespace aneh dari log yt-dlp
-        }
-        self.log_file.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
-        self.log_file.flush() # Pastikan data langsung tertulis ke disk
+        self.log_panel.append(dict(record, message=item_text))
 
     def reset_log(self):
         self.log_panel.clear()
-        # Reset file log
-        self.log_file.close()
-        self.log_file = open(self.log_file_path, "w", encoding="utf-8") # Buka dengan mode 'w' untuk mengosongkan
+        self.logger.reset() # Mengosongkan file log setelah record yang masih antre
 
     def closeEvent(self, event):
         # --- PASTIKAN SEMUA DITUTUP DENGAN BENAR ---
-        if self.log_file:
-            self.log_file.close()
+        self.logger.close()
         if os.path.exists(self.log_file_path):
             try: os.remove(self.log_file_path)
             except OSError: pass
@@ -423,7 +428,7 @@ class ShrineDownloader(QWidget):
         def format_dur(sec): h = int(sec // 3600); m = int((sec % 3600) // 60); s = int(sec % 60); return f"{h}h {m}m {s}s" if h else f"{m}m {s}s"
         duration_str = format_dur(info["duration"]); res_str = f"{info['width']}x{info['height']}"
         self.meta_preview.setText(self._t("meta_preview") + f" {res_str} | {duration_str}")
-        if info["thumbnail_data"]: pixmap = QPixmap(); pixmap.loadFromData(info["thumbnail_data"]); self.thumb_frame.setPixmap(pixmap.scaled(320, 180, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        if info["thumbnail_image"] is not None: self.thumb_frame.setPixmap(QPixmap.fromImage(info["thumbnail_image"]))
         else: self.thumb_frame.setText(self._t("log_thumb_fail"))
         self.meta_thread.quit(); self.meta_thread.wait()
     def open_result_folder(self):
@@ -442,6 +447,7 @@ class ShrineDownloader(QWidget):
 
 
 if __name__ == "__main__":
+    shrine_http.configure(CONFIG)
     app = QApplication(sys.argv)
     splash = SplashScreen()
     splash.show()
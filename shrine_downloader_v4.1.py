@@ -1,4 +1,4 @@
-import sys, os, subprocess, requests, json, re, platform
+import sys, os, subprocess, json, re, platform
 from datetime import datetime
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QLabel, QLineEdit, QTextEdit, QPushButton,
@@ -10,6 +10,7 @@ from PyQt6.QtCore import Qt, QTimer, QThread, QObject, pyqtSignal
 import yt_dlp
 import dns.resolver
 from shrine_browser import ShrineBrowser # Pastikan shrine_browser.py juga ada
+import shrine_http
 
 # --- CONFIG & LANGUAGE FILES ---
 try:
@@ -75,7 +76,10 @@ class MetadataWorker(QObject):
                 info = ydl.extract_info(url, download=False)
                 
                 thumb_url = info.get("thumbnail")
-                img_data = requests.get(thumb_url).content if thumb_url else None
+                try:
+                    img_data = shrine_http.get_client().get_bytes(thumb_url) if thumb_url else None
+                except Exception:
+                    img_data = None # Thumbnail gagal cukup dikosongkan, metadata tetap dipakai
 
                 result = {
                     "title": info.get("title", "N/A"),
@@ -466,6 +470,7 @@ class ShrineDownloader(QWidget):
         event.accept()
 
 if __name__ == "__main__":
+    shrine_http.configure(CONFIG)
     app = QApplication(sys.argv)
     splash = SplashScreen()
     splash.show()
@@ -1,13 +1,18 @@
-import sys, os, subprocess, requests, json, re, platform, tempfile
-from datetime import datetime
+import sys, os, subprocess, json, re, platform, tempfile
 from PySide6.QtWidgets import (
     QApplication, QWidget, QLabel, QLineEdit, QTextEdit, QPushButton,
     QVBoxLayout, QHBoxLayout, QComboBox, QFileDialog, QProgressBar,
-    QListWidget, QListWidgetItem, QMessageBox, QInputDialog, QCheckBox
+    QMessageBox, QInputDialog, QCheckBox
 )
-from PySide6.QtGui import QPixmap, QColor, QIcon
+from PySide6.QtGui import QPixmap, QIcon
 from PySide6.QtCore import Qt, QTimer, QThread, QObject, Signal
 import dns.resolver
+from shrine_cache import app_data_dir
+from shrine_thumbs import ThumbnailCache, PREVIEW_THUMB_SIZE
+from shrine_log import LogWriter
+from shrine_logview import LogPanel
+import shrine_http
+from shrine_http import get_client
 # from shrine_browser import ShrineBrowser # DIHAPUS SESUAI PERMINTAAN
 
 # --- CONFIG & LANGUAGE FILES ---
@@ -85,6 +90,10 @@ class MetadataWorker(QObject):
     finished = Signal(dict)
     error = Signal(str)
 
+    def __init__(self, thumb_cache):
+        super().__init__()
+        self.thumb_cache = thumb_cache
+
     def run(self, url, yt_dlp_path):
         try:
             # Gunakan yt-dlp.exe untuk mendapatkan metadata sebagai JSON
@@ -99,15 +108,19 @@ class MetadataWorker(QObject):
             
             info = json.loads(process.stdout)
             
+            # Thumbnail 320x180 diambil dari cache bersama (disk/memori) atau diunduh sekali
             thumb_url = info.get("thumbnail")
-            img_data = requests.get(thumb_url).content if thumb_url else None
+            try:
+                thumb_image = self.thumb_cache.load(thumb_url, PREVIEW_THUMB_SIZE, get_client().get_bytes) if thumb_url else None
+            except Exception:
+                thumb_image = None # Thumbnail gagal cukup dikosongkan, metadata tetap dipakai
 
             result = {
                 "title": info.get("title", "N/A"),
                 "duration": info.get("duration", 0),
                 "height": info.get("height", "N/A"),
                 "width": info.get("width", "N/A"),
-                "thumbnail_data": img_data
+                "thumbnail_image": thumb_image
             }
             self.finished.emit(result)
         except subprocess.CalledProcessError as e:
@@ -154,13 +167,15 @@ class ShrineDownloader(QWidget):
         self.output_folder = os.path.abspath("downloads")
         os.makedirs(self.output_folder, exist_ok=True)
         
-        log_handle, self.log_file_path = tempfile.mkstemp(suffix=".json", prefix="shrine_log_")
-        os.close(log_handle) 
-        with open(self.log_file_path, "w", encoding="utf-8") as f:
-            json.dump([], f)
+        log_handle, self.log_file_path = tempfile.mkstemp(suffix=".log", prefix="shrine_log_")
+        os.close(log_handle)
+        # File log ditulis per batch oleh thread latar (JSON Lines), bukan ditulis ulang per baris
+        self.logger = LogWriter(self.log_file_path, max_bytes=CONFIG.get("log_max_mb", 5) * 1024 * 1024,
+                                backups=CONFIG.get("log_backups", 3), buffer_lines=CONFIG.get("log_buffer_lines", 2000))
 
         self.batch_queue = []
         self.current_batch_total = 0
+        self.thumb_cache = ThumbnailCache(os.path.join(app_data_dir(CONFIG.get("data_dir")), "thumbnails"))
 
         self.setWindowIcon(QIcon("video.ico"))
         self.setup_ui()
@@ -264,7 +279,7 @@ class ShrineDownloader(QWidget):
         self.log_label = QLabel()
         self.progress_bar = QProgressBar()
         self.progress_bar.setStyleSheet("QProgressBar::chunk { background-color: #44ff88; }")
-        self.log_panel = QListWidget()
+        self.log_panel = LogPanel(CONFIG.get("log_buffer_lines", 2000)) # Ring buffer, tampilan virtual
         self.reset_log_button = QPushButton()
         self.reset_log_button.clicked.connect(self.reset_log)
         right_layout.addWidget(self.log_label)
@@ -299,6 +314,7 @@ class ShrineDownloader(QWidget):
         self.thumb_label.setText(self._t("thumbnail"))
         self.meta_preview.setText(self._t("meta_preview"))
         self.log_label.setText(self._t("log_title"))
+        self.log_panel.set_texts(self._t("log_filter_all_levels", default="All levels"), self._t("log_filter_all_jobs", default="All jobs"))
         self.reset_log_button.setText(self._t("reset_log"))
         self.dns_button.setText(self._t("dns_change"))
         self.activate_dns_button.setText(self._t("dns_activate"))
@@ -325,7 +341,7 @@ class ShrineDownloader(QWidget):
         self.download_worker.finished.connect(self.on_download_finished)
         
         self.meta_thread = QThread()
-        self.meta_worker = MetadataWorker()
+        self.meta_worker = MetadataWorker(self.thumb_cache)
         self.meta_worker.moveToThread(self.meta_thread)
         self.meta_worker.finished.connect(self.update_ui_with_metadata)
         self.meta_worker.error.connect(lambda e: self.log_writer(self._t("log_meta_fail", error=e), "error"))
@@ -356,10 +372,8 @@ class ShrineDownloader(QWidget):
         self.meta_preview.setText(self._t("meta_preview") + f" {res_str} | {duration_str}")
         self.log_writer(self._t("log_preview_found", res=res_str, dur=duration_str), "retry")
 
-        if info["thumbnail_data"]:
-            pixmap = QPixmap()
-            pixmap.loadFromData(info["thumbnail_data"])
-            self.thumb_frame.setPixmap(pixmap.scaled(320, 180, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        if info["thumbnail_image"] is not None:
+            self.thumb_frame.setPixmap(QPixmap.fromImage(info["thumbnail_image"]))
             self.log_writer(self._t("log_thumb_success"), "success")
         else:
             self.thumb_frame.setText(self._t("log_thumb_fail"))
@@ -466,36 +480,12 @@ class ShrineDownloader(QWidget):
             pass
 
     def log_writer(self, text, status="success"):
-        log_file = self.log_file_path
-        color = {"success": "green", "retry": "orange", "error": "red"}.get(status, "black")
-        item = QListWidgetItem(self._t(text) if text in LANGUAGES.get(self.current_lang, {}) else text)
-        item.setForeground(QColor(color))
-        self.log_panel.addItem(item)
-        self.log_panel.scrollToBottom()
-
-        logs = []
-        if os.path.exists(log_file):
-            try:
-                with open(log_file, "r", encoding="utf-8") as f:
-                    logs = json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                logs = [] 
-
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "status": status,
-            "message": text
-        }
-        logs.append(log_entry)
-
-        with open(log_file, "w", encoding="utf-8") as f:
-            json.dump(logs, f, indent=4, ensure_ascii=False)
+        record = self.logger.write(text, status)
+        item_text = self._t(text) if text in LANGUAGES.get(self.current_lang, {}) else text
+        self.log_panel.append(dict(record, message=item_text))
 
     def reset_log(self):
-        log_file = self.log_file_path
-        if os.path.exists(log_file):
-            with open(log_file, "w", encoding="utf-8") as f:
-                json.dump([], f) 
+        self.logger.reset()
         self.log_panel.clear()
 
     def open_result_folder(self):
@@ -542,6 +532,7 @@ class ShrineDownloader(QWidget):
         self.dns_thread.wait()
             
     def closeEvent(self, event):
+        self.logger.close()
         if hasattr(self, 'log_file_path') and os.path.exists(self.log_file_path):
             try:
                 os.remove(self.log_file_path)
@@ -555,6 +546,7 @@ class ShrineDownloader(QWidget):
         event.accept()
 
 if __name__ == "__main__":
+    shrine_http.configure(CONFIG)
     app = QApplication(sys.argv)
     splash = SplashScreen()
     splash.show()
@@ -0,0 +1,261 @@
+import multiprocessing, multiprocessing.connection, threading, time
+from collections import deque
+
+# Field progress hook yt-dlp yang dikirim ke GUI (info_dict sengaja tidak ikut, terlalu besar)
+PROGRESS_KEYS = ("status", "downloaded_bytes", "total_bytes", "total_bytes_estimate", "speed", "eta",
+                 "fragment_index", "fragment_count", "filename", "tmpfilename")
+
+class _JobLogger:
+    """Logger yt-dlp yang mengumpulkan pesan satu job untuk dikirim per tick."""
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    def debug(self, msg):
+        if not msg.startswith("[debug] "):
+            self.lines.append(msg)
+
+    def info(self, msg):
+        self.lines.append(msg)
+
+    def warning(self, msg):
+        self.lines.append(f"WARNING: {msg}")
+
+    def error(self, msg):
+        self.lines.append(msg)
+
+class _EventSender:
+    """Ujung tulis pipe event milik satu worker. Hook progress bisa dipanggil dari beberapa
+    thread fragmen sekaligus, jadi setiap send() dilindungi lock."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.lock = threading.Lock()
+
+    def put(self, event):
+        with self.lock:
+            self.conn.send(event)
+
+def _run_job(yt_dlp, job_id, argv, events, interval, rate_limit, cancel):
+    lines = []
+    state = {"last": 0.0}
+    pace = {"bytes": 0, "time": time.monotonic()}
+
+    def flush(force=False):
+        now = time.monotonic()
+        if not force and now - state["last"] < interval:
+            return False
+        state["last"] = now
+        if lines:
+            events.put(("log", job_id, lines[:]))
+            lines.clear()
+        return True
+
+    def throttle(d):
+        # Batas kecepatan dibaca ulang di setiap potongan data, jadi perubahan dari GUI
+        # langsung berlaku. Hook berjalan di thread pengunduh (termasuk thread fragmen),
+        # sehingga menahannya di sini memperlambat unduhan ke batas yang diminta.
+        limit = rate_limit.value
+        downloaded = d.get("downloaded_bytes") or 0
+        now = time.monotonic()
+        if not limit or downloaded < pace["bytes"] or now - pace["time"] > 2.0:
+            pace["bytes"], pace["time"] = downloaded, now
+            return
+        due = pace["time"] + (downloaded - pace["bytes"]) / limit
+        if due > now:
+            time.sleep(min(due - now, 1.0))
+
+    def check_cancel():
+        # Pembatalan kooperatif: hook melempar exception dan yt-dlp berhenti dengan rapi,
+        # bukan proses dimatikan di tengah menulis ke pipe event
+        if cancel.value == job_id:
+            raise yt_dlp.utils.DownloadCancelled("cancelled")
+
+    def on_progress(d):
+        check_cancel()
+        if d.get("status") == "downloading":
+            throttle(d)
+        # Hook dipanggil per potongan data; hanya kirim sebanyak progress_hz per detik
+        if d.get("status") == "finished" or flush():
+            events.put(("progress", job_id, {k: d.get(k) for k in PROGRESS_KEYS}))
+            if d.get("status") == "finished":
+                flush(force=True)
+
+    def on_postprocess(d):
+        check_cancel()
+        info = d.get("info_dict") or {}
+        events.put(("postprocess", job_id, {"postprocessor": d.get("postprocessor"), "status": d.get("status"), "filepath": info.get("filepath")}))
+
+    result = {"returncode": 1, "error": ""}
+    try:
+        parsed = yt_dlp.parse_options(argv)
+        opts = dict(parsed.ydl_opts)
+        opts.update(logger=_JobLogger(lines), noprogress=True,
+                    progress_hooks=[on_progress], postprocessor_hooks=[on_postprocess])
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            result["returncode"] = ydl.download(parsed.urls)
+    except (Exception, SystemExit) as e:
+        # parse_options keluar dengan SystemExit untuk argumen yang tidak valid
+        result["error"] = str(e)
+    flush(force=True)
+    events.put(("finished", job_id, result))
+
+def _engine_main(tasks, conn, progress_hz, rate_limit, cancel):
+    """Loop proses worker: yt_dlp di-import sekali, lalu menjalankan job satu per satu."""
+    import yt_dlp
+    events = _EventSender(conn)
+    interval = 1.0 / max(0.1, float(progress_hz))
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        job_id, argv = task
+        # Flag dari pembatalan sebelumnya dihapus sebelum "started" dikirim: induk baru
+        # mengisi flag setelah menerima "started", jadi job yang dikirim ulang (dijeda lalu
+        # dilanjutkan, atau dicoba lagi) tidak langsung ikut batal
+        cancel.value = 0
+        events.put(("started", job_id, multiprocessing.current_process().pid))
+        _run_job(yt_dlp, job_id, argv, events, interval, rate_limit, cancel)
+
+class _Worker:
+    def __init__(self, process, reader, cancel):
+        self.process = process
+        self.reader = reader # ujung baca pipe event milik worker ini saja
+        self.cancel = cancel # ID job yang diminta berhenti (0 = tidak ada)
+
+class EnginePool:
+    """Sekumpulan proses worker berumur panjang yang menjalankan yt_dlp.YoutubeDL.
+
+    Menghindari biaya start-up interpreter dan import extractor untuk setiap unduhan.
+    Job dikirim sebagai argumen CLI yt-dlp yang sama dengan mode subprocess, sehingga
+    kedua backend menghasilkan opsi yang identik. Event (started, progress, postprocess,
+    log, finished) dibaca lewat next_event(); proses yang mati di tengah job diganti dan
+    job-nya dilaporkan gagal. rate_limit adalah batas byte/detik per unduhan yang dibagi
+    ke semua proses dan bisa diubah kapan saja lewat set_rate_limit().
+
+    Setiap worker menulis event ke pipe miliknya sendiri. cancel() bersifat kooperatif:
+    ID job ditulis ke flag bersama milik worker yang mengerjakannya, lalu hook progress
+    yt-dlp di worker itu melempar DownloadCancelled. Hanya jika job tidak berhenti dalam
+    cancel_grace detik (mis. masih tertahan di tahap ekstraksi) proses dihentikan paksa;
+    pipe-nya ikut dibuang, jadi worker lain dan antrean tugas tidak ikut rusak.
+    """
+
+    def __init__(self, workers=2, progress_hz=10, cancel_grace=10.0):
+        self.ctx = multiprocessing.get_context("spawn")
+        self.workers = max(1, int(workers))
+        self.progress_hz = progress_hz
+        self.cancel_grace = cancel_grace
+        self.tasks = self.ctx.Queue()
+        self.rate_limit = self.ctx.Value("d", 0.0) # 0 = tanpa batas
+        self.processes = [] # _Worker
+        self.pending = deque() # event yang sudah dibaca dari pipe tetapi belum dikembalikan
+        self.running = {} # job_id -> pid proses yang mengerjakannya
+        self.lost = []    # event finished sintetis untuk job di proses yang mati
+        self.cancelled = set() # job yang diminta berhenti
+        self.cancel_deadlines = {} # job_id -> batas waktu sebelum proses dihentikan paksa
+
+    def start(self):
+        while len(self.processes) < self.workers:
+            reader, writer = self.ctx.Pipe(duplex=False)
+            cancel = self.ctx.Value("q", 0, lock=False)
+            process = self.ctx.Process(target=_engine_main, args=(self.tasks, writer, self.progress_hz, self.rate_limit, cancel), daemon=True)
+            process.start()
+            writer.close() # ujung tulis hanya dipegang worker; EOF berarti worker mati
+            self.processes.append(_Worker(process, reader, cancel))
+
+    def set_rate_limit(self, bytes_per_second):
+        self.rate_limit.value = float(bytes_per_second or 0)
+
+    def submit(self, job_id, argv):
+        self.tasks.put((job_id, list(argv)))
+
+    def cancel(self, job_id):
+        # Boleh dipanggil dari thread mana pun; flag worker diisi oleh thread pembaca
+        self.cancelled.add(job_id)
+
+    def next_event(self, timeout=0.5):
+        """Event berikutnya sebagai (jenis, job_id, data), atau None jika tidak ada."""
+        if self.cancelled:
+            self.stop_cancelled()
+        if self.lost:
+            return self.lost.pop(0)
+        if not self.pending:
+            self.read_events(timeout)
+        if not self.pending:
+            self.check_workers()
+            return self.lost.pop(0) if self.lost else None
+        event = self.pending.popleft()
+        kind, job_id, data = event
+        if kind == "started":
+            self.running[job_id] = data
+        elif kind == "finished":
+            self.running.pop(job_id, None)
+            self.cancelled.discard(job_id)
+            self.cancel_deadlines.pop(job_id, None)
+        return event
+
+    def read_events(self, timeout):
+        readers = {worker.reader: worker for worker in self.processes}
+        if not readers:
+            time.sleep(timeout)
+            return
+        for reader in multiprocessing.connection.wait(list(readers), timeout):
+            try:
+                while reader.poll():
+                    self.pending.append(reader.recv())
+            except (EOFError, OSError):
+                readers[reader].process.join(1.0)
+                self.check_workers() # worker mati; job-nya dilaporkan lewat self.lost
+
+    def worker_of(self, job_id):
+        pid = self.running.get(job_id)
+        return next((worker for worker in self.processes if worker.process.pid == pid), None)
+
+    def stop_cancelled(self):
+        now = time.monotonic()
+        for job_id in list(self.cancelled):
+            worker = self.worker_of(job_id)
+            if worker is None:
+                continue # belum diambil worker; flag diisi saat event "started" tiba
+            if job_id not in self.cancel_deadlines:
+                worker.cancel.value = job_id
+                self.cancel_deadlines[job_id] = now + self.cancel_grace
+            elif now >= self.cancel_deadlines[job_id]:
+                # Upaya terakhir: pipe worker ini dibuang bersama prosesnya, worker pengganti
+                # mendapat pipe baru
+                del self.cancel_deadlines[job_id]
+                self.cancelled.discard(job_id)
+                worker.process.terminate()
+                worker.process.join(1.0)
+                self.check_workers()
+
+    def check_workers(self):
+        dead = [worker for worker in self.processes if not worker.process.is_alive()]
+        if not dead:
+            return
+        dead_pids = {worker.process.pid for worker in dead}
+        for worker in dead:
+            worker.reader.close()
+        self.processes = [worker for worker in self.processes if worker not in dead]
+        for job_id, pid in list(self.running.items()):
+            if pid in dead_pids:
+                del self.running[job_id]
+                self.cancelled.discard(job_id)
+                self.cancel_deadlines.pop(job_id, None)
+                self.lost.append(("finished", job_id, {"returncode": 1, "error": "engine worker exited"}))
+        self.start()
+
+    def close(self, timeout=2.0):
+        for worker in self.processes:
+            worker.cancel.value = self.running_job(worker) # job berjalan ikut berhenti
+            self.tasks.put(None)
+        deadline = time.monotonic() + timeout
+        for worker in self.processes:
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.reader.close()
+        self.processes = []
+
+    def running_job(self, worker):
+        return next((job_id for job_id, pid in self.running.items() if pid == worker.process.pid), 0)
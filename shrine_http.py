@@ -0,0 +1,82 @@
+import json, threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+UPDATE_URL = "https://raw.githubusercontent.com/danx123/shrine-video-downloader/main/version.json"
+
+class HttpClient:
+    """Klien HTTP bersama untuk semua fetch kecil (thumbnail, cek update).
+
+    Satu requests.Session dengan pool koneksi keep-alive per host, sehingga thumbnail
+    dari CDN yang sama tidak membuka TCP+TLS baru setiap kali. Setiap request punya
+    timeout dan retry dengan backoff; jumlah request bersamaan bisa dibatasi.
+    Pool koneksi urllib3 aman dipakai dari banyak thread worker sekaligus.
+    """
+
+    def __init__(self, timeout=15, connect_timeout=5, retries=3, backoff=0.5, pool_size=16, max_in_flight=0):
+        self.timeout = (connect_timeout, timeout)
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset({"GET", "HEAD"}), respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.in_flight = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        if self.in_flight is None:
+            response = self.session.get(url, **kwargs)
+        else:
+            with self.in_flight:
+                response = self.session.get(url, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def get_bytes(self, url):
+        return self.get(url).content
+
+    def get_json(self, url):
+        return self.get(url).json()
+
+_client = None
+_client_lock = threading.Lock()
+
+def configure(config):
+    """Membuat klien bersama dari video_config.json; dipanggil sekali saat aplikasi mulai."""
+    global _client
+    with _client_lock:
+        _client = HttpClient(
+            timeout=float(config.get("http_timeout", 15)),
+            retries=int(config.get("http_retries", 3)),
+            pool_size=int(config.get("http_pool_size", 16)),
+            max_in_flight=int(config.get("http_max_in_flight", 8)))
+    return _client
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+def parse_version(tag):
+    """'v11.2.0' -> (11, 2, 0); bagian yang bukan angka diabaikan."""
+    parts = []
+    for part in str(tag).lstrip("vV").split("."):
+        digits = "".join(ch for ch in part if ch.isdigit())
+        parts.append(int(digits) if digits else 0)
+    return tuple(parts)
+
+def check_for_update(local_path="version.json", url=UPDATE_URL):
+    """Membandingkan version.json lokal dengan yang terbaru. Mengembalikan info rilis jika lebih baru."""
+    try:
+        with open(local_path, "r", encoding="utf-8") as f:
+            current = json.load(f).get("tag_name", "0")
+    except (OSError, json.JSONDecodeError):
+        current = "0"
+    latest = get_client().get_json(url)
+    if parse_version(latest.get("tag_name", "0")) > parse_version(current):
+        return latest
+    return None
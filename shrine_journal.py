@@ -0,0 +1,100 @@
+import os, json, queue, threading
+
+# Field job yang disimpan; progress, pixmap, dan data sementara lain tidak ikut
+JOURNAL_FIELDS = ("url", "format", "resolution", "status", "title", "details", "host", "thumb_url", "thumb_key", "partial_key", "video_key", "priority", "rank")
+
+class QueueJournal:
+    """Jurnal antrean append-only (JSON Lines) agar antrean selamat dari crash.
+
+    Setiap perubahan job ditulis sebagai record kecil ("add", "update", "clear"), bukan
+    menulis ulang seluruh antrean. Thread GUI hanya memasukkan record ke antrean memori;
+    thread penulis menggabungkan record yang menumpuk, menulisnya sekaligus, lalu fsync
+    sekali per batch. Saat start-up jurnal diputar ulang (load) dan dipadatkan (rewrite)
+    menjadi satu record "add" per job.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.queue = queue.Queue()
+        self.thread = None
+
+    @staticmethod
+    def add_record(job):
+        return {"op": "add", "id": job["id"], "job": {k: job.get(k) for k in JOURNAL_FIELDS}}
+
+    def load(self):
+        """Memutar ulang jurnal menjadi list job (urutan antrean). Baris rusak di ujung file
+        (crash di tengah penulisan) dilewati."""
+        jobs = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    op = record.get("op")
+                    if op == "add":
+                        jobs[record["id"]] = record["job"]
+                    elif op == "update" and record.get("id") in jobs:
+                        jobs[record["id"]].update(record["fields"])
+                    elif op == "clear":
+                        jobs.clear()
+        except OSError:
+            pass
+        return list(jobs.values())
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._writer, name="QueueJournal", daemon=True)
+            self.thread.start()
+
+    def append(self, record):
+        self.queue.put(("append", record))
+
+    def update(self, job_id, **fields):
+        self.append({"op": "update", "id": job_id, "fields": fields})
+
+    def rewrite(self, records):
+        """Mengganti isi jurnal dengan snapshot (pemadatan), berurutan dengan record lain."""
+        self.queue.put(("rewrite", list(records)))
+
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def _writer(self):
+        f = open(self.path, "a", encoding="utf-8")
+        try:
+            while True:
+                batch = [self.queue.get()]
+                try:
+                    while len(batch) < 1000:
+                        batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    pass
+                stop = False
+                for item in batch:
+                    if item is None:
+                        stop = True
+                        break
+                    kind, payload = item
+                    if kind == "append":
+                        f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+                    else:
+                        f.close()
+                        tmp_path = self.path + ".tmp"
+                        with open(tmp_path, "w", encoding="utf-8") as snapshot:
+                            snapshot.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in payload)
+                            snapshot.flush()
+                            os.fsync(snapshot.fileno())
+                        os.replace(tmp_path, self.path)
+                        f = open(self.path, "a", encoding="utf-8")
+                f.flush()
+                os.fsync(f.fileno())
+                if stop:
+                    break
+        finally:
+            f.close()
@@ -0,0 +1,104 @@
+import os, json, queue, threading, time
+from collections import deque
+from datetime import datetime
+
+def json_line(record):
+    """Format JSON Lines: {"timestamp", "status", "message"} (+ "job" jika ada)."""
+    return json.dumps(record, ensure_ascii=False)
+
+def text_line(record):
+    return record["message"]
+
+class LogWriter:
+    """Penulis log asinkron dengan buffer memori terbatas.
+
+    write() hanya memasukkan record ke antrean dan ring buffer, jadi aman dipanggil dari
+    thread GUI untuk setiap baris output yt-dlp. Thread penulis mengumpulkan record dan
+    menulisnya per batch, saat flush_interval detik berlalu atau flush_size record
+    terkumpul, lalu memutar file (log, log.1, ... log.N) bila melewati max_bytes.
+    Tampilan cukup membaca recent(), yang hanya menyimpan buffer_lines baris terakhir.
+    """
+
+    def __init__(self, path, formatter=json_line, max_bytes=5 * 1024 * 1024, backups=3,
+                 flush_interval=0.5, flush_size=256, buffer_lines=2000):
+        self.path = path
+        self.formatter = formatter
+        self.max_bytes = int(max_bytes)
+        self.backups = max(0, int(backups))
+        self.flush_interval = flush_interval
+        self.flush_size = max(1, int(flush_size))
+        self.buffer = deque(maxlen=max(1, int(buffer_lines)))
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._writer, name="LogWriter", daemon=True)
+        self.thread.start()
+
+    def write(self, message, status="success", job=None):
+        record = {"timestamp": datetime.now().isoformat(), "status": status, "message": message.strip()}
+        if job is not None:
+            record["job"] = job
+        self.buffer.append(record)
+        self.queue.put(record)
+        return record
+
+    def recent(self):
+        return list(self.buffer)
+
+    def reset(self):
+        """Mengosongkan buffer tampilan dan file log (berurutan dengan record yang masih antre)."""
+        self.buffer.clear()
+        self.queue.put("truncate")
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def _open(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        return open(self.path, "a", encoding="utf-8")
+
+    def _rotate(self, f):
+        f.close()
+        if self.backups:
+            for index in range(self.backups - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        return self._open()
+
+    def _writer(self):
+        f = self._open()
+        pending = []
+        deadline = time.monotonic() + self.flush_interval
+        running = True
+        try:
+            while running:
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    item = "flush"
+                if item is None:
+                    running = False
+                elif item == "truncate":
+                    pending.clear()
+                    f.close()
+                    f = open(self.path, "w", encoding="utf-8")
+                    continue
+                elif item != "flush":
+                    pending.append(item)
+                    if len(pending) < self.flush_size and time.monotonic() < deadline:
+                        continue
+                if pending:
+                    f.write("".join(self.formatter(record) + "\n" for record in pending))
+                    f.flush()
+                    pending.clear()
+                    if self.max_bytes and f.tell() >= self.max_bytes:
+                        f = self._rotate(f)
+                deadline = time.monotonic() + self.flush_interval
+        finally:
+            f.close()
@@ -0,0 +1,173 @@
+from PySide6.QtWidgets import QWidget, QListView, QComboBox, QHBoxLayout, QVBoxLayout, QAbstractItemView
+from PySide6.QtGui import QColor
+from PySide6.QtCore import Qt, QTimer, QAbstractListModel, QModelIndex
+
+LEVEL_COLORS = {"success": QColor("green"), "retry": QColor("orange"), "error": QColor("red")}
+
+class LogModel(QAbstractListModel):
+    """Model log berkapasitas tetap (ring buffer) untuk QListView.
+
+    Record (dict dari LogWriter.write: timestamp, status, message, job opsional) tidak
+    langsung masuk ke model, tetapi dikumpulkan dan dipasang sekali per frame, sehingga
+    ratusan baris yt-dlp per detik hanya menjadi satu insert (dan satu remove untuk
+    record tertua yang terbuang). Filter level/job hanya memengaruhi daftar record yang
+    terlihat; memori tetap dibatasi capacity berapa pun lamanya sesi.
+    """
+
+    def __init__(self, capacity=5000, parent=None):
+        super().__init__(parent)
+        self.capacity = max(1, int(capacity))
+        self.records = [] # semua record yang disimpan, tertua di depan
+        self.visible = [] # record yang lolos filter, urutan sama dengan records
+        self.pending = []
+        self.levels = None # set status yang ditampilkan, None = semua
+        self.job = None    # ID job yang ditampilkan, None = semua
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(16) # satu frame
+        self.flush_timer.timeout.connect(self.flush)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.visible)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self.visible[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"[{record['timestamp'][11:19]}] {record['message']}"
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return LEVEL_COLORS.get(record["status"])
+        return None
+
+    def accepts(self, record):
+        return (self.levels is None or record["status"] in self.levels) and (self.job is None or record.get("job") == self.job)
+
+    def append(self, record):
+        self.pending.append(record)
+        if len(self.pending) > self.capacity:
+            del self.pending[:len(self.pending) - self.capacity]
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def flush(self):
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        overflow = len(self.records) + len(batch) - self.capacity
+        if overflow > 0:
+            # Record tertua yang terbuang; yang terlihat pasti berada di depan self.visible
+            evicted = self.records[:overflow]
+            del self.records[:overflow]
+            count = 0
+            for record in evicted:
+                if count < len(self.visible) and self.visible[count] is record:
+                    count += 1
+            if count:
+                self.beginRemoveRows(QModelIndex(), 0, count - 1)
+                del self.visible[:count]
+                self.endRemoveRows()
+        self.records.extend(batch)
+        accepted = [record for record in batch if self.accepts(record)]
+        if accepted:
+            first = len(self.visible)
+            self.beginInsertRows(QModelIndex(), first, first + len(accepted) - 1)
+            self.visible.extend(accepted)
+            self.endInsertRows()
+
+    def set_filter(self, levels=None, job=None):
+        self.flush()
+        self.levels = set(levels) if levels else None
+        self.job = job
+        self.beginResetModel()
+        self.visible = [record for record in self.records if self.accepts(record)]
+        self.endResetModel()
+
+    def clear(self):
+        self.pending.clear()
+        self.beginResetModel()
+        self.records.clear()
+        self.visible.clear()
+        self.endResetModel()
+
+class LogPanel(QWidget):
+    """Panel log: QListView virtual (tinggi item seragam) di atas LogModel, dengan filter
+    level dan job. Auto-scroll hanya jika pengguna sedang berada di baris paling bawah."""
+
+    def __init__(self, capacity=5000, parent=None):
+        super().__init__(parent)
+        self.model = LogModel(capacity, self)
+        self.view = QListView()
+        self.view.setModel(self.model)
+        self.view.setUniformItemSizes(True)
+        self.view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.level_combo = QComboBox()
+        self.job_combo = QComboBox()
+        self.job_combo.setVisible(False) # Baru muncul jika ada record yang membawa ID job
+        self.known_jobs = set()
+        self.stick_to_bottom = True
+        self.set_texts()
+
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(self.level_combo)
+        filter_layout.addWidget(self.job_combo)
+        filter_layout.addStretch(1)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(filter_layout)
+        layout.addWidget(self.view)
+
+        self.level_combo.currentIndexChanged.connect(self.apply_filter)
+        self.job_combo.currentIndexChanged.connect(self.apply_filter)
+        self.view.verticalScrollBar().valueChanged.connect(self.track_scroll)
+        self.model.rowsInserted.connect(self.follow_tail)
+
+    def set_texts(self, all_levels="All levels", all_jobs="All jobs", job_format="Job {job}"):
+        """Teks filter (untuk terjemahan). Pilihan yang sedang aktif dipertahankan."""
+        self.job_format = job_format
+        level = self.level_combo.currentIndex()
+        self.level_combo.blockSignals(True)
+        self.level_combo.clear()
+        self.level_combo.addItem(all_levels, None)
+        for status in ("success", "retry", "error"):
+            self.level_combo.addItem(status, status)
+        self.level_combo.setCurrentIndex(max(0, level))
+        self.level_combo.blockSignals(False)
+        if self.job_combo.count():
+            self.job_combo.setItemText(0, all_jobs)
+            for index in range(1, self.job_combo.count()):
+                self.job_combo.setItemText(index, job_format.format(job=self.job_combo.itemData(index)))
+        else:
+            self.job_combo.addItem(all_jobs, None)
+
+    def append(self, record):
+        job = record.get("job")
+        if job is not None and job not in self.known_jobs:
+            self.known_jobs.add(job)
+            self.job_combo.addItem(self.job_format.format(job=job), job)
+            self.job_combo.setVisible(True)
+        self.model.append(record)
+
+    def clear(self):
+        self.model.clear()
+        self.known_jobs.clear()
+        self.job_combo.blockSignals(True)
+        while self.job_combo.count() > 1:
+            self.job_combo.removeItem(1)
+        self.job_combo.setCurrentIndex(0)
+        self.job_combo.blockSignals(False)
+        self.job_combo.setVisible(False)
+        self.apply_filter()
+
+    def apply_filter(self):
+        level = self.level_combo.currentData()
+        self.model.set_filter([level] if level else None, self.job_combo.currentData())
+        self.view.scrollToBottom()
+
+    def track_scroll(self, value):
+        self.stick_to_bottom = value >= self.view.verticalScrollBar().maximum()
+
+    def follow_tail(self):
+        if self.stick_to_bottom:
+            self.view.scrollToBottom()
@@ -0,0 +1,97 @@
+import os, json, time
+from shrine_cache import normalize_url
+
+class PartialStore:
+    """Mencatat file .part milik unduhan yang belum selesai agar bisa dilanjutkan.
+
+    Disimpan sebagai JSON di folder data aplikasi dengan kunci URL ternormalisasi +
+    format + resolusi, sehingga job yang sama setelah aplikasi dibuka ulang menemukan
+    kembali file parsialnya. Satu job bisa punya beberapa file parsial (video dan audio
+    terpisah). File parsial yang lebih tua dari max_age_days dihapus saat start-up.
+    """
+
+    def __init__(self, path, max_age_days=7):
+        self.path = path
+        self.max_age = float(max_age_days) * 24 * 3600
+        self.entries = {} # key -> {"files": {tmpfilename: {"bytes", "total", "exact"}}, "updated": waktu}
+        self.dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @staticmethod
+    def key_for(job):
+        return f"{normalize_url(job['url'])}|{job['format']}|{job.get('resolution', '')}"
+
+    def update(self, key, tmpfilename, downloaded, total, exact=True):
+        """exact=False: total hanya perkiraan yt-dlp (total_bytes_estimate)."""
+        entry = self.entries.setdefault(key, {"files": {}, "updated": 0})
+        entry["files"][tmpfilename] = {"bytes": int(downloaded), "total": int(total), "exact": bool(exact)}
+        entry["updated"] = time.time()
+        self.dirty = True
+
+    def validate(self, key):
+        """Memeriksa file parsial job; file hilang dilupakan dan file yang lebih besar dari
+        ukuran total pastinya (rusak) dihapus. Total perkiraan tidak dipakai untuk menghapus:
+        perkiraan HLS/DASH sering lebih kecil dari ukuran sebenarnya. Mengembalikan
+        (byte_tersimpan, total) yang valid."""
+        entry = self.entries.get(key)
+        if not entry:
+            return 0, 0
+        done = total = 0
+        for tmpfilename, state in list(entry["files"].items()):
+            try:
+                size = os.path.getsize(tmpfilename)
+            except OSError:
+                del entry["files"][tmpfilename]
+                self.dirty = True
+                continue
+            if state.get("exact") and state["total"] and size > state["total"]:
+                self._remove_files(tmpfilename)
+                del entry["files"][tmpfilename]
+                self.dirty = True
+                continue
+            done += size
+            total += state["total"]
+        if not entry["files"]:
+            del self.entries[key]
+        return done, total
+
+    def finish(self, key):
+        """Unduhan selesai: file parsial sudah diganti nama oleh yt-dlp, catatannya dibuang."""
+        if self.entries.pop(key, None) is not None:
+            self.dirty = True
+
+    def prune(self):
+        """Menghapus file parsial yang sudah terlalu lama tidak dilanjutkan."""
+        cutoff = time.time() - self.max_age
+        for key, entry in list(self.entries.items()):
+            if entry["updated"] < cutoff:
+                for tmpfilename in entry["files"]:
+                    self._remove_files(tmpfilename)
+                del self.entries[key]
+                self.dirty = True
+        self.save()
+
+    @staticmethod
+    def _remove_files(tmpfilename):
+        # .ytdl menyimpan status fragmen milik file .part yang sama
+        for path in (tmpfilename, tmpfilename + ".ytdl"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError:
+            pass
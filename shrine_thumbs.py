@@ -0,0 +1,105 @@
+import os, hashlib, threading
+from collections import OrderedDict
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage
+
+QUEUE_THUMB_SIZE = (160, 90)    # Thumbnail di tabel antrean
+PREVIEW_THUMB_SIZE = (320, 180) # Thumbnail di panel preview
+THUMB_SIZES = (QUEUE_THUMB_SIZE, PREVIEW_THUMB_SIZE)
+
+class ThumbnailCache:
+    """Cache thumbnail yang sudah diskalakan, di disk dan di LRU memori.
+
+    Gambar asli hanya di-decode sekali saat disimpan, lalu semua ukuran di THUMB_SIZES
+    ditulis ke disk sebagai JPEG kecil. Memakai QImage (bukan QPixmap) sehingga aman
+    dipanggil dari thread worker; konversi ke QPixmap dilakukan oleh pemanggil di GUI.
+    """
+
+    def __init__(self, folder, sizes=THUMB_SIZES, memory_items=400, max_disk_mb=200):
+        self.folder = folder
+        self.sizes = tuple(sizes)
+        self.memory_items = max(1, int(memory_items))
+        self.max_disk_bytes = int(max_disk_mb) * 1024 * 1024
+        self.memory = OrderedDict() # (key, size) -> QImage
+        self.lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        self.prune_disk()
+
+    @staticmethod
+    def key_for(thumb_url):
+        return hashlib.sha1(thumb_url.encode("utf-8")).hexdigest()
+
+    def path_for(self, key, size):
+        return os.path.join(self.folder, f"{key}_{size[0]}x{size[1]}.jpg")
+
+    def peek(self, key, size):
+        """Hanya mengecek LRU memori; cukup murah untuk dipanggil di thread GUI."""
+        with self.lock:
+            image = self.memory.get((key, size))
+            if image is not None:
+                self.memory.move_to_end((key, size))
+            return image
+
+    def get(self, key, size):
+        """Mengambil thumbnail dari memori, lalu dari disk. None jika belum pernah disimpan."""
+        image = self.peek(key, size)
+        if image is not None:
+            return image
+        path = self.path_for(key, size)
+        if not os.path.exists(path):
+            return None
+        image = QImage(path)
+        if image.isNull():
+            return None
+        self._remember(key, size, image)
+        return image
+
+    def store(self, key, data):
+        """Men-decode data gambar sekali dan menyimpan semua ukuran. Mengembalikan {size: QImage}."""
+        source = QImage.fromData(data)
+        if source.isNull():
+            return {}
+        images = {}
+        for size in self.sizes:
+            image = source.scaled(size[0], size[1], Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+            path = self.path_for(key, size)
+            tmp_path = path + ".tmp"
+            if image.save(tmp_path, "JPG", 85):
+                os.replace(tmp_path, path)
+            self._remember(key, size, image)
+            images[size] = image
+        return images
+
+    def load(self, thumb_url, size, fetch):
+        """Thumbnail siap pakai untuk URL; fetch(url) -> bytes hanya dipanggil saat cache meleset."""
+        key = self.key_for(thumb_url)
+        image = self.get(key, size)
+        if image is None:
+            image = self.store(key, fetch(thumb_url)).get(size)
+        return image
+
+    def _remember(self, key, size, image):
+        with self.lock:
+            self.memory[(key, size)] = image
+            self.memory.move_to_end((key, size))
+            while len(self.memory) > self.memory_items:
+                self.memory.popitem(last=False)
+
+    def prune_disk(self):
+        """Menghapus file thumbnail tertua jika folder cache melewati batas ukuran."""
+        try:
+            entries = [entry for entry in os.scandir(self.folder) if entry.is_file()]
+        except OSError:
+            return
+        total = sum(entry.stat().st_size for entry in entries)
+        if total <= self.max_disk_bytes:
+            return
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except OSError:
+                continue
+            if total <= self.max_disk_bytes:
+                break
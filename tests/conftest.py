@@ -0,0 +1,89 @@
+import os, sys, json, stat, threading, time
+from concurrent.futures import Future
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from shrine_core import EventLoop, DownloadManager
+
+# Pengganti yt-dlp: --dump-json mencetak metadata palsu, unduhan mencetak baris progress
+# seperti --progress-template. URL berisi "slow" berjalan sekitar dua detik, "fail" gagal.
+STUB_YT_DLP = r'''#!%(python)s
+import sys, json, time
+args = sys.argv[1:]
+urls = [a for a in args if a.startswith("http")]
+if "--dump-json" in args:
+    for url in urls:
+        print(json.dumps({"title": "Video " + url.rsplit("/", 1)[-1], "original_url": url,
+                          "extractor_key": "Stub", "id": url.rsplit("/", 1)[-1]}))
+    sys.exit(0)
+url = urls[-1]
+steps = 40 if "slow" in url else 2
+for i in range(1, steps + 1):
+    print("[shrine-progress] " + json.dumps({"status": "downloading", "downloaded_bytes": i * 100,
+                                             "total_bytes": steps * 100, "speed": 1000.0, "eta": 1}), flush=True)
+    time.sleep(0.05)
+if "fail" in url:
+    sys.exit(1)
+if "--download-archive" in args:
+    with open(args[args.index("--download-archive") + 1], "a") as f:
+        f.write("stub " + url.rsplit("/", 1)[-1] + "\n")
+'''
+
+@pytest.fixture
+def stub_yt_dlp(tmp_path):
+    path = tmp_path / "yt-dlp"
+    path.write_text(STUB_YT_DLP % {"python": sys.executable})
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+@pytest.fixture
+def config(tmp_path, stub_yt_dlp):
+    with open(os.path.join(ROOT, "video_config.json"), encoding="utf-8") as f:
+        config = json.load(f)
+    config.update(data_dir=str(tmp_path / "data"), yt_dlp_path=stub_yt_dlp,
+                  download_engine="subprocess", max_parallel_downloads=1)
+    return config
+
+class LoopThread:
+    """EventLoop yang berjalan di thread sendiri; call() menjalankan fn di thread loop."""
+
+    def __init__(self):
+        self.loop = EventLoop()
+        self.thread = threading.Thread(target=self.loop.run, daemon=True)
+        self.thread.start()
+
+    def call(self, fn, *args):
+        future = Future()
+        def run():
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+        self.loop.post(run)
+        return future.result(10)
+
+    def wait_until(self, predicate, timeout=15):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.call(predicate):
+                return True
+            time.sleep(0.05)
+        return False
+
+    def stop(self):
+        self.loop.post(self.loop.stop)
+        self.thread.join(5)
+
+@pytest.fixture
+def runner():
+    runner = LoopThread()
+    yield runner
+    runner.stop()
+
+@pytest.fixture
+def manager(runner, config, tmp_path):
+    manager = runner.call(DownloadManager, config, runner.loop, str(tmp_path / "out"))
+    yield manager
+    runner.call(manager.close)
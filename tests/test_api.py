@@ -0,0 +1,97 @@
+import json
+import urllib.request, urllib.error
+import pytest
+from shrine_api import ControlServer
+from shrine_core import new_job
+
+@pytest.fixture
+def control(runner, manager):
+    def submit(urls, fmt, resolution, start):
+        fresh, duplicates = manager.screen_urls(urls, fmt)
+        job_ids = {url: manager.jobs.add(new_job(url, fmt, resolution)) for url in fresh}
+        return [job_ids.get(url, duplicates.get(url)) for url in urls]
+    server = ControlServer(runner.loop, manager, submit, port=0)
+    server.start()
+    yield server
+    server.close()
+
+def request(control, method, path, body=None, token=None):
+    """(status HTTP, body JSON) untuk satu permintaan ke API kontrol."""
+    data = body if isinstance(body, bytes) else (json.dumps(body).encode() if body is not None else None)
+    req = urllib.request.Request(control.address + path, data=data, method=method)
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+    try:
+        with urllib.request.urlopen(req, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def add(control, *urls):
+    status, data = request(control, "POST", "/jobs", {"urls": list(urls), "start": False})
+    assert status == 201
+    return [job["id"] if job else None for job in data["jobs"]]
+
+def test_add_and_list_jobs(control):
+    first, = add(control, "https://a.example/v1")
+    assert add(control, "https://a.example/v1", "https://a.example/v2")[0] == first
+    status, data = request(control, "GET", "/jobs")
+    assert status == 200 and [job["url"] for job in data["jobs"]] == ["https://a.example/v1", "https://a.example/v2"]
+    status, data = request(control, "GET", f"/jobs/{first}")
+    assert status == 200 and data["id"] == first
+
+@pytest.mark.parametrize("method, path", [
+    ("GET", "/jobs/999"),
+    ("GET", "/nothing"),
+    ("POST", "/jobs/1/unknown"),
+])
+def test_not_found(control, method, path):
+    status, data = request(control, method, path, {} if method != "GET" else None)
+    assert status == 404 and "error" in data
+
+@pytest.mark.parametrize("body", [
+    {},
+    {"urls": "https://a.example/v1"},
+    {"urls": ["https://a.example/v1"], "format": "gif"},
+    {"urls": ["https://a.example/v1"], "resolution": "9000p"},
+    b"not json",
+    b"[1, 2]",
+])
+def test_bad_job_request(control, body):
+    status, data = request(control, "POST", "/jobs", body)
+    assert status == 400 and data["error"]
+
+@pytest.mark.parametrize("body", [
+    {"priority": 3},
+    {"priority": -1},
+    {"priority": "1"},
+    {"priority": True},
+    {"priority": 1.5},
+    {},
+])
+def test_bad_priority(control, body):
+    job_id, = add(control, "https://a.example/v1")
+    status, data = request(control, "POST", f"/jobs/{job_id}/priority", body)
+    assert status == 400 and "priority" in data["error"]
+
+def test_priority_and_move(control, manager):
+    first, second = add(control, "https://a.example/v1", "https://a.example/v2")
+    assert request(control, "POST", f"/jobs/{first}/priority", {"priority": 2}) == (200, {"id": first, "ok": True})
+    assert request(control, "POST", f"/jobs/{second}/move", {"position": "0"})[0] == 400
+    assert request(control, "POST", f"/jobs/{second}/move", {"position": True})[0] == 400
+    assert request(control, "POST", f"/jobs/{second}/move", {"position": 0}) == (200, {"id": second, "ok": True})
+    assert request(control, "POST", "/jobs/999/move", {"position": 0}) == (200, {"id": 999, "ok": False})
+
+def test_token_required(control):
+    control.token = "rahasia"
+    assert request(control, "GET", "/jobs")[0] == 401
+    assert request(control, "GET", "/jobs", token="salah")[0] == 401
+    assert request(control, "GET", "/jobs", token="rahasia")[0] == 200
+
+def test_job_reports_chosen_fragments(control, runner, manager):
+    job_id, = add(control, "https://a.example/v1")
+    runner.call(manager.accept_metadata, job_id, {"title": "Video", "extractor": "Stub", "id": "v1"})
+    runner.call(manager.start)
+    assert runner.wait_until(lambda: manager.jobs.get(job_id)["status"] == "Completed")
+    status, data = request(control, "GET", f"/jobs/{job_id}")
+    assert status == 200 and data["fragments"] == manager.jobs.get(job_id)["fragments"] >= 1
@@ -0,0 +1,68 @@
+import time
+import pytest
+from shrine_engine import EnginePool
+
+# Pengganti modul yt_dlp untuk worker engine: URL berisi "slow" memanggil hook progress
+# selama beberapa detik, URL lain selesai hampir langsung.
+FAKE_YT_DLP = '''
+import time
+from . import utils
+
+class _Parsed:
+    def __init__(self, argv):
+        self.ydl_opts = {}
+        self.urls = [a for a in argv if a.startswith("http")]
+
+def parse_options(argv):
+    return _Parsed(argv)
+
+class YoutubeDL:
+    def __init__(self, opts):
+        self.opts = opts
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+    def download(self, urls):
+        steps = 100 if "slow" in urls[0] else 3
+        for i in range(1, steps + 1):
+            for hook in self.opts.get("progress_hooks", []):
+                hook({"status": "downloading", "downloaded_bytes": i, "total_bytes": steps, "info_dict": {}})
+            time.sleep(0.03)
+        return 0
+'''
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    package = tmp_path / "fake_modules" / "yt_dlp"
+    package.mkdir(parents=True)
+    (package / "__init__.py").write_text(FAKE_YT_DLP)
+    (package / "utils.py").write_text("class DownloadCancelled(Exception):\n    pass\n")
+    # Worker spawn mewarisi sys.path induk saat proses dimulai
+    monkeypatch.syspath_prepend(str(tmp_path / "fake_modules"))
+    pool = EnginePool(workers=1, progress_hz=20, cancel_grace=5.0)
+    pool.start()
+    yield pool
+    pool.close()
+
+def wait_finished(pool, job_id, on_started=None, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        event = pool.next_event(timeout=0.25)
+        if event is None or event[1] != job_id:
+            continue
+        if event[0] == "started" and on_started:
+            on_started()
+        elif event[0] == "finished":
+            return event[2]
+    raise AssertionError("job tidak selesai")
+
+def test_cancelled_job_can_be_submitted_again(engine):
+    engine.submit(1, ["https://a.example/slow1"])
+    result = wait_finished(engine, 1, on_started=lambda: engine.cancel(1))
+    assert result["returncode"] == 1 and "cancelled" in result["error"]
+    pids = [worker.process.pid for worker in engine.processes]
+    # Job yang dijeda lalu dilanjutkan kembali ke worker yang sama dengan ID yang sama
+    engine.submit(1, ["https://a.example/fast1"])
+    assert wait_finished(engine, 1) == {"returncode": 0, "error": ""}
+    assert [worker.process.pid for worker in engine.processes] == pids
@@ -0,0 +1,43 @@
+import json
+from shrine_core import JobStore, new_job
+from shrine_journal import QueueJournal
+
+def test_replay_skips_torn_last_line(tmp_path):
+    path = tmp_path / "queue.jsonl"
+    records = [
+        {"op": "add", "id": 1, "job": {"url": "https://a.example/1", "status": "Fetching"}},
+        {"op": "add", "id": 2, "job": {"url": "https://a.example/2", "status": "Fetching"}},
+        {"op": "update", "id": 1, "fields": {"status": "Completed", "title": "Satu"}},
+    ]
+    text = "".join(json.dumps(r) + "\n" for r in records)
+    # Crash di tengah menulis record terakhir
+    text += json.dumps({"op": "update", "id": 2, "fields": {"status": "Error"}})[:20]
+    path.write_text(text, encoding="utf-8")
+    jobs = QueueJournal(str(path)).load()
+    assert [(j["url"], j["status"]) for j in jobs] == [("https://a.example/1", "Completed"), ("https://a.example/2", "Fetching")]
+    assert jobs[0]["title"] == "Satu"
+
+def test_replay_clear_and_missing_file(tmp_path):
+    assert QueueJournal(str(tmp_path / "missing.jsonl")).load() == []
+    path = tmp_path / "queue.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"op": "add", "id": 1, "job": {"url": "u1", "status": "Queued"}}),
+        json.dumps({"op": "clear"}),
+        json.dumps({"op": "add", "id": 2, "job": {"url": "u2", "status": "Queued"}}),
+        json.dumps({"op": "update", "id": 1, "fields": {"status": "Completed"}}),
+    ]) + "\n", encoding="utf-8")
+    assert QueueJournal(str(path)).load() == [{"url": "u2", "status": "Queued"}]
+
+def test_job_store_changes_round_trip(tmp_path):
+    journal = QueueJournal(str(tmp_path / "queue.jsonl"))
+    journal.start()
+    store = JobStore(journal)
+    job = new_job("https://a.example/1")
+    store.add(job)
+    store.set_status(job, "Queued")
+    store.update(job, title="Judul", progress=50) # progress tidak disimpan
+    journal.close()
+    jobs = journal.load()
+    assert len(jobs) == 1
+    assert jobs[0]["status"] == "Queued" and jobs[0]["title"] == "Judul"
+    assert "progress" not in jobs[0]
@@ -0,0 +1,165 @@
+import os, sys, subprocess
+from shrine_core import DownloadManager, new_job, FORMAT_VIDEO, FORMAT_AUDIO
+
+def add_job(manager, url, video_id=None):
+    """Menambahkan job lalu langsung menerima metadatanya (tanpa fetch)."""
+    job = new_job(url)
+    job_id = manager.jobs.add(job)
+    manager.accept_metadata(job_id, {"title": "Video", "extractor": "Stub", "id": video_id or url.rsplit("/", 1)[-1]})
+    return job_id
+
+def test_screen_urls_merges_queued_and_repeated_urls(runner, manager):
+    first = runner.call(add_job, manager, "https://www.a.example/watch/v1")
+    fresh, duplicates = runner.call(manager.screen_urls, [
+        "https://a.example/watch/v1/?utm_source=x", # link yang sama dalam bentuk lain
+        "https://a.example/watch/v2",
+        "https://a.example/watch/v2",
+    ], FORMAT_VIDEO)
+    assert fresh == ["https://a.example/watch/v2"]
+    assert duplicates == {"https://a.example/watch/v1/?utm_source=x": first, "https://a.example/watch/v2": None}
+    # Format lain bukan duplikat
+    fresh, duplicates = runner.call(manager.screen_urls, ["https://a.example/watch/v1"], FORMAT_AUDIO)
+    assert fresh == ["https://a.example/watch/v1"] and duplicates == {}
+
+def test_same_video_from_another_url_is_skipped(runner, manager):
+    first = runner.call(add_job, manager, "https://a.example/watch/v1", "abc")
+    second = runner.call(add_job, manager, "https://b.example/embed/abc", "abc")
+    job = manager.jobs.get(second)
+    assert job["status"] == "Skipped"
+    assert f"duplicate of #{first}" in job["details"]
+    # Job yang dibatalkan tidak lagi menghalangi video yang sama
+    runner.call(manager.cancel, first)
+    third = runner.call(add_job, manager, "https://c.example/abc", "abc")
+    assert manager.jobs.get(third)["status"] == "Queued"
+
+def test_archived_video_is_skipped(runner, config, tmp_path):
+    os.makedirs(config["data_dir"], exist_ok=True)
+    with open(os.path.join(config["data_dir"], "archive.txt"), "w", encoding="utf-8") as f:
+        f.write("stub done1\n")
+    manager = runner.call(DownloadManager, config, runner.loop, str(tmp_path / "out"))
+    try:
+        skipped = runner.call(add_job, manager, "https://a.example/done1")
+        queued = runner.call(add_job, manager, "https://a.example/new1")
+        assert manager.jobs.get(skipped)["status"] == "Skipped"
+        assert "already downloaded" in manager.jobs.get(skipped)["details"]
+        assert manager.jobs.get(queued)["status"] == "Queued"
+    finally:
+        runner.call(manager.close)
+
+def test_completed_download_is_archived(runner, manager):
+    job_id = runner.call(add_job, manager, "https://a.example/fresh1")
+    runner.call(manager.start)
+    assert runner.wait_until(lambda: manager.jobs.get(job_id)["status"] == "Completed")
+    assert "stub fresh1" in manager.archives[manager.jobs.get(job_id)["format"]]
+    again = runner.call(add_job, manager, "https://b.example/fresh1")
+    assert manager.jobs.get(again)["status"] == "Skipped"
+
+def test_failed_download_reports_error(runner, manager):
+    job_id = runner.call(add_job, manager, "https://a.example/fail1")
+    runner.call(manager.start)
+    assert runner.wait_until(lambda: manager.jobs.get(job_id)["status"] == "Error")
+
+def record_events(manager, kinds):
+    events = []
+    manager.add_listener(lambda event, job_id, data: events.append((event, job_id, data)) if event in kinds else None)
+    return events
+
+def test_reorder_then_cancel_keeps_queue_order(runner, manager):
+    first, second, third = [runner.call(add_job, manager, f"https://a.example/v{n}") for n in range(1, 4)]
+    runner.call(manager.move_job, third, 0)
+    runner.call(manager.cancel, third)
+    runner.call(manager.move_job, second, 0)
+    events = runner.call(record_events, manager, ("finished",))
+    runner.call(manager.start)
+    assert runner.wait_until(lambda: len(events) == 2)
+    assert [(job_id, data[0]) for _, job_id, data in events] == [(second, "success"), (first, "success")]
+    assert manager.jobs.get(third)["status"] == "Cancelled"
+
+def test_download_now_pauses_and_resumes_preempted_job(runner, manager):
+    slow = runner.call(add_job, manager, "https://a.example/slow1")
+    events = runner.call(record_events, manager, ("finished",))
+    runner.call(manager.start)
+    assert runner.wait_until(lambda: slow in manager.processes)
+    urgent = runner.call(add_job, manager, "https://b.example/urgent1")
+    assert runner.call(manager.download_now, urgent)
+    assert runner.wait_until(lambda: len(events) == 3, timeout=30)
+    assert [(job_id, data[0]) for _, job_id, data in events] == [(slow, "paused"), (urgent, "success"), (slow, "success")]
+    assert manager.jobs.get(slow)["status"] == "Completed" and not manager.jobs.get(slow).get("priority")
+
+def test_moving_fetching_job_changes_download_order(runner, manager):
+    jobs = [new_job(f"https://a.example/f{n}") for n in range(1, 4)]
+    first, second, third = [runner.call(manager.jobs.add, job) for job in jobs]
+    # Metadata belum ada: job masih Fetching saat diseret ke baris paling atas
+    runner.call(manager.move_job, third, 0)
+    for job_id in (first, second, third):
+        runner.call(manager.accept_metadata, job_id, {"title": "Video", "extractor": "Stub", "id": f"f{job_id}"})
+    events = runner.call(record_events, manager, ("finished",))
+    runner.call(manager.start)
+    assert runner.wait_until(lambda: len(events) == 3)
+    assert [job_id for _, job_id, _ in events] == [third, first, second]
+
+def fetch_wanted(manager):
+    """Fetcher tiruan: menerima metadata setiap job yang diminta MetadataPlanner."""
+    wanted = manager.metadata.wanted()
+    for job_id in wanted:
+        url = manager.jobs.get(job_id)["url"]
+        extractor = "TikTok" if "tiktok" in url else "Youtube"
+        manager.accept_metadata(job_id, {"title": "Video", "extractor": extractor, "id": url.rsplit("/", 1)[-1]})
+    return wanted
+
+def test_metadata_horizon_skips_saturated_host(runner, config, tmp_path):
+    config.update(max_parallel_downloads=3, metadata_horizon=10, host_limits={"tiktok": {"max_concurrent": 2}})
+    manager = runner.call(DownloadManager, config, runner.loop, str(tmp_path / "out"))
+    try:
+        urls = [f"https://www.tiktok.com/@u/video/slowt{n}" for n in range(15)]
+        urls += [f"https://www.youtube.com/watch/slowy{n}" for n in range(3)]
+        for url in urls:
+            job = new_job(url)
+            runner.call(manager.jobs.add, job)
+            runner.call(manager.metadata.add, job)
+        first = runner.call(fetch_wanted, manager)
+        assert len(first) == 10 and all("tiktok" in manager.jobs.get(j)["url"] for j in first)
+        runner.call(manager.start)
+        # TikTok penuh (2 slot) dengan cadangan cukup: horizon melewatinya ke YouTube
+        runner.call(fetch_wanted, manager)
+        hosts = sorted(runner.call(lambda: list(manager.scheduler.running.values())))
+        assert hosts == ["tiktok", "tiktok", "youtube"]
+        assert runner.call(manager.jobs.count, "Fetching") == 5
+    finally:
+        runner.call(manager.close)
+
+def test_subprocess_bandwidth_share_follows_running_downloads(runner, config, tmp_path):
+    config.update(max_parallel_downloads=2, bandwidth_limit=1000)
+    manager = runner.call(DownloadManager, config, runner.loop, str(tmp_path / "out"))
+    try:
+        events = runner.call(record_events, manager, ("finished",))
+        first = runner.call(add_job, manager, "https://a.example/slow1")
+        runner.call(manager.start)
+        # Satu unduhan mendapat seluruh batas, bukan 1/max_parallel
+        assert manager.jobs.get(first)["rate_limit"] == 1000
+        assert runner.wait_until(lambda: first in manager.processes)
+        second = runner.call(add_job, manager, "https://b.example/slow2")
+        # Unduhan kedua membuat yang pertama melewati bagiannya: dimulai ulang dengan --continue
+        assert runner.wait_until(lambda: (first, ("paused", "log_download_paused")) in [(j, d) for _, j, d in events])
+        assert runner.wait_until(lambda: manager.jobs.get(first)["status"] == "Downloading")
+        assert manager.jobs.get(first)["rate_limit"] == manager.jobs.get(second)["rate_limit"] == 500
+        # Batas baru diterapkan ke proses yang berjalan saat housekeeping
+        runner.call(manager.set_bandwidth_limit, 4000)
+        runner.call(manager.rebalance_subprocess_rates)
+        assert runner.wait_until(lambda: all(manager.jobs.get(j)["rate_limit"] == 2000 and manager.jobs.get(j)["status"] == "Downloading"
+                                             for j in (first, second)))
+        assert runner.wait_until(lambda: all(manager.jobs.get(j)["status"] == "Completed" for j in (first, second)), timeout=30)
+    finally:
+        runner.call(manager.close)
+
+def test_process_started_after_preempt_is_killed(runner, manager):
+    job_id = runner.call(add_job, manager, "https://a.example/v1")
+    # Dijeda oleh "download now" sebelum thread unduhan sempat menjalankan prosesnya
+    manager.jobs.get(job_id)["preempted"] = True
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        manager.on_process_started(job_id, process)
+        assert process.wait(5) is not None
+    finally:
+        if process.poll() is None:
+            process.kill()
@@ -0,0 +1,86 @@
+from shrine_core import DownloadScheduler
+
+def start_next(scheduler, hosts):
+    job_id, wait = scheduler.pop_next()
+    if job_id is not None:
+        scheduler.mark_started(job_id, hosts[job_id])
+    return job_id, wait
+
+def test_max_concurrent_per_host_leaves_slots_to_other_hosts():
+    hosts = {1: "a", 2: "a", 3: "b"}
+    scheduler = DownloadScheduler(3, {"a": {"max_concurrent": 1}})
+    for job_id, host in hosts.items():
+        scheduler.enqueue(job_id, host)
+    assert start_next(scheduler, hosts) == (1, None)
+    # Host a penuh: job 2 menunggu, slot diisi host b
+    assert start_next(scheduler, hosts) == (3, None)
+    assert start_next(scheduler, hosts) == (None, None)
+    scheduler.mark_finished(1)
+    assert start_next(scheduler, hosts) == (2, None)
+
+def test_default_host_limit_and_override():
+    scheduler = DownloadScheduler(5, {"default": {"max_concurrent": 1}, "b": {"max_concurrent": 2}})
+    assert scheduler.limits_for("a") == (1, 0.0)
+    assert scheduler.limits_for("b") == (2, 0.0)
+    hosts = {1: "b", 2: "b", 3: "b"}
+    for job_id, host in hosts.items():
+        scheduler.enqueue(job_id, host)
+    assert [start_next(scheduler, hosts)[0] for _ in range(3)] == [1, 2, None]
+    assert scheduler.host_is_full("b")
+
+def test_min_start_interval_returns_wait():
+    hosts = {1: "a", 2: "a"}
+    scheduler = DownloadScheduler(3, {"a": {"min_start_interval": 30}})
+    for job_id, host in hosts.items():
+        scheduler.enqueue(job_id, host)
+    assert start_next(scheduler, hosts) == (1, None)
+    job_id, wait = start_next(scheduler, hosts)
+    assert job_id is None and 0 < wait <= 30
+    assert scheduler.is_waiting(2)
+
+def test_global_slots():
+    hosts = {1: "a", 2: "b"}
+    scheduler = DownloadScheduler(1)
+    for job_id, host in hosts.items():
+        scheduler.enqueue(job_id, host)
+    start_next(scheduler, hosts)
+    assert not scheduler.has_free_slot()
+    scheduler.mark_finished(1)
+    assert start_next(scheduler, hosts) == (2, None)
+
+def test_cancel_after_reorder_drops_stale_entries():
+    hosts = {1: "a", 2: "a", 3: "a"}
+    scheduler = DownloadScheduler(1)
+    for job_id, host in hosts.items():
+        scheduler.enqueue(job_id, host)
+    # Job 3 dipindah ke depan lalu dibatalkan: kedua entrinya di heap jadi usang
+    scheduler.enqueue(3, "a", 0, 0)
+    scheduler.remove(3)
+    # Job 1 dinaikkan lalu dikembalikan ke belakang job 2
+    scheduler.enqueue(1, "a", 2, 1)
+    scheduler.enqueue(1, "a", 0, 5)
+    assert not scheduler.is_waiting(3)
+    assert start_next(scheduler, hosts) == (2, None)
+    scheduler.mark_finished(2)
+    assert start_next(scheduler, hosts) == (1, None)
+    scheduler.mark_finished(1)
+    assert start_next(scheduler, hosts) == (None, None)
+    assert not scheduler.ready and not scheduler.has_pending()
+
+def test_ready_count_ignores_saturated_host():
+    hosts = {n: "a" for n in range(1, 6)}
+    hosts[6] = "b"
+    scheduler = DownloadScheduler(3, {"a": {"max_concurrent": 2}})
+    for job_id in range(1, 6):
+        scheduler.enqueue(job_id, "a")
+    assert scheduler.ready_count() == 5 and not scheduler.saturated("a")
+    start_next(scheduler, hosts)
+    start_next(scheduler, hosts)
+    # Host a penuh dan masih punya 3 job siap: tidak dihitung untuk horizon metadata
+    assert scheduler.saturated("a") and scheduler.ready_count() == 0
+    scheduler.enqueue(6, "b")
+    scheduler.enqueue(5, "a", 1) # kunci baru, job yang sama tidak dihitung dua kali
+    assert scheduler.waiting_per_host["a"] == 3 and scheduler.ready_count() == 1
+    scheduler.remove(4)
+    scheduler.remove(5)
+    assert not scheduler.saturated("a") and scheduler.ready_count() == 2